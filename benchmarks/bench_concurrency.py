@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+并发基准：大量慢速下载同时进行时，WSGI（gunicorn sync）与 ASGI（uvicorn）方式的对比
+
+用法（在仓库根目录执行，需要安装 gunicorn、uvicorn、a2wsgi）:
+    python benchmarks/bench_concurrency.py --clients 1000 --duration 10
+
+每个慢速客户端发起一次大文件下载，按 --rate-kb 限速读取，持续 --duration 秒后断开；
+与此同时另一个客户端不断请求目录列表接口（/_list/），统计其延迟。结果包括:
+    - 在 duration 内收到响应头的慢速下载数量（其余的还在排队等 worker）
+    - 慢速下载的首字节时间
+    - 目录列表请求的延迟（p50 / p99）和超时次数
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from common import require, run_server, server_process
+
+MODES = ('wsgi', 'asgi')
+FILE_NAME = 'payload.bin'
+
+
+def serve(port, mode, root, workers):
+    """子进程入口：以指定方式运行文件服务器"""
+    import new_file_server
+
+    new_file_server.FILE_ROOT = Path(root)
+
+    if mode == 'asgi':
+        from file_server.asgi import create_asgi_app
+
+        run_server(create_asgi_app(), port, 'uvicorn', backlog=4096)
+        return
+
+    run_server(new_file_server.app, port, workers=workers, backlog=4096)
+
+
+async def slow_download(port, path, rate, deadline, stats):
+    """限速读取一个下载，记录首字节时间；到 deadline 时主动断开"""
+    start = time.perf_counter()
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=64 * 1024)
+    except OSError:
+        stats['connect_errors'] += 1
+        return
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n'.encode())
+        remaining = deadline - time.perf_counter()
+        await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), max(remaining, 0.01))
+        stats['ttfb'].append(time.perf_counter() - start)
+
+        chunk = max(rate // 10, 1)
+        while time.perf_counter() < deadline:
+            data = await reader.read(chunk)
+            if not data:
+                break
+            stats['bytes'] += len(data)
+            await asyncio.sleep(0.1)
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError):
+        pass
+    finally:
+        writer.close()
+
+
+async def probe_listing(port, deadline, timeout, stats):
+    """下载进行期间不断请求目录列表接口，记录延迟"""
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection('127.0.0.1', port), timeout)
+            writer.write(b'GET /_list/?limit=50 HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n')
+            await asyncio.wait_for(reader.read(), timeout)
+            writer.close()
+            stats['listing'].append(time.perf_counter() - start)
+        except (asyncio.TimeoutError, OSError):
+            stats['listing_timeouts'] += 1
+        await asyncio.sleep(0.2)
+
+
+async def run_load(port, args):
+    stats = {'ttfb': [], 'bytes': 0, 'connect_errors': 0, 'listing': [], 'listing_timeouts': 0}
+    deadline = time.perf_counter() + args.duration
+    tasks = [slow_download(port, f'/{FILE_NAME}', args.rate_kb * 1024, deadline, stats)
+             for _ in range(args.clients)]
+    tasks.append(probe_listing(port, deadline, args.probe_timeout, stats))
+    await asyncio.gather(*tasks)
+    return stats
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_mode(mode, root, args):
+    with server_process(__file__, mode, root, args.workers) as port:
+        stats = asyncio.run(run_load(port, args))
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 1)
+
+    return {
+        'mode': mode,
+        'clients': args.clients,
+        'downloads_started': len(stats['ttfb']),
+        'connect_errors': stats['connect_errors'],
+        'ttfb_p50_ms': ms(percentile(stats['ttfb'], 50)),
+        'ttfb_p99_ms': ms(percentile(stats['ttfb'], 99)),
+        'download_mb': round(stats['bytes'] / 1e6, 1),
+        'listing_requests': len(stats['listing']),
+        'listing_timeouts': stats['listing_timeouts'],
+        'listing_p50_ms': ms(statistics.median(stats['listing']) if stats['listing'] else None),
+        'listing_p99_ms': ms(percentile(stats['listing'], 99)),
+    }
+
+
+def raise_fd_limit(needed):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--clients', type=int, default=1000, help='同时进行的慢速下载数量')
+    parser.add_argument('--rate-kb', type=int, default=64, help='每个慢速客户端的读取速度（KB/s）')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--size-mb', type=int, default=64, help='下载文件大小，需大于 duration 内能读完的量')
+    parser.add_argument('--workers', type=int, default=4, help='WSGI 方式的 gunicorn worker 数量')
+    parser.add_argument('--probe-timeout', type=float, default=5.0, help='目录列表请求的超时时间')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    parser.add_argument('--serve', nargs=4, metavar=('PORT', 'MODE', 'ROOT', 'WORKERS'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # 服务端和客户端都要为每个连接占用一个文件描述符
+    raise_fd_limit(args.clients * 2 + 256)
+
+    if args.serve:
+        port, mode, root, workers = args.serve
+        serve(int(port), mode, root, int(workers))
+        return
+
+    require('gunicorn', 'uvicorn', 'a2wsgi')
+
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        with open(os.path.join(root, FILE_NAME), 'wb') as f:
+            block = os.urandom(1024 * 1024)
+            for _ in range(args.size_mb):
+                f.write(block)
+        for name in range(100):
+            Path(root, f'file_{name:03d}.txt').write_text('x')
+        for mode in args.modes:
+            results.append(run_mode(mode, root, args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"[{r['mode']}]")
+        for key, value in r.items():
+            if key != 'mode':
+                print(f"{key:>20}: {value}")
+
+
+if __name__ == '__main__':
+    main()
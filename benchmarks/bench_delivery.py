@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+文件下载方式基准：比较各 FILE_DELIVERY_MODE 的吞吐量和 worker 占用时间
+
+    python   - Python 逐块读取发送（使用 Werkzeug 的 FileWrapper，相当于开发服务器的行为）
+    sendfile - gunicorn 的 wsgi.file_wrapper + os.sendfile
+    x-accel / x-sendfile - Python 只返回响应头（本地没有 nginx，测的是 worker 处理一次下载的耗时）
+
+用法（在仓库根目录执行，需要安装 gunicorn）:
+    python benchmarks/bench_delivery.py --size-mb 512 --requests 8 --clients 4
+
+每种方式都在独立的 gunicorn 进程（1 个 sync worker）中运行，worker 占用时间由包在应用
+外层的 WSGI 中间件统计：从调用应用开始，到响应迭代器 close() 为止。
+"""
+
+import argparse
+import http.client
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from werkzeug.wsgi import FileWrapper
+
+from common import get_json, require, run_server, server_process
+MODES = ('python', 'sendfile', 'x-accel', 'x-sendfile')
+FILE_NAME = 'payload.bin'
+
+
+class PlainFileWrapper(FileWrapper):
+    """Werkzeug 的 FileWrapper，filelike 为空，gunicorn 无法 sendfile，只能逐块迭代发送"""
+    filelike = None
+
+
+class OccupancyMiddleware:
+    """统计 worker 处理下载请求的累计耗时，/_bench_stats 返回统计结果"""
+
+    def __init__(self, app, strip_file_wrapper=False):
+        self.app = app
+        self.strip_file_wrapper = strip_file_wrapper
+        self.busy = 0.0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO') == '/_bench_stats':
+            body = json.dumps({'busy': self.busy, 'requests': self.requests}).encode()
+            start_response('200 OK', [('Content-Type', 'application/json'),
+                                      ('Content-Length', str(len(body)))])
+            return [body]
+
+        if self.strip_file_wrapper:
+            environ['wsgi.file_wrapper'] = PlainFileWrapper
+
+        start = time.perf_counter()
+        result = self.app(environ, start_response)
+        middleware = self
+
+        # gunicorn 只对 file_wrapper 实例调用 sendfile，不能包一层迭代器，改为挂 close 钩子
+        original_close = getattr(result, 'close', None)
+
+        def close():
+            if original_close is not None:
+                original_close()
+            with middleware.lock:
+                middleware.busy += time.perf_counter() - start
+                middleware.requests += 1
+
+        try:
+            result.close = close
+        except AttributeError:
+            result = _ClosingIterable(result, close)
+        return result
+
+
+class _ClosingIterable:
+    def __init__(self, iterable, close):
+        self.iterable = iterable
+        self.close = close
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+
+def serve(port, mode, root):
+    """子进程入口：在 gunicorn（1 个 sync worker）中以指定方式运行文件服务器"""
+    import new_file_server
+
+    new_file_server.FILE_ROOT = Path(root)
+    new_file_server.FILE_DELIVERY_MODE = 'sendfile' if mode == 'python' else mode
+    run_server(OccupancyMiddleware(new_file_server.app, strip_file_wrapper=(mode == 'python')), port)
+
+
+def fetch(port, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+    try:
+        conn.request('GET', path)
+        response = conn.getresponse()
+        received = 0
+        while True:
+            chunk = response.read(1024 * 1024)
+            if not chunk:
+                break
+            received += len(chunk)
+        return received
+    finally:
+        conn.close()
+
+
+def run_mode(mode, root, args):
+    with server_process(__file__, mode, root) as port:
+        fetch(port, f'/{FILE_NAME}')  # 预热页缓存
+        before = get_json(port, '/_bench_stats')
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.clients) as pool:
+            received = sum(pool.map(lambda _: fetch(port, f'/{FILE_NAME}'), range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+        after = get_json(port, '/_bench_stats')
+
+    busy = after['busy'] - before['busy']
+    handled = after['requests'] - before['requests']
+    return {
+        'mode': mode,
+        'requests': args.requests,
+        'clients': args.clients,
+        'seconds': round(elapsed, 4),
+        'body_mb_per_s': round(received / elapsed / 1e6, 1),
+        'worker_busy_ms_per_request': round(busy / max(handled, 1) * 1000, 3),
+        'requests_per_s': round(args.requests / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-mb', type=int, default=512)
+    parser.add_argument('--requests', type=int, default=8)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    parser.add_argument('--serve', nargs=3, metavar=('PORT', 'MODE', 'ROOT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        port, mode, root = args.serve
+        serve(int(port), mode, root)
+        return
+
+    require('gunicorn')
+
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        with open(os.path.join(root, FILE_NAME), 'wb') as f:
+            block = os.urandom(1024 * 1024)
+            for _ in range(args.size_mb):
+                f.write(block)
+        for mode in args.modes:
+            results.append(run_mode(mode, root, args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'方式':>10} {'吞吐(MB/s)':>12} {'worker 占用(ms/次)':>18} {'请求/秒':>8}")
+    for r in results:
+        print(f"{r['mode']:>12} {r['body_mb_per_s']:>14} {r['worker_busy_ms_per_request']:>22} {r['requests_per_s']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+目录列表渲染基准：每 1 万条目的渲染耗时
+
+用法（在仓库根目录执行）:
+    python benchmarks/bench_render.py --entries 10000 100000
+
+  legacy  - 改造前的写法：Jinja 逐行生成 Bootstrap 标记，每行调用 humanize.naturalsize /
+            naturaltime(datetime.fromtimestamp(...))
+  server  - formatting.with_human_fields 整页格式化后由 Jinja 渲染（LISTING_CLIENT_RENDER = False）
+  client  - compact_entries 按列生成紧凑 JSON 并序列化，HTML 由浏览器生成（默认方式）
+
+条目在内存中生成（不访问磁盘），只比较格式化和渲染本身。
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import humanize
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# 改造前 index.html 中文件列表的一行（过滤器在模板中逐行调用）
+LEGACY_ROWS = """
+{% for item in items %}
+<div class="list-group-item list-group-item-action d-flex justify-content-between align-items-center">
+    <input class="form-check-input me-2 flex-shrink-0 select-entry" type="checkbox" value="{{ item.name }}" aria-label="选择 {{ item.name }}">
+    <a href="/{{ current_path }}/{{ item.name }}{% if item.is_dir %}/{% endif %}" class="text-decoration-none text-dark flex-grow-1 text-truncate">
+        <i class="{{ item.icon }} me-2 text-primary"></i>
+        <span class="fw-bold">{{ item.name }}</span>
+    </a>
+    <div class="text-muted small d-flex align-items-center">
+        {% if not item.is_dir %}
+        <span class="me-3">{{ item.size | legacy_size }}</span>
+        {% endif %}
+        <span class="me-3">{{ item.mtime | legacy_time }}</span>
+        {% if item.type in ['ebook', 'pdf', 'text', 'archive'] %}
+        <a href="/{{ current_path }}/{{ item.name }}?dl=1" class="btn btn-sm btn-outline-success" title="下载">
+            <i class="bi bi-download"></i>
+        </a>
+        {% endif %}
+    </div>
+</div>
+{% endfor %}
+"""
+
+# 同样的标记，大小和时间已经整页格式化好
+SERVER_ROWS = LEGACY_ROWS.replace('item.size | legacy_size', 'item.size_h').replace(
+    'item.mtime | legacy_time', 'item.mtime_h')
+
+
+def make_entries(count, types, seed=1):
+    """与 build_listing 结果相同结构的条目，按名称排序"""
+    rng = random.Random(seed)
+    now = time.time()
+    entries = []
+    for i in range(count):
+        file_type = rng.choice(types)
+        is_dir = file_type == 'folder'
+        entries.append({
+            'name': f"{rng.choice(('IMG_', 'report_', '照片_', 'backup-'))}{i:07d}.{file_type}",
+            'mtime': now - rng.expovariate(1 / (90 * 86400)),
+            'size': 0 if is_dir else int(rng.lognormvariate(12, 3)),
+            'is_dir': is_dir,
+            'type': file_type,
+            'icon': 'bi-file-earmark',
+        })
+    entries.sort(key=lambda e: e['name'].lower())
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--entries', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    # 缓存目录在导入时由 Path.home() 决定，换成临时目录
+    home = tempfile.mkdtemp(prefix='bench_render_home_')
+    os.environ['HOME'] = home
+    import new_file_server
+    from file_server import formatting
+
+    app = new_file_server.app
+    app.jinja_env.filters['legacy_size'] = humanize.naturalsize
+    app.jinja_env.filters['legacy_time'] = lambda ts: humanize.naturaltime(datetime.fromtimestamp(ts))
+    legacy_template = app.jinja_env.from_string(LEGACY_ROWS)
+    server_template = app.jinja_env.from_string(SERVER_ROWS)
+
+    def legacy(entries):
+        return len(legacy_template.render(items=entries, current_path='bench'))
+
+    def server(entries):
+        rows = formatting.with_human_fields(entries)
+        return len(server_template.render(items=rows, current_path='bench'))
+
+    def client(entries):
+        data = {'types': new_file_server.listing_types(),
+                'entries': new_file_server.compact_entries(entries)}
+        return len(json.dumps(data, ensure_ascii=False).encode())
+
+    methods = {'legacy': legacy, 'server': server, 'client': client}
+    results = []
+    for count in args.entries:
+        entries = make_entries(count, new_file_server.LISTING_TYPES)
+        for name, func in methods.items():
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                size = func(entries)
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            results.append({
+                'entries': count,
+                'method': name,
+                'best_ms': round(best * 1000, 2),
+                'ms_per_10k': round(best * 1000 * 10_000 / count, 2),
+                'output_kb': round(size / 1024, 1),
+            })
+    shutil.rmtree(home, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'条目数':>8} {'方式':>8} {'最快(ms)':>10} {'每万条(ms)':>12} {'输出(KB)':>10}")
+    for r in results:
+        print(f"{r['entries']:>10} {r['method']:>10} {r['best_ms']:>12} {r['ms_per_10k']:>14} {r['output_kb']:>12}")
+
+
+if __name__ == '__main__':
+    main()
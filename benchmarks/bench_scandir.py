@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+目录列表基准：旧的 Path.iterdir() + is_dir() + stat() 写法 对比 utils.scan_directory
+
+用法（在仓库根目录执行）:
+    python benchmarks/bench_scandir.py --sizes 1000 10000 100000
+
+系统调用次数：装有 strace 时用 `strace -c` 统计真实的 stat 类调用；
+否则统计 Python 层 os.stat 的调用次数（DirEntry.stat 在 C 层完成，按每条目一次计）。
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gui_file_server.utils import scan_directory  # noqa: E402
+
+STAT_SYSCALLS = ('stat', 'lstat', 'fstat', 'newfstatat', 'statx', 'fstatat64', 'stat64', 'lstat64')
+
+
+def legacy_listing(dir_path):
+    """改造前 FileServerView.get 的遍历方式"""
+    result = []
+    for item in sorted(Path(dir_path).iterdir(), key=lambda x: (not x.is_dir(), x.name.lower())):
+        if item.name.startswith('.'):
+            continue
+        try:
+            stat_res = item.stat()
+        except FileNotFoundError:
+            continue
+        result.append((item.name, item.is_dir(), stat_res.st_size, stat_res.st_mtime))
+    return result
+
+
+def scandir_listing(dir_path):
+    return scan_directory(dir_path)
+
+
+METHODS = {'legacy': legacy_listing, 'scandir': scandir_listing}
+
+
+def make_tree(root, count):
+    """生成 count 个条目的宽目录，其中约 5% 为子目录"""
+    target = Path(root) / f'wide_{count}'
+    target.mkdir()
+    for i in range(count):
+        if i % 20 == 0:
+            (target / f'dir_{i:06d}').mkdir()
+        else:
+            (target / f'file_{i:06d}.txt').write_bytes(b'x' * (i % 512))
+    return target
+
+
+def count_python_stats(func, dir_path):
+    """统计 Python 层 os.stat 调用次数"""
+    calls = 0
+    real_stat = os.stat
+
+    def counting_stat(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return real_stat(*args, **kwargs)
+
+    os.stat = counting_stat
+    try:
+        entries = func(dir_path)
+    finally:
+        os.stat = real_stat
+    if func is scandir_listing:
+        calls += len(entries)
+    return calls
+
+
+def count_strace_stats(method, dir_path):
+    """在子进程中用 strace -c 统计 stat 类系统调用，减去只导入模块时的基线"""
+    setup = (
+        'import sys; sys.path.insert(0, %r); '
+        'from benchmarks.bench_scandir import METHODS'
+        % str(Path(__file__).resolve().parent.parent)
+    )
+    run = '%s; METHODS[%r](%r)' % (setup, method, str(dir_path))
+    return _strace_stat_calls(run) - _strace_stat_calls(setup)
+
+
+def _strace_stat_calls(code):
+    report = subprocess.run(
+        ['strace', '-f', '-c', '-e', 'trace=%stat', sys.executable, '-c', code],
+        capture_output=True, text=True,
+    ).stderr
+    return _sum_strace(report)
+
+
+def _sum_strace(report):
+    total = 0
+    for line in report.splitlines():
+        parts = line.split()
+        if len(parts) >= 5 and parts[-1] in STAT_SYSCALLS:
+            try:
+                total += int(parts[3])
+            except ValueError:
+                pass
+    return total
+
+
+def time_it(func, dir_path, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(dir_path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    use_strace = shutil.which('strace') is not None
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            dir_path = make_tree(tmp, size)
+            for name, func in METHODS.items():
+                syscalls = (count_strace_stats(name, dir_path) if use_strace
+                            else count_python_stats(func, dir_path))
+                results.append({
+                    'entries': size,
+                    'method': name,
+                    'seconds': round(time_it(func, dir_path, args.repeat), 6),
+                    'stat_calls': syscalls,
+                    'stat_source': 'strace' if use_strace else 'python',
+                })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'条目数':>8} {'方法':>8} {'耗时(ms)':>10} {'stat 调用':>10}")
+    for r in results:
+        print(f"{r['entries']:>10} {r['method']:>10} {r['seconds'] * 1000:>12.1f} {r['stat_calls']:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+文件名搜索基准：百万级路径的查询耗时，以及目录树的全量 / 增量索引耗时
+
+用法（在仓库根目录执行，只依赖标准库）:
+    python benchmarks/bench_search.py --paths 1000000 --files 20000
+
+两部分:
+    查询 - 直接向索引写入 --paths 条合成路径（不创建真实文件），对每个查询分别用 SearchIndex.search
+           （FTS5 trigram）和在 entries 表上 LIKE 全表扫描计时
+    刷新 - 在临时目录中创建 --files 个空文件，测量首次建索引、无变化时的增量刷新，以及
+           新增一个文件后的增量刷新；再对比请求中递归遍历（du）与读取预先计算的文件夹统计的耗时
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gui_file_server.search_index import SearchIndex  # noqa: E402
+
+WORDS = ('photo', 'video', 'report', 'backup', 'project', 'music', 'invoice', 'scan', 'draft', 'final',
+         '照片', '视频', '报告', '备份', '项目', '音乐', '合同', '扫描')
+EXTENSIONS = ('jpg', 'png', 'mp4', 'mkv', 'pdf', 'txt', 'md', 'zip', 'mp3', 'docx')
+QUERIES = ('report', 'IMG_2023', 'final_0420', '*.mkv', 'invoice 2021', 'backup_19', '合同', 'zzz_missing')
+
+
+def synthetic_rows(count, seed):
+    """生成 (path, name, parent, is_dir, size, mtime)，目录层级 3~5 级，每个目录约 200 个文件"""
+    rng = random.Random(seed)
+    dirs = []
+    for d in range(max(count // 200, 1)):
+        depth = rng.randint(2, 4)
+        parts = [f"{rng.choice(WORDS)}_{rng.randint(1990, 2025)}" for _ in range(depth)] + [f"d{d}"]
+        dirs.append('/'.join(parts))
+    now = time.time()
+    for i in range(count):
+        parent = dirs[i % len(dirs)]
+        prefix = rng.choice(('IMG_', 'DSC', '', '', rng.choice(WORDS) + '_'))
+        name = f"{prefix}{rng.randint(2000, 2025)}{rng.randint(101, 1231):04d}_{i}.{rng.choice(EXTENSIONS)}"
+        yield f"{parent}/{name}", name, parent, 0, rng.randint(0, 1 << 30), now - rng.randint(0, 10 ** 8)
+
+
+def time_call(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, result
+
+
+def bench_queries(work, args):
+    index = SearchIndex(work, os.path.join(work, 'paths.db'))
+    conn = index._connect()
+    start = time.perf_counter()
+    # 与 SearchIndex.refresh 首次建索引相同：先写入 entries，再一次性重建全文索引
+    conn.execute("INSERT INTO meta (key, value) VALUES ('fts_pending', '1')")
+    conn.executemany('INSERT INTO entries (path, name, parent, is_dir, size, mtime) VALUES (?, ?, ?, ?, ?, ?)',
+                     synthetic_rows(args.paths, args.seed))
+    conn.execute("INSERT INTO names(names) VALUES ('rebuild')")
+    conn.execute("DELETE FROM meta WHERE key = 'fts_pending'")
+    conn.commit()
+    build_seconds = time.perf_counter() - start
+
+    rows = []
+    for query in QUERIES:
+        fts_ms, results = time_call(lambda: index.search(query, limit=args.limit), args.repeat)
+        # 对照：不用 FTS 索引，在普通表上对第一个关键词做 LIKE 扫描
+        term = query.split()[0].replace('*', '%')
+        pattern = term if '%' in term else f'%{term}%'
+        scan_ms, _ = time_call(lambda: conn.execute(
+            'SELECT path FROM entries WHERE path LIKE ? LIMIT ?', (pattern, args.limit)).fetchall(), args.repeat)
+        rows.append({'query': query, 'results': len(results),
+                     'fts_ms': round(fts_ms, 2), 'table_scan_ms': round(scan_ms, 2)})
+    return {
+        'paths': args.paths,
+        'insert_seconds': round(build_seconds, 1),
+        'db_mb': round(os.path.getsize(index.db_path) / 1e6, 1),
+        'queries': rows,
+    }
+
+
+def bench_refresh(work, args):
+    root = Path(work, 'tree')
+    for i in range(args.files):
+        directory = root / f"a{i // 5000:02d}" / f"b{i // 100:04d}"
+        if i % 100 == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file_{i}.txt").touch()
+
+    index = SearchIndex(root, os.path.join(work, 'tree.db'))
+    full = index.refresh()
+    unchanged = index.refresh()
+    (root / 'a00' / 'b0000' / 'new_file.txt').touch()
+    one_new = index.refresh()
+
+    def du():
+        total = 0
+        for dirpath, _, files in os.walk(root):
+            total += sum(os.stat(os.path.join(dirpath, name)).st_size for name in files)
+        return total
+
+    du_ms, _ = time_call(du, args.repeat)
+    totals_ms, _ = time_call(lambda: (index.totals(''), index.child_totals('')), args.repeat)
+    return {
+        'files': args.files,
+        'full_seconds': full['seconds'],
+        'unchanged_seconds': unchanged['seconds'],
+        'one_new_file_seconds': one_new['seconds'],
+        'one_new_file_rescanned_dirs': one_new['changed_dirs'],
+        'du_walk_ms': round(du_ms, 2),
+        'folder_totals_ms': round(totals_ms, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--paths', type=int, default=1_000_000, help='查询测试的合成路径数')
+    parser.add_argument('--files', type=int, default=20_000, help='刷新测试创建的文件数')
+    parser.add_argument('--limit', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work:
+        print(f"写入 {args.paths} 条合成路径 ...", file=sys.stderr)
+        result = {'query': bench_queries(work, args), 'refresh': bench_refresh(work, args)}
+
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+    query = result['query']
+    print(f"{query['paths']} 条路径，写入 {query['insert_seconds']} s，索引文件 {query['db_mb']} MB")
+    print(f"{'查询':<16}{'结果数':>8}{'FTS ms':>10}{'全表扫描 ms':>14}")
+    for row in query['queries']:
+        print(f"{row['query']:<16}{row['results']:>8}{row['fts_ms']:>10}{row['table_scan_ms']:>14}")
+    for key, value in result['refresh'].items():
+        print(f"{key:>28}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+拖动进度条基准：模拟在大视频文件中随机跳转，测量每次跳转的首字节时间
+
+用法（在仓库根目录执行，需要安装 gunicorn；asgi 方式另需 uvicorn、a2wsgi）:
+    python benchmarks/bench_seek.py --size-gb 2 --seeks 40
+
+每次跳转像浏览器的 <video> 一样发送开放式 Range（bytes=N-），读到 --read-kb 后断开连接。
+比较的方式:
+    legacy   - 改动前的行为：send_file(conditional=True)，gunicorn 下 Werkzeug 从文件开头读到偏移
+    gunicorn - 当前的 make_range_response（seek 后 sendfile）
+    asgi     - file_server.asgi（pread 指定偏移）
+每次响应的内容都会和本地文件对比，另外检查一次多段 Range（multipart/byteranges）。
+默认创建稀疏文件，读取不涉及磁盘；--dense 写入真实数据（会占用磁盘空间和时间）。
+"""
+
+import argparse
+import email
+import http.client
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from common import require, run_server, server_process
+
+MODES = ('legacy', 'gunicorn', 'asgi')
+FILE_NAME = 'movie.mp4'
+
+
+def serve(port, mode, root):
+    """子进程入口：以指定方式运行文件服务器"""
+    import new_file_server
+
+    new_file_server.create_app(root, watch=False)
+
+    if mode == 'asgi':
+        from file_server.asgi import create_asgi_app
+
+        run_server(create_asgi_app(), port, 'uvicorn')
+        return
+
+    if mode == 'legacy':
+        from flask import send_file
+
+        def deliver_file(abs_path, request_path, as_attachment=False):
+            return send_file(abs_path, as_attachment=as_attachment)
+
+        new_file_server.deliver_file = deliver_file
+
+    run_server(new_file_server.app, port, worker_class='gthread', threads=4)
+
+
+def seek(port, offset, read_bytes):
+    """发送 bytes=offset-，返回 (首字节时间, 读到的数据)"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+    try:
+        start = time.perf_counter()
+        conn.request('GET', f'/{FILE_NAME}', headers={'Range': f'bytes={offset}-'})
+        response = conn.getresponse()
+        first = response.read(1)
+        ttfb = time.perf_counter() - start
+        if response.status != 206:
+            raise RuntimeError(f"期望 206，实际为 {response.status}")
+        return ttfb, first + response.read(read_bytes - 1)
+    finally:
+        conn.close()  # 像浏览器一样在拖动时放弃剩余数据
+
+
+def check_multirange(port, path, size):
+    ranges = [(0, 99), (size // 2, size // 2 + 99), (size - 100, size - 1)]
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+    try:
+        spec = ','.join(f'{a}-{b}' for a, b in ranges)
+        conn.request('GET', f'/{FILE_NAME}', headers={'Range': f'bytes={spec}'})
+        response = conn.getresponse()
+        body = response.read()
+        if response.status != 206:
+            return False
+        message = email.message_from_bytes(
+            f"Content-Type: {response.getheader('Content-Type')}\r\n\r\n".encode() + body)
+        parts = message.get_payload()
+        with open(path, 'rb') as f:
+            for part, (a, b) in zip(parts, ranges):
+                f.seek(a)
+                if part.get_payload(decode=True) != f.read(b - a + 1):
+                    return False
+        return len(parts) == len(ranges)
+    finally:
+        conn.close()
+
+
+def create_file(path, size, dense):
+    with open(path, 'wb') as f:
+        if not dense:
+            f.truncate(size)
+            # 每 64 MB 写一个标记，稀疏文件的比较也不是全零
+            for offset in range(0, size, 64 * 1024 * 1024):
+                f.seek(offset)
+                f.write(os.urandom(4096))
+            return
+        block = os.urandom(4 * 1024 * 1024)
+        for _ in range(size // len(block)):
+            f.write(block)
+        f.write(block[:size % len(block)])
+
+
+def run_mode(mode, root, offsets, args):
+    path = os.path.join(root, FILE_NAME)
+    read_bytes = args.read_kb * 1024
+    mismatches = 0
+    ttfbs = []
+    with server_process(__file__, mode, root) as port:
+        with open(path, 'rb') as f:
+            for offset in offsets:
+                ttfb, data = seek(port, offset, read_bytes)
+                ttfbs.append(ttfb)
+                f.seek(offset)
+                if data != f.read(len(data)):
+                    mismatches += 1
+        multirange_ok = check_multirange(port, path, os.path.getsize(path))
+
+    return {
+        'mode': mode,
+        'seeks': len(offsets),
+        'ttfb_p50_ms': round(statistics.median(ttfbs) * 1000, 2),
+        'ttfb_max_ms': round(max(ttfbs) * 1000, 2),
+        'ttfb_mean_ms': round(statistics.mean(ttfbs) * 1000, 2),
+        'content_mismatches': mismatches,
+        'multirange_ok': multirange_ok,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-gb', type=float, default=2.0)
+    parser.add_argument('--seeks', type=int, default=40)
+    parser.add_argument('--read-kb', type=int, default=256, help='每次跳转后读取的数据量')
+    parser.add_argument('--dense', action='store_true', help='写入真实数据而不是稀疏文件')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    parser.add_argument('--serve', nargs=3, metavar=('PORT', 'MODE', 'ROOT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        port, mode, root = args.serve
+        serve(int(port), mode, root)
+        return
+
+    require('gunicorn', *(('uvicorn', 'a2wsgi') if 'asgi' in args.modes else ()))
+
+    size = int(args.size_gb * 1024 ** 3)
+    rng = random.Random(args.seed)
+    offsets = [rng.randrange(0, size - args.read_kb * 1024) for _ in range(args.seeks)]
+
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        create_file(Path(root, FILE_NAME), size, args.dense)
+        for mode in args.modes:
+            results.append(run_mode(mode, root, offsets, args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"[{r['mode']}]")
+        for key, value in r.items():
+            if key != 'mode':
+                print(f"{key:>20}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+上传基准：流式 multipart 上传的吞吐量和服务器进程峰值内存
+
+用法（在仓库根目录执行）:
+    python benchmarks/bench_upload.py --size-gb 10
+
+客户端边生成边发送请求体，不在本地落盘；服务器在独立子进程中运行，
+上传前后分别读取该进程的峰值 RSS（ru_maxrss），两者之差即上传带来的内存增长。
+"""
+
+import argparse
+import http.client
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from common import get_json, run_server, server_process, with_rss_stats
+
+BOUNDARY = 'benchuploadboundary'
+BLOCK = os.urandom(1024 * 1024)
+
+
+def serve(port, root, max_gb):
+    """子进程入口：单线程运行文件服务器，/_bench_stats 返回峰值 RSS"""
+    import new_file_server
+
+    new_file_server.FILE_ROOT = Path(root)
+    new_file_server.UPLOAD_MAX_FILE_SIZE = max_gb * 1024 ** 3
+    run_server(with_rss_stats(new_file_server.app), port, 'werkzeug')
+
+
+def multipart_body(size_bytes):
+    """返回 (请求体总长度, 分块生成器)"""
+    head = (f'--{BOUNDARY}\r\n'
+            f'Content-Disposition: form-data; name="files[]"; filename="upload.bin"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n').encode()
+    tail = f'\r\n--{BOUNDARY}--\r\n'.encode()
+
+    def chunks():
+        yield head
+        remaining = size_bytes
+        while remaining > 0:
+            block = BLOCK if remaining >= len(BLOCK) else BLOCK[:remaining]
+            remaining -= len(block)
+            yield block
+        yield tail
+
+    return len(head) + size_bytes + len(tail), chunks()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-gb', type=float, default=1.0)
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    parser.add_argument('--serve', nargs=3, metavar=('PORT', 'ROOT', 'MAX_GB'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        port, root, max_gb = args.serve
+        serve(int(port), root, float(max_gb))
+        return
+
+    size_bytes = int(args.size_gb * 1024 ** 3)
+    with tempfile.TemporaryDirectory() as root:
+        with server_process(__file__, root, args.size_gb + 1) as port:
+            rss_before = get_json(port, '/_bench_stats')['max_rss_kb']
+
+            length, body = multipart_body(size_bytes)
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=3600)
+            start = time.perf_counter()
+            conn.putrequest('POST', '/')
+            conn.putheader('Content-Type', f'multipart/form-data; boundary={BOUNDARY}')
+            conn.putheader('Content-Length', str(length))
+            conn.endheaders()
+            for chunk in body:
+                conn.send(chunk)
+            response = conn.getresponse()
+            status = response.status
+            response.read()
+            elapsed = time.perf_counter() - start
+            conn.close()
+
+            rss_after = get_json(port, '/_bench_stats')['max_rss_kb']
+            saved_size = os.path.getsize(os.path.join(root, 'upload.bin')) if status == 200 else 0
+
+    result = {
+        'size_bytes': size_bytes,
+        'status': status,
+        'saved_bytes': saved_size,
+        'seconds': round(elapsed, 3),
+        'mb_per_s': round(size_bytes / elapsed / 1e6, 1),
+        'server_peak_rss_mb_before': round(rss_before / 1024, 1),
+        'server_peak_rss_mb_after': round(rss_after / 1024, 1),
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for key, value in result.items():
+        print(f"{key:>28}: {value}")
+
+
+if __name__ == '__main__':
+    main()
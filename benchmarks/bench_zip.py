@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+打包下载基准：流式 ZIP 的吞吐量与直接读盘速度的对比，以及服务器峰值内存
+
+用法（在仓库根目录执行，需要安装 gunicorn）:
+    python benchmarks/bench_zip.py --files 100000 --size-gb 20 --root /data/bench-tree
+    python benchmarks/bench_zip.py                # 默认 2000 个文件 / 1 GB，在临时目录中生成
+
+目录树按 --text-ratio 混合文本文件（deflate）和随机数据文件（.jpg/.mp4，直接存储），分散在
+多级子目录中。先顺序读取所有文件得到读盘基线，再通过 HTTP 下载 ?zip=1（读完即丢弃），
+两者使用相同的页缓存状态；要测冷缓存，请在两次运行之间自行清空页缓存。
+--root 指定的目录已存在时直接复用，不重新生成。
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from common import get_json, require, run_server, server_process, with_rss_stats
+
+TREE_NAME = 'tree'
+FILES_PER_DIR = 500
+TEXT_LINE = b'2026-10-18 12:00:00 INFO request handled in 12ms path=/some/where status=200\n'
+
+
+def serve(port, root):
+    """子进程入口：gunicorn 单 worker 运行文件服务器，/_bench_stats 返回峰值 RSS"""
+    import new_file_server
+
+    app = new_file_server.create_app(root, watch=False)
+    run_server(with_rss_stats(app), port, worker_class='gthread', timeout=3600)
+
+
+def generate_tree(base, files, size_bytes, text_ratio, seed):
+    rng = random.Random(seed)
+    noise = os.urandom(8 * 1024 * 1024)
+    text = TEXT_LINE * (len(noise) // len(TEXT_LINE) + 1)
+    average = size_bytes // files
+    for index in range(files):
+        directory = base / f"d{index // (FILES_PER_DIR * 20):03d}" / f"s{index // FILES_PER_DIR:04d}"
+        if index % FILES_PER_DIR == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+        size = max(0, int(rng.expovariate(1 / average))) if average else 0
+        if rng.random() < text_ratio:
+            path, source = directory / f"log_{index}.txt", text
+        else:
+            path, source = directory / f"media_{index}.{rng.choice(('jpg', 'mp4'))}", noise
+        with open(path, 'wb') as f:
+            remaining = size
+            while remaining > 0:
+                start = rng.randrange(0, len(source) // 2)
+                chunk = source[start:start + min(remaining, len(source) // 2)]
+                f.write(chunk)
+                remaining -= len(chunk)
+
+
+def read_tree(base):
+    """顺序读取所有文件，返回 (文件数, 字节数, 秒)"""
+    count, total = 0, 0
+    start = time.perf_counter()
+    for root, dirs, files in os.walk(base):
+        dirs.sort()
+        for name in sorted(files):
+            with open(os.path.join(root, name), 'rb') as f:
+                while True:
+                    data = f.read(1024 * 1024)
+                    if not data:
+                        break
+                    total += len(data)
+            count += 1
+    return count, total, time.perf_counter() - start
+
+
+def download_zip(port, save_to=None):
+    """下载 /tree?zip=1，返回 (状态码, 字节数, 秒)"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=3600)
+    out = open(save_to, 'wb') if save_to else None
+    try:
+        start = time.perf_counter()
+        conn.request('GET', f'/{TREE_NAME}?zip=1')
+        response = conn.getresponse()
+        received = 0
+        while True:
+            data = response.read(1024 * 1024)
+            if not data:
+                break
+            received += len(data)
+            if out:
+                out.write(data)
+        return response.status, received, time.perf_counter() - start
+    finally:
+        conn.close()
+        if out:
+            out.close()
+
+
+def run(root, args):
+    base = Path(root) / TREE_NAME
+    if not base.exists():
+        print(f"生成目录树: {args.files} 个文件, {args.size_gb} GB ...", file=sys.stderr)
+        generate_tree(base, args.files, int(args.size_gb * 1024 ** 3), args.text_ratio, args.seed)
+
+    files, disk_bytes, disk_seconds = read_tree(base)
+
+    with server_process(__file__, root) as port:
+        rss_before = get_json(port, '/_bench_stats')['max_rss_kb']
+        save_to = os.path.join(root, 'bench.zip') if args.verify else None
+        status, zip_bytes, zip_seconds = download_zip(port, save_to)
+        rss_after = get_json(port, '/_bench_stats')['max_rss_kb']
+
+    result = {
+        'files': files,
+        'data_bytes': disk_bytes,
+        'disk_read_mb_per_s': round(disk_bytes / disk_seconds / 1e6, 1),
+        'zip_status': status,
+        'zip_bytes': zip_bytes,
+        'zip_seconds': round(zip_seconds, 2),
+        # 以原始数据量计算，便于与读盘速度直接比较
+        'zip_data_mb_per_s': round(disk_bytes / zip_seconds / 1e6, 1),
+        'server_peak_rss_mb_before': round(rss_before / 1024, 1),
+        'server_peak_rss_mb_after': round(rss_after / 1024, 1),
+    }
+    if args.verify:
+        with zipfile.ZipFile(save_to) as zf:
+            result['zip_entries'] = len([i for i in zf.infolist() if not i.is_dir()])
+            result['zip_crc_ok'] = zf.testzip() is None
+        os.unlink(save_to)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--size-gb', type=float, default=1.0)
+    parser.add_argument('--text-ratio', type=float, default=0.3, help='文本文件所占比例')
+    parser.add_argument('--root', help='生成/复用目录树的位置，默认使用临时目录')
+    parser.add_argument('--verify', action='store_true', help='保存压缩包并校验 CRC（需要额外磁盘空间）')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    parser.add_argument('--serve', nargs=2, metavar=('PORT', 'ROOT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        port, root = args.serve
+        serve(int(port), root)
+        return
+
+    require('gunicorn')
+
+    if args.root:
+        os.makedirs(args.root, exist_ok=True)
+        result = run(args.root, args)
+    else:
+        with tempfile.TemporaryDirectory() as root:
+            result = run(root, args)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for key, value in result.items():
+        print(f"{key:>26}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+基准脚本共用的小工具：端口分配、在子进程中启动/结束服务器、读取服务器的统计信息
+
+需要真实服务器的脚本都按同一方式运行：主进程用 server_process() 以
+`脚本 --serve 端口 参数...` 启动自己，子进程在 --serve 分支中构造应用并调用 run_server()。
+"""
+
+import http.client
+import importlib.util
+import json
+import resource
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+# run_server(kind='gunicorn') 的默认配置，调用方可以逐项覆盖
+GUNICORN_DEFAULTS = {
+    'workers': 1,
+    'worker_class': 'sync',
+    'loglevel': 'warning',
+    'timeout': 600,
+}
+
+
+def free_port():
+    """向系统申请一个空闲端口"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=15, proc=None):
+    """等待本机端口可以连接；给出 proc 时子进程提前退出会立即报错"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"服务器进程已退出（返回码 {proc.returncode}）")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"服务器未能在 {timeout}s 内启动")
+
+
+def require(*modules):
+    """缺少任一模块时退出并提示安装命令"""
+    missing = [name for name in modules if importlib.util.find_spec(name) is None]
+    if missing:
+        sys.exit(f"需要安装 {'、'.join(modules)}: pip install {' '.join(modules)}")
+
+
+@contextmanager
+def server_process(script, *args, timeout=15):
+    """
+    在子进程中运行 `script --serve 端口 *args`，等待端口可以连接后产出端口；退出时结束子进程
+
+    子进程继承当前的环境变量（例如已经换成临时目录的 HOME）。
+    """
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, str(script), '--serve', str(port), *map(str, args)])
+    try:
+        wait_for_port(port, timeout, proc)
+        yield port
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def run_server(app, port, kind='gunicorn', **options):
+    """
+    在 --serve 子进程中调用：用指定的服务器运行 app，直到进程被结束
+
+    kind:
+      gunicorn - options 为 gunicorn 配置项（workers、worker_class、threads、timeout、backlog 等），
+                 未给出的取 GUNICORN_DEFAULTS
+      werkzeug - options 只支持 threaded，不输出访问日志
+      uvicorn  - app 为 ASGI 应用，options 原样传给 uvicorn.run
+    """
+    if kind == 'werkzeug':
+        import logging
+
+        from werkzeug.serving import make_server
+
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        make_server('127.0.0.1', port, app, threaded=options.get('threaded', False)).serve_forever()
+        return
+
+    if kind == 'uvicorn':
+        import uvicorn
+
+        uvicorn.run(app, host='127.0.0.1', port=port, log_level='warning', **options)
+        return
+
+    from gunicorn.app.base import BaseApplication
+
+    settings = dict(GUNICORN_DEFAULTS, **options, bind=f'127.0.0.1:{port}')
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Server().run()
+
+
+def with_rss_stats(app):
+    """包装 WSGI 应用：GET /_bench_stats 返回服务器进程的峰值 RSS（Linux 下 ru_maxrss 单位为 KB）"""
+    def wrapped(environ, start_response):
+        if environ.get('PATH_INFO') == '/_bench_stats':
+            body = json.dumps({'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}).encode()
+            start_response('200 OK', [('Content-Type', 'application/json'),
+                                      ('Content-Length', str(len(body)))])
+            return [body]
+        return app(environ, start_response)
+
+    return wrapped
+
+
+def get_json(port, path, timeout=30):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        conn.request('GET', path)
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+综合基准：在合成目录树上测量列表、下载、上传和缩略图的性能，结果输出为可跨提交比较的 JSON
+
+用法（在仓库根目录执行）:
+    python benchmarks/run_suite.py --output before.json
+    （切换到另一个提交后）python benchmarks/run_suite.py --output after.json
+    python benchmarks/run_suite.py --compare before.json after.json
+
+目录树由 trees.py 按固定种子生成（默认 10 万文件的大目录、50 层嵌套、按 DATATYPES 的混合
+类型），保存在 --tree-dir 中，参数不变时各次运行直接复用。每项测量分两部分：
+  - 进程内：Flask test client 逐个请求，反映应用本身的开销（不含网络和 HTTP 解析）；
+  - 负载：在子进程中用 werkzeug 多线程服务器运行应用，--concurrency 个客户端线程并发请求，
+    报告 请求/秒、MB/秒 和延迟分位数。
+服务器的缓存目录（HOME）每次都是新的临时目录，不受之前运行留下的缩略图或哈希缓存影响。
+"""
+
+import argparse
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from common import REPO_ROOT, run_server, server_process
+from trees import ensure_tree
+
+SECTIONS = ('listing', 'download', 'upload', 'thumbnail', 'load')
+DEFAULT_TREE_DIR = Path(tempfile.gettempdir()) / 'file_server_bench_tree'
+SCRATCH = '_bench_scratch'
+UPLOAD_CHUNK = 8 * 1024 * 1024
+
+
+def summarize(samples):
+    """耗时列表（秒）-> 毫秒统计"""
+    ordered = sorted(samples)
+    return {
+        'n': len(ordered),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+    }
+
+
+def timed(fn, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def consume(response):
+    """读完 test client 的流式响应，返回字节数"""
+    total = 0
+    try:
+        for chunk in response.iter_encoded():
+            total += len(chunk)
+    finally:
+        response.close()
+    return total
+
+
+def check(response, expected=(200,)):
+    if response.status_code not in expected:
+        raise RuntimeError(f"{response.request.path} 返回 {response.status_code}")
+    return response
+
+
+# --- 进程内（test client）---
+
+def bench_listing(client, server, tree, repeat):
+    results = {}
+    for name, rel in (('wide', 'wide'), ('deep', tree['deepest'].relative_to(tree['root']).as_posix()),
+                      ('mixed', 'mixed')):
+        abs_dir = server.FILE_ROOT / rel
+        url = f'/{rel}/'
+
+        def invalidate():
+            server.listing_cache.invalidate(abs_dir)
+
+        cold = timed(lambda: check(client.get(url)), repeat, setup=invalidate)
+        warm = timed(lambda: check(client.get(url)), repeat)
+        etag = check(client.get(url)).headers.get('ETag')
+        not_modified = timed(lambda: check(client.get(url, headers={'If-None-Match': etag}), (304,)), repeat)
+        api = timed(lambda: check(client.get(f'/_list/{rel}/?limit={server.LISTING_MAX_LIMIT}')), repeat)
+        results[f'listing_{name}_cold'] = cold
+        results[f'listing_{name}_warm'] = warm
+        results[f'listing_{name}_304'] = not_modified
+        results[f'list_api_{name}_warm'] = api
+    wide = server.get_listing(tree['wide'])
+    results['listing_wide_cold']['entries'] = len(wide.items) + len(wide.images)
+    return results
+
+
+def bench_download(client, tree, repeat):
+    url = '/payload/payload.bin'
+    size = tree['payload'].stat().st_size
+    full = timed(lambda: consume(check(client.get(url, buffered=False))), repeat)
+    full['mb_per_s'] = round(size / (full['median_ms'] / 1000) / 1e6, 1)
+
+    rng = random.Random(0)
+
+    def ranged():
+        start = rng.randrange(0, max(size - 65536, 1))
+        consume(check(client.get(url, headers={'Range': f'bytes={start}-{start + 65535}'}, buffered=False),
+                      (206,)))
+
+    return {'download_full': full, 'download_range_64k': timed(ranged, repeat * 10)}
+
+
+def bench_upload(client, server, upload_mb, repeat):
+    data = os.urandom(upload_mb * 1024 * 1024)
+    scratch = server.FILE_ROOT / SCRATCH
+
+    def multipart():
+        check(client.post(f'/{SCRATCH}/', data={'files[]': (io.BytesIO(data), 'upload.bin')},
+                          content_type='multipart/form-data'))
+
+    def resumable():
+        created = check(client.post('/_uploads', json={'path': SCRATCH, 'filename': 'resumable.bin',
+                                                       'size': len(data)}), (201,))
+        location = created.headers['Location']
+        for offset in range(0, len(data), UPLOAD_CHUNK):
+            chunk = data[offset:offset + UPLOAD_CHUNK]
+            check(client.patch(location, data=chunk, headers={'Upload-Offset': str(offset)}))
+
+    results = {}
+    for name, fn in (('upload_multipart', multipart), ('upload_resumable', resumable)):
+        shutil.rmtree(scratch, ignore_errors=True)
+        scratch.mkdir()
+        stats = timed(fn, repeat)
+        stats['mb_per_s'] = round(len(data) / (stats['median_ms'] / 1000) / 1e6, 1)
+        results[name] = stats
+    shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+
+def bench_thumbnail(client, server, tree):
+    images = sorted(p for p in tree['mixed'].iterdir()
+                    if server.get_file_type_and_icon(p.name)[0] == 'image'
+                    and p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+    if not images:
+        return {}
+    headers = {'Accept': 'image/webp,image/*'}
+    urls = [f'/_thumb/mixed/{p.name}?w={server.THUMB_DEFAULT_WIDTH}' for p in images]
+
+    def fetch_all():
+        for url in urls:
+            consume(check(client.get(url, headers=headers, buffered=False)))
+
+    shutil.rmtree(server.THUMB_CACHE_DIR, ignore_errors=True)
+    cold = timed(fetch_all, 1)
+    cached = timed(fetch_all, 3)
+    results = {
+        'thumbnail_web_cold': dict(cold, images=len(images),
+                                   images_per_s=round(len(images) / (cold['median_ms'] / 1000), 1)),
+        'thumbnail_web_cached': dict(cached, images=len(images),
+                                     images_per_s=round(len(images) / (cached['median_ms'] / 1000), 1)),
+    }
+
+    # GUI 的缩略图函数（平时在进程池中调用，这里单进程顺序执行）
+    gui_dir = str(REPO_ROOT / 'gui_file_server')
+    if gui_dir not in sys.path:
+        sys.path.append(gui_dir)
+    from gui_file_server.thumbnails import make_thumbnail
+
+    with tempfile.TemporaryDirectory() as out:
+        start = time.perf_counter()
+        for i, path in enumerate(images):
+            make_thumbnail(str(path), os.path.join(out, f'{i}.jpg'), (200, 200))
+        elapsed = time.perf_counter() - start
+    results['thumbnail_gui'] = {'images': len(images), 'seconds': round(elapsed, 3),
+                                'images_per_s': round(len(images) / elapsed, 1)}
+    return results
+
+
+# --- 并发负载（子进程服务器）---
+
+def serve(port, root):
+    """子进程入口：werkzeug 多线程服务器（不输出访问日志）"""
+    import new_file_server
+
+    run_server(new_file_server.create_app(root, watch=False), port, 'werkzeug', threaded=True)
+
+
+def run_load(port, make_request, total, concurrency):
+    """concurrency 个线程共发出 total 个请求；make_request(i) 返回 (method, path, headers, body)"""
+    latencies = []
+    received = [0]
+    errors = [0]
+    lock = threading.Lock()
+
+    def one(i):
+        method, path, headers, body = make_request(i)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            nbytes = 0
+            while chunk := response.read(1024 * 1024):
+                nbytes += len(chunk)
+            ok = response.status < 400
+        except OSError:
+            nbytes, ok = 0, False
+        finally:
+            conn.close()
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            received[0] += nbytes
+            errors[0] += not ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - start
+    result = summarize(latencies)
+    result.update(concurrency=concurrency, errors=errors[0], seconds=round(wall, 3),
+                  req_per_s=round(total / wall, 1), mb_per_s=round(received[0] / wall / 1e6, 1))
+    return result
+
+
+def bench_load(tree, requests, concurrency, upload_mb):
+    with server_process(__file__, tree['root']) as port:
+        size = tree['payload'].stat().st_size
+        rng = random.Random(0)
+        wide_pages = max(len(os.listdir(tree['wide'])) // 200, 1)
+        results = {
+            'load_listing_wide': run_load(port, lambda i: (
+                'GET', f'/_list/wide/?offset={rng.randrange(wide_pages) * 200}&limit=200', {}, None),
+                requests, concurrency),
+            'load_listing_mixed_html': run_load(port, lambda i: ('GET', '/mixed/', {}, None),
+                                                requests, concurrency),
+            'load_download_range_1m': run_load(port, lambda i: (
+                'GET', '/payload/payload.bin', {'Range': f'bytes={(s := rng.randrange(max(size - (1 << 20), 1)))}-'
+                                                          f'{s + (1 << 20) - 1}'}, None),
+                requests, concurrency),
+            'load_download_full': run_load(port, lambda i: ('GET', '/payload/payload.bin', {}, None),
+                                           max(requests // 50, concurrency), concurrency),
+        }
+
+        scratch = tree['root'] / SCRATCH
+        scratch.mkdir(exist_ok=True)
+        data = os.urandom(upload_mb * 1024 * 1024)
+        boundary = 'benchsuiteboundary'
+
+        def upload(i):
+            body = (f'--{boundary}\r\nContent-Disposition: form-data; name="files[]"; filename="load_{i}.bin"\r\n'
+                    f'Content-Type: application/octet-stream\r\n\r\n').encode() + data + f'\r\n--{boundary}--\r\n'.encode()
+            return 'POST', f'/{SCRATCH}/', {'Content-Type': f'multipart/form-data; boundary={boundary}'}, body
+
+        uploads = max(requests // 50, concurrency)
+        result = run_load(port, upload, uploads, concurrency)
+        # 上传方向的吞吐量按请求体计算
+        result['mb_per_s'] = round(uploads * len(data) / result['seconds'] / 1e6, 1)
+        results['load_upload_multipart'] = result
+        shutil.rmtree(scratch, ignore_errors=True)
+        return results
+
+
+# --- 结果与比较 ---
+
+def git_info():
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=REPO_ROOT, capture_output=True, text=True,
+                                  timeout=30).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ''
+    return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+
+def compare(old_path, new_path):
+    """逐项打印两次结果中的共有指标；耗时类越小越好，其余（吞吐量）越大越好"""
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    print(f"旧: {old['meta']['git']['commit'][:10]}  新: {new['meta']['git']['commit'][:10]}")
+    for name in sorted(set(old['results']) & set(new['results'])):
+        for key in ('median_ms', 'p95_ms', 'seconds', 'mb_per_s', 'req_per_s', 'images_per_s'):
+            a, b = old['results'][name].get(key), new['results'][name].get(key)
+            if not a or b is None:
+                continue
+            change = (b - a) / a * 100
+            better = change < 0 if key.endswith('_ms') or key == 'seconds' else change > 0
+            mark = '' if abs(change) < 5 else ('  +' if better else '  -')
+            print(f"{name:>30} {key:>12}: {a:>10} -> {b:>10} ({change:+.1f}%){mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--tree-dir', type=Path, default=DEFAULT_TREE_DIR, help='合成目录树的位置（可复用）')
+    parser.add_argument('--wide', type=int, default=100_000, help='大目录中的文件数')
+    parser.add_argument('--depth', type=int, default=50, help='嵌套层数')
+    parser.add_argument('--per-level', type=int, default=20, help='嵌套目录每层的文件数')
+    parser.add_argument('--per-type', type=int, default=50, help='混合目录中每种非图片类型的文件数')
+    parser.add_argument('--images', type=int, default=40, help='混合目录中的图片数')
+    parser.add_argument('--payload-mb', type=int, default=256, help='下载测试文件大小')
+    parser.add_argument('--upload-mb', type=int, default=64, help='单次上传大小（负载测试为其 1/16）')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5, help='进程内每项测量的重复次数')
+    parser.add_argument('--requests', type=int, default=500, help='负载测试每项的请求数')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--only', nargs='+', choices=SECTIONS, help='只运行这些部分')
+    parser.add_argument('--output', type=Path, help='把 JSON 结果写入文件')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='比较两次运行的结果文件')
+    parser.add_argument('--serve', nargs=2, metavar=('PORT', 'ROOT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(int(args.serve[0]), args.serve[1])
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # 缩略图、哈希、上传状态等缓存目录在导入时由 Path.home() 决定，先换成临时目录（子进程继承）
+    home = tempfile.mkdtemp(prefix='file_server_bench_home_')
+    os.environ['HOME'] = home
+    import new_file_server
+
+    sections = args.only or SECTIONS
+    started = time.perf_counter()
+    tree = ensure_tree(args.tree_dir, new_file_server.DATATYPES, wide=args.wide, depth=args.depth,
+                       per_level=args.per_level, per_type=args.per_type, images=args.images,
+                       payload_mb=args.payload_mb, seed=args.seed)
+    tree_seconds = time.perf_counter() - started
+
+    server = new_file_server
+    server.create_app(tree['root'], watch=False)
+    server.UPLOAD_MAX_FILE_SIZE = max(server.UPLOAD_MAX_FILE_SIZE, args.upload_mb * 1024 * 1024 + 1)
+    client = server.app.test_client()
+
+    results = {}
+    try:
+        if 'listing' in sections:
+            results.update(bench_listing(client, server, tree, args.repeat))
+        if 'download' in sections:
+            results.update(bench_download(client, tree, args.repeat))
+        if 'upload' in sections:
+            results.update(bench_upload(client, server, args.upload_mb, args.repeat))
+        if 'thumbnail' in sections:
+            results.update(bench_thumbnail(client, server, tree))
+        if 'load' in sections:
+            results.update(bench_load(tree, args.requests, args.concurrency, max(args.upload_mb // 16, 1)))
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'git': git_info(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'tree_seconds': round(tree_seconds, 1),
+            'args': {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()
+                     if k not in ('serve', 'compare', 'output', 'json')},
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + '\n')
+    if args.json:
+        print(text)
+        return
+    for name, values in results.items():
+        print(f"{name:>30}: " + ', '.join(f'{k}={v}' for k, v in values.items()))
+    if args.output:
+        print(f"结果已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+基准用的合成目录树（可复现：同样的参数和种子生成完全相同的树）
+
+三种树都放在同一个根目录下：
+    wide/   - 一个目录中 --wide 个文件（默认 10 万），文件名、大小、类型随机
+    deep/   - --depth 层嵌套，每层 --per-level 个文件和一个子目录
+    mixed/  - 按 new_file_server.DATATYPES 的扩展名生成图片、视频、音频、文本等，
+              图片是真实可解码的 JPEG/PNG（有 Pillow 时），视频/压缩包是稀疏文件，不占磁盘
+另外 payload/ 下有一个 --payload-mb 大小的下载测试文件。
+
+生成完成后写入 .bench_tree.json 记录参数，参数相同时直接复用，不再重复创建 10 万个文件。
+"""
+
+import json
+import os
+import random
+from pathlib import Path
+
+MARKER = '.bench_tree.json'
+TREE_VERSION = 1
+
+WORDS = ('photo', 'video', 'report', 'backup', 'project', 'music', 'invoice', 'scan', 'draft', 'final',
+         '照片', '视频', '报告', '备份', '项目', '音乐')
+# mixed 树中各类型的文件大小范围（字节）；大文件用稀疏文件
+SIZE_RANGES = {
+    'video': (50 << 20, 2 << 30),
+    'audio': (3 << 20, 20 << 20),
+    'archive': (1 << 20, 500 << 20),
+    'text': (200, 200 << 10),
+    'ebook': (100 << 10, 20 << 20),
+}
+
+
+def _write_sparse(path, size):
+    with open(path, 'wb') as f:
+        f.truncate(size)
+
+
+def _write_text(path, size, rng):
+    line = ' '.join(rng.choice(WORDS) for _ in range(12)) + '\n'
+    data = (line * (size // len(line.encode()) + 1)).encode()[:size]
+    path.write_bytes(data)
+
+
+def _write_image(path, ext, rng):
+    """真实图片（用于缩略图基准）；没有 Pillow 或格式不支持写入时写入随机字节"""
+    try:
+        from PIL import Image
+    except ImportError:
+        Image = None
+    formats = {'jpg': 'JPEG', 'jpeg': 'JPEG', 'png': 'PNG', 'webp': 'WEBP', 'gif': 'GIF'}
+    if Image is not None and ext in formats:
+        width, height = rng.choice(((4000, 3000), (1920, 1080), (1200, 1600), (800, 600)))
+        # 渐变 + 噪声，编码后大小接近真实照片
+        img = Image.radial_gradient('L').resize((width, height)).convert('RGB')
+        noise = Image.effect_noise((width, height), rng.randint(20, 60)).convert('RGB')
+        Image.blend(img, noise, 0.5).save(path, formats[ext])
+    else:
+        path.write_bytes(os.urandom(rng.randint(10_000, 200_000)))
+
+
+def _random_name(rng, i, ext):
+    prefix = rng.choice(('IMG_', 'DSC', '', rng.choice(WORDS) + '_'))
+    return f"{prefix}{rng.randint(2000, 2025)}{rng.randint(101, 1231):04d}_{i}.{ext}"
+
+
+def make_wide(root, count, datatypes, rng):
+    root.mkdir(parents=True, exist_ok=True)
+    exts = [ext for exts in datatypes.values() for ext in exts] + ['bin', 'dat']
+    for i in range(count):
+        # 空文件足以测试列表：大小只影响 stat 结果，不影响扫描耗时
+        (root / _random_name(rng, i, rng.choice(exts))).touch()
+    for i in range(count // 100):
+        (root / f"dir_{i:05d}").mkdir(exist_ok=True)
+
+
+def make_deep(root, depth, per_level, rng):
+    current = root
+    for level in range(depth):
+        current.mkdir(parents=True, exist_ok=True)
+        for i in range(per_level):
+            _write_text(current / f"level{level}_{i}.txt", rng.randint(100, 4000), rng)
+        current = current / f"nested_{level:03d}"
+    current.mkdir(parents=True, exist_ok=True)
+    return current
+
+
+def make_mixed(root, per_type, datatypes, rng, images):
+    root.mkdir(parents=True, exist_ok=True)
+    for file_type, exts in datatypes.items():
+        count = images if file_type == 'image' else per_type
+        for i in range(count):
+            ext = rng.choice([e for e in exts if e in ('jpg', 'jpeg', 'png')] or exts) \
+                if file_type == 'image' else rng.choice(exts)
+            path = root / _random_name(rng, i, ext)
+            if file_type == 'image':
+                _write_image(path, ext, rng)
+            elif file_type == 'text':
+                _write_text(path, rng.randint(*SIZE_RANGES['text']), rng)
+            else:
+                _write_sparse(path, rng.randint(*SIZE_RANGES.get(file_type, (1 << 10, 1 << 20))))
+
+
+def make_payload(root, size_mb):
+    """下载测试文件：写入真实数据（稀疏文件读起来太快，不能代表真实磁盘）"""
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / 'payload.bin'
+    block = os.urandom(1 << 20)
+    with open(path, 'wb') as f:
+        for _ in range(size_mb):
+            f.write(block)
+    return path
+
+
+def ensure_tree(root, datatypes, wide=100_000, depth=50, per_level=20, per_type=50, images=40,
+                payload_mb=256, seed=1):
+    """在 root 下生成（或复用）合成树，返回各部分的路径"""
+    root = Path(root)
+    params = {'version': TREE_VERSION, 'wide': wide, 'depth': depth, 'per_level': per_level,
+              'per_type': per_type, 'images': images, 'payload_mb': payload_mb, 'seed': seed,
+              'datatypes': {k: list(v) for k, v in datatypes.items()}}
+    marker = root / MARKER
+    layout = {
+        'root': root,
+        'wide': root / 'wide',
+        'deep': root / 'deep',
+        'mixed': root / 'mixed',
+        'payload': root / 'payload' / 'payload.bin',
+    }
+    try:
+        if json.loads(marker.read_text()) == params:
+            deepest = layout['deep']
+            while (nested := sorted(deepest.glob('nested_*'))):
+                deepest = nested[0]
+            return dict(layout, deepest=deepest)
+    except (OSError, ValueError):
+        pass
+
+    if root.exists() and any(root.iterdir()):
+        if not marker.exists():
+            raise RuntimeError(f"{root} 不是空目录，也不是之前生成的基准目录树")
+        import shutil
+        for name in ('wide', 'deep', 'mixed', 'payload'):
+            shutil.rmtree(root / name, ignore_errors=True)
+
+    rng = random.Random(seed)
+    make_wide(layout['wide'], wide, datatypes, rng)
+    deepest = make_deep(layout['deep'], depth, per_level, rng)
+    make_mixed(layout['mixed'], per_type, datatypes, rng, images)
+    make_payload(layout['payload'].parent, payload_mb)
+    marker.write_text(json.dumps(params))
+    return dict(layout, deepest=deepest)
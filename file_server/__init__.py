@@ -0,0 +1,3 @@
+"""
+Flask 文件服务器的辅助模块（缩略图等），由 new_file_server.py 引用
+"""
@@ -0,0 +1,227 @@
+"""
+ASGI 运行方式，适合大量慢速客户端同时下载
+
+同步 WSGI 下每个下载独占一个 worker（或线程），并发数受 worker 数量限制。这里把文件下载
+（GET/HEAD 普通文件）改为协程处理：stat 和 pread 放在线程池里执行，不阻塞事件循环，
+发送时等待客户端消费（uvicorn 的流量控制），一个进程就能同时挂住成千上万个下载。
+
+其余请求（目录页、JSON 接口、上传、缩略图）仍交给原来的 Flask 应用，通过 a2wsgi 在
+线程池中执行，行为与 WSGI 方式完全一致。
+
+运行（需要 pip install uvicorn a2wsgi）:
+    python -m file_server.asgi --root /srv/files --port 5050
+"""
+
+import argparse
+import asyncio
+import mimetypes
+import os
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from werkzeug.http import http_date, parse_date, parse_etags, quote_etag
+
+import new_file_server
+from file_server import compression, metrics
+from file_server.ranges import parse_ranges, resolve_ranges
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:  # 可选依赖，只有使用 ASGI 方式时才需要
+    WSGIMiddleware = None
+
+READ_SIZE = 256 * 1024
+# 监控指标中文件下载的路由标签，与 Flask 中处理同一请求的路由一致
+FILE_ROUTE = '/<path:p>'
+
+
+def record_send(method, status, kind, length, started):
+    """与 new_file_server.record_send / record_request_metrics 相同的指标，用于协程直接发送的下载"""
+    if not metrics.registry.enabled:
+        return
+    elapsed = time.perf_counter() - started
+    metrics.REQUESTS.inc(1, FILE_ROUTE, method, str(status))
+    metrics.REQUEST_SECONDS.observe(elapsed, FILE_ROUTE, method)
+    metrics.SEND_BYTES.inc(length, kind)
+    metrics.SEND_SIZE.observe(length, kind)
+    metrics.SEND_SECONDS.observe(elapsed, kind)
+
+
+class AsyncFileServer:
+    """把文件下载改为异步处理、其余请求转交 Flask 的 ASGI 应用"""
+
+    def __init__(self, flask_app, io_workers=32, wsgi_workers=16):
+        if WSGIMiddleware is None:
+            raise RuntimeError("ASGI 方式需要安装 a2wsgi: pip install a2wsgi uvicorn")
+        self.wsgi = WSGIMiddleware(flask_app, workers=wsgi_workers)
+        self.executor = ThreadPoolExecutor(io_workers, thread_name_prefix='asgi-io')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            if await self._try_send_file(scope, receive, send):
+                return
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def _try_send_file(self, scope, receive, send):
+        """能异步处理时发送文件并返回 True，否则返回 False 交给 Flask"""
+        path = scope['path']
+        started = time.perf_counter()
+        # 内部接口、非 sendfile 方式（只有响应头，交给 Flask 更简单）都不在这里处理
+        if path.startswith('/_') or new_file_server.FILE_DELIVERY_MODE != 'sendfile':
+            return False
+
+        request_path, abs_path = new_file_server.resolve_request_path(path.lstrip('/'))
+        if request_path is None:
+            return False
+        try:
+            st = await self._run(os.stat, abs_path)
+        except OSError:
+            return False
+        if not stat.S_ISREG(st.st_mode):
+            return False
+
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+        mimetype = mimetypes.guess_type(abs_path.name)[0] or 'application/octet-stream'
+        if (new_file_server.COMPRESS_RESPONSES or new_file_server.COMPRESS_SIDECARS) \
+                and compression.is_compressible(mimetype) and compression.negotiate(headers.get('accept-encoding')):
+            return False  # 需要压缩或发送预压缩文件，交给 Flask
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+
+        size = st.st_size
+        etag = f"{st.st_mtime_ns:x}-{size:x}"
+        last_modified = int(st.st_mtime)
+        response_headers = [
+            (b'etag', quote_etag(etag).encode()),
+            (b'last-modified', http_date(last_modified).encode()),
+            (b'accept-ranges', b'bytes'),
+            (b'cache-control', b'no-cache'),
+        ]
+
+        if self._not_modified(headers, etag, last_modified):
+            await self._send_headers(send, 304, response_headers)
+            await send({'type': 'http.response.body', 'body': b''})
+            record_send(scope['method'], 304, 'not_modified', 0, started)
+            return True
+
+        start, length, status = 0, size, 200
+        if 'range' in headers and self._if_range_matches(headers, etag, last_modified) and size:
+            parsed = parse_ranges(headers['range'])
+            ranges = resolve_ranges(parsed, size) if parsed is not None else []
+            if not ranges:
+                response_headers.append((b'content-range', f"bytes */{size}".encode()))
+                await self._send_headers(send, 416, response_headers)
+                await send({'type': 'http.response.body', 'body': b''})
+                record_send(scope['method'], 416, 'range', 0, started)
+                return True
+            if len(ranges) > 1:
+                return False  # 多段 Range（multipart/byteranges）交给 Flask
+            start, stop = ranges[0]
+            length, status = stop - start, 206
+            response_headers.append((b'content-range', f"bytes {start}-{stop - 1}/{size}".encode()))
+
+        if mimetype.startswith('text/'):
+            mimetype += '; charset=utf-8'
+        response_headers.append((b'content-type', mimetype.encode('latin-1')))
+        response_headers.append((b'content-length', str(length).encode()))
+        if query.get('dl') == ['1']:
+            names = new_file_server.content_disposition_names(abs_path.name)
+            value = 'attachment; ' + '; '.join(
+                f'{k}={v}' if k.endswith('*') else f'{k}="{v}"' for k, v in names.items())
+            response_headers.append((b'content-disposition', value.encode('latin-1')))
+
+        kind = 'range' if status == 206 else 'full'
+        await self._send_headers(send, status, response_headers)
+        if scope['method'] == 'HEAD':
+            await send({'type': 'http.response.body', 'body': b''})
+            record_send(scope['method'], status, kind, 0, started)
+            return True
+
+        await self._send_body(receive, send, abs_path, start, length)
+        record_send(scope['method'], status, kind, length, started)
+        return True
+
+    @staticmethod
+    def _not_modified(headers, etag, last_modified):
+        if 'if-none-match' in headers:
+            return parse_etags(headers['if-none-match']).contains_weak(etag)
+        since = parse_date(headers.get('if-modified-since'))
+        return since is not None and last_modified <= since.timestamp()
+
+    @staticmethod
+    def _if_range_matches(headers, etag, last_modified):
+        """If-Range 不匹配时忽略 Range，返回完整文件"""
+        if_range = headers.get('if-range')
+        if not if_range:
+            return True
+        if if_range.startswith(('"', 'W/')):
+            return parse_etags(if_range).contains(etag)
+        date = parse_date(if_range)
+        return date is not None and int(date.timestamp()) == last_modified
+
+    @staticmethod
+    async def _send_headers(send, status, headers):
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+
+    async def _send_body(self, receive, send, abs_path, start, length):
+        # 客户端断开后 uvicorn 的 send 会静默返回，需要单独监听 http.disconnect 以便尽早停止读文件
+        disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+        fd = await self._run(os.open, abs_path, os.O_RDONLY)
+        try:
+            position, remaining = start, length
+            while remaining > 0 and not disconnected.done():
+                chunk = await self._run(os.pread, fd, min(READ_SIZE, remaining), position)
+                if not chunk:
+                    break  # 文件在发送过程中被截断
+                position += len(chunk)
+                remaining -= len(chunk)
+                # send 会等待客户端消费，慢速客户端只占一个挂起的协程
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            await self._run(os.close, fd)
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+
+def create_asgi_app(flask_app=None, **kwargs):
+    return AsyncFileServer(flask_app or new_file_server.app, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="以 ASGI 方式（uvicorn）运行文件服务器")
+    parser.add_argument('--root', default=None, help='文件服务的根目录，默认为 FILE_ROOT')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5050)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    new_file_server.create_app(args.root)
+    print(f"文件服务已启动（ASGI），根目录为: {new_file_server.FILE_ROOT}")
+    uvicorn.run(create_asgi_app(), host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
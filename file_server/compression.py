@@ -0,0 +1,147 @@
+"""
+响应压缩（gzip / brotli）
+
+根据 Accept-Encoding 协商编码，边读边压缩，大日志文件不会整个读进内存。只压缩文本类
+MIME 类型（目录页 HTML、JSON 接口、代码、txt/md 等）；图片、音视频、压缩包本身已压缩，
+不在白名单中。brotli 为可选依赖（pip install brotli），未安装时只使用 gzip。
+
+预压缩文件：如果存在 <文件>.br / <文件>.gz 且不比原文件旧，直接发送它（sidecar_for）。
+"""
+
+import os
+import zlib
+
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+GZIP_LEVEL = 6
+# brotli 的 quality 11 太慢，不适合实时压缩
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/xhtml+xml',
+    'application/x-yaml',
+    'application/yaml',
+    'application/x-sh',
+}
+
+SIDECAR_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def available_encodings():
+    """服务器支持的编码，按优先顺序"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encoding, encodings=None):
+    """根据 Accept-Encoding 请求头选出编码，客户端不接受任何一种时返回 None"""
+    if not accept_encoding:
+        return None
+    accept = parse_accept_header(accept_encoding)
+    return accept.best_match(encodings or available_encodings())
+
+
+def is_compressible(mimetype):
+    return bool(mimetype) and (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES)
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _brotli_chunks(chunks):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def compress_iter(chunks, encoding):
+    """把字节块迭代器压缩为另一个迭代器"""
+    if encoding == 'br':
+        return _brotli_chunks(chunks)
+    return _gzip_chunks(chunks)
+
+
+def _closing(chunks, close):
+    try:
+        yield from chunks
+    finally:
+        if close is not None:
+            close()
+
+
+def compress_response(response, accept_encoding, min_size=0):
+    """
+    按需压缩 Flask 响应（在 after_request 中调用），返回同一个 response
+
+    只处理 200 响应；已有 Content-Encoding、交给前端服务器发送（X-Accel-Redirect / X-Sendfile）
+    或小于 min_size 字节的响应保持不变。强 ETag 改为弱 ETag，因为压缩结果不是逐字节相同的表示。
+    """
+    if response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+    if 'X-Accel-Redirect' in response.headers or 'X-Sendfile' in response.headers:
+        return response
+    if not is_compressible(response.mimetype):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    length = response.content_length
+    if length is not None and length < min_size:
+        return response
+    encoding = negotiate(accept_encoding)
+    if encoding is None:
+        return response
+
+    if response.direct_passthrough:
+        # send_file 的文件包装器：直接迭代读取，完成或客户端断开后关闭文件
+        body = response.response
+        response.response = _closing(compress_iter(body, encoding), getattr(body, 'close', None))
+        response.direct_passthrough = False
+    else:
+        response.response = compress_iter(response.iter_encoded(), encoding)
+    response.headers['Content-Encoding'] = encoding
+    response.headers.pop('Content-Length', None)
+    response.headers.pop('Accept-Ranges', None)
+
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def sidecar_for(path, accept_encoding):
+    """
+    返回 (预压缩文件路径, 编码)，没有可用的预压缩文件时返回 (None, None)
+
+    预压缩文件比原文件旧时视为过期，不使用。
+    """
+    encoding_order = [e for e in ('br', 'gzip') if negotiate(accept_encoding, (e,))]
+    if not encoding_order:
+        return None, None
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None, None
+    for encoding in encoding_order:
+        candidate = f"{path}{SIDECAR_SUFFIXES[encoding]}"
+        try:
+            if os.stat(candidate).st_mtime >= mtime:
+                return candidate, encoding
+        except OSError:
+            continue
+    return None, None
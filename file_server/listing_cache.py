@@ -0,0 +1,212 @@
+"""
+目录列表的内存 LRU 缓存
+
+缓存 FileServerView 处理好的列表结果，以目录路径为键，用目录的 mtime 校验是否过期。
+目录 mtime 只在增删、重命名条目时变化，子文件原地修改不会改变它，因此：
+  - 默认再加一个较短的 TTL，限制这种情况下的陈旧时间；
+  - Linux 上可以启用 inotify 监听线程，子文件有任何变化时立即失效对应目录。
+
+缓存的值会被多个请求共享，调用方不得修改返回的列表和字典。
+"""
+
+import ctypes
+import ctypes.util
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+
+class ListingCache:
+    """
+    按目录路径缓存列表结果的 LRU
+
+    max_dirs 限制缓存的目录数，max_weight 限制所有目录的条目总数（内存上限），
+    两者任一超出时淘汰最久未使用的目录。
+    """
+
+    def __init__(self, max_dirs=256, max_weight=200_000, ttl=30, weigh=len):
+        self.max_dirs = max_dirs
+        self.max_weight = max_weight
+        self.ttl = ttl
+        self._weigh = weigh
+        self._data = OrderedDict()  # path -> (mtime_ns, 写入时间, weight, value)
+        self._weight = 0
+        self._lock = threading.Lock()
+        self._watcher = None
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def attach_watcher(self, watcher):
+        """挂接 inotify 监听器；有实时失效时不再需要 TTL"""
+        self._watcher = watcher
+        self.ttl = None
+
+    def get(self, abs_path, builder):
+        """返回 abs_path 的列表结果，缓存缺失或目录已变化时调用 builder(abs_path) 重新生成"""
+        key = str(abs_path)
+        mtime_ns = os.stat(key).st_mtime_ns
+
+        with self._lock:
+            cached = self._data.get(key)
+            if cached is not None:
+                cached_mtime, stored_at, _, value = cached
+                fresh = self.ttl is None or time.monotonic() - stored_at < self.ttl
+                if cached_mtime == mtime_ns and fresh:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+
+        # 在锁外扫描目录，避免慢目录阻塞其他请求
+        value = builder(abs_path)
+        self._put(key, mtime_ns, value)
+        return value
+
+    def _put(self, key, mtime_ns, value):
+        weight = self._weigh(value)
+        if weight > self.max_weight:
+            return  # 单个目录就超过上限，不缓存
+
+        evicted = []
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._weight -= old[2]
+            self._data[key] = (mtime_ns, time.monotonic(), weight, value)
+            self._weight += weight
+
+            while len(self._data) > self.max_dirs or self._weight > self.max_weight:
+                old_key, old = self._data.popitem(last=False)
+                self._weight -= old[2]
+                self.evictions += 1
+                evicted.append(old_key)
+
+        if self._watcher is not None:
+            self._watcher.watch(key)
+            for old_key in evicted:
+                self._watcher.unwatch(old_key)
+
+    def invalidate(self, abs_path):
+        """使某个目录的缓存失效（上传、监听到变化时调用）"""
+        key = str(abs_path)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is None:
+                return
+            self._weight -= old[2]
+            self.invalidations += 1
+
+        # 下次重新缓存时再监听，保证监听数量不超过缓存的目录数
+        if self._watcher is not None:
+            self._watcher.unwatch(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._weight = 0
+
+    def stats(self):
+        """命中/未命中等计数，供监控使用"""
+        with self._lock:
+            return {
+                'dirs': len(self._data),
+                'weight': self._weight,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'evictions': self.evictions,
+            }
+
+
+# inotify 常量，见 <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """
+    基于 inotify 的目录变化监听（仅 Linux，通过 ctypes 调用 libc，无额外依赖）
+
+    只监听当前被缓存的目录，目录或其直接子项变化时回调 on_change(目录路径)。
+    """
+
+    def __init__(self, on_change):
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError("找不到 libc，无法使用 inotify")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError("当前系统不支持 inotify")
+
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._wd_to_path = {}
+        self._path_to_wd = {}
+        self._thread = threading.Thread(target=self._run, name='listing-inotify', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def watch(self, path):
+        with self._lock:
+            if path in self._path_to_wd:
+                return
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                return  # 超出 max_user_watches 等情况下退化为只靠 mtime 校验
+            self._wd_to_path[wd] = path
+            self._path_to_wd[path] = wd
+
+    def unwatch(self, path):
+        with self._lock:
+            wd = self._path_to_wd.pop(path, None)
+            if wd is not None:
+                self._wd_to_path.pop(wd, None)
+                self._libc.inotify_rm_watch(self._fd, wd)
+
+    def _run(self):
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except OSError:
+                return
+
+            changed = set()
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size + name_len
+                with self._lock:
+                    path = self._wd_to_path.get(wd)
+                    if mask & IN_IGNORED and path is not None:
+                        self._wd_to_path.pop(wd, None)
+                        self._path_to_wd.pop(path, None)
+                if path is not None:
+                    changed.add(path)
+
+            for path in changed:
+                self._on_change(path)
@@ -0,0 +1,220 @@
+"""
+Prometheus 文本格式的监控指标（只依赖标准库）
+
+Counter / Histogram 按标签值分别计数，render() 输出 text/plain; version=0.0.4 格式，
+由 /_metrics 接口返回。registry.enabled 为 False 时 inc() / observe() 直接返回，
+各处埋点的开销只剩一次属性判断。
+
+计数保存在进程内：gunicorn 的每个 worker 各自计数，Prometheus 抓取到的是处理这次
+抓取请求的那个 worker 的值（按 instance 聚合时用 rate() 即可，单个 worker 的重启会被
+当作计数器归零处理）。
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# 默认的耗时分桶（秒），覆盖 1 ms ~ 60 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# 字节数分桶：1 KB ~ 10 GB
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, 1e10)
+# 目录条目数分桶
+COUNT_BUCKETS = (10, 100, 1000, 10_000, 100_000, 1_000_000)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs.extend(f'{n}="{v}"' for n, v in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """collect() 返回 [(名称, 类型, 说明, {标签: 值} 或 None, 数值)]，抓取时调用（用于缓存统计等现成的数据）"""
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            metric.render(lines)
+        for collect in self._collectors:
+            seen = set()
+            for name, kind, help_text, labels, value in collect():
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f'# HELP {name} {help_text}')
+                    lines.append(f'# TYPE {name} {kind}')
+                labels = labels or {}
+                lines.append(f'{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=(), registry=registry):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.registry = registry
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def inc(self, amount=1, *label_values):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self, lines):
+        lines.append(f'# HELP {self.name} {self.help}')
+        lines.append(f'# TYPE {self.name} counter')
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f'{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}')
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS, registry=registry):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.registry = registry
+        self._series = {}  # 标签值 -> [各分桶计数..., 总和, 次数]
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def observe(self, value, *label_values):
+        if not self.registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, *label_values):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def render(self, lines):
+        lines.append(f'# HELP {self.name} {self.help}')
+        lines.append(f'# TYPE {self.name} histogram')
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                labels = _format_labels(self.label_names, label_values, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f'{self.name}_sum{labels} {_format_value(float(series[-2]))}')
+            lines.append(f'{self.name}_count{labels} {series[-1]}')
+
+
+# --- 响应体发送完毕时的回调 ---
+
+CLOSE_CALLBACKS_KEY = 'file_server.on_close'
+
+
+def call_on_close(environ, callback):
+    """
+    在 WSGI 服务器关闭响应体（发送完毕或客户端断开）时调用 callback
+
+    Flask 的 Response.call_on_close 对 direct_passthrough 响应（send_file、Range、缩略图）无效：
+    Werkzeug 把文件包装对象直接交给服务器，不经过调用回调的 ClosingIterator。
+    需要 CloseHookMiddleware 包在 wsgi_app 外面。
+    """
+    environ.setdefault(CLOSE_CALLBACKS_KEY, []).append(callback)
+
+
+class _ClosingIterable:
+    def __init__(self, iterable, close):
+        self.iterable = iterable
+        self.close = close
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+
+class CloseHookMiddleware:
+    """
+    执行 call_on_close() 登记的回调
+
+    不能在响应体外面再包一层迭代器：gunicorn 只对 wsgi.file_wrapper 实例本身调用 sendfile。
+    能设置属性的对象直接替换其 close()，其余（列表、生成器等）才包一层。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        result = self.app(environ, start_response)
+        callbacks = environ.get(CLOSE_CALLBACKS_KEY)
+        if not callbacks:
+            return result
+        original_close = getattr(result, 'close', None)
+
+        def close():
+            try:
+                if original_close is not None:
+                    original_close()
+            finally:
+                for callback in callbacks:
+                    callback()
+
+        try:
+            result.close = close
+        except AttributeError:
+            result = _ClosingIterable(result, close)
+        return result
+
+
+# --- 文件服务器使用的指标 ---
+
+REQUESTS = Counter('file_server_requests_total', '处理的请求数', ('route', 'method', 'status'))
+REQUEST_SECONDS = Histogram('file_server_request_duration_seconds',
+                            '请求耗时（含响应体发送），按路由', ('route', 'method'))
+LISTING_SCAN_SECONDS = Histogram('file_server_listing_scan_seconds', '目录扫描（scandir + stat）耗时，只在缓存未命中时发生')
+LISTING_ENTRIES = Histogram('file_server_listing_entries', '每次扫描的目录条目数', buckets=COUNT_BUCKETS)
+RENDER_SECONDS = Histogram('file_server_template_render_seconds', '模板渲染耗时', ('template',))
+SEND_BYTES = Counter('file_server_sent_bytes_total', '文件下载发送的字节数（按响应长度计）', ('kind',))
+SEND_SECONDS = Histogram('file_server_send_duration_seconds',
+                         '文件下载从开始到响应体发送完毕的耗时', ('kind',))
+SEND_SIZE = Histogram('file_server_send_size_bytes', '单次文件下载的响应长度', ('kind',), buckets=BYTES_BUCKETS)
+UPLOAD_BYTES = Counter('file_server_uploaded_bytes_total', '上传写入的字节数', ('kind',))
+UPLOAD_SECONDS = Histogram('file_server_upload_duration_seconds', '上传请求的处理耗时', ('kind',))
+UPLOAD_THROUGHPUT = Histogram('file_server_upload_throughput_bytes_per_second', '上传请求的平均速度',
+                              ('kind',), buckets=(1e5, 1e6, 1e7, 5e7, 1e8, 5e8, 1e9))
@@ -0,0 +1,269 @@
+"""
+按需分析单个请求的性能（cProfile）
+
+ProfilingMiddleware 包在 Flask 的 wsgi_app 外面，分析范围包括视图函数、模板渲染、
+after_request 钩子以及响应体的生成（压缩、打包等）。两种用法：
+
+  - 手动：请求 URL 加 ?_profile=1（返回文本报告，代替原来的响应）或 ?_profile=prof
+    （下载 pstats 文件，可用 snakeviz / flameprof / gprof2dot 生成火焰图），需要在
+    X-Profile-Token 头或 _token 参数中给出管理令牌；
+  - 采样：按 sample_rate 的概率分析普通请求，原响应照常返回，只保留最慢的 keep 个。
+
+同一时间只分析一个请求（Python 3.12 起同一进程只能有一个 profiler），忙时采样直接跳过，
+手动分析返回 503。结果都保存在进程内存中，每个 gunicorn worker 各自一份。
+"""
+
+import cProfile
+import heapq
+import hmac
+import io
+import itertools
+import marshal
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qsl, urlencode
+
+REPORT_LINES = 60
+TOKEN_HEADER = 'HTTP_X_PROFILE_TOKEN'
+
+
+class ProfileRecord:
+    """一次被分析的请求"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, method, url, status, seconds, stats, mode):
+        self.id = next(self._ids)
+        self.method = method
+        self.url = url
+        self.status = status
+        self.seconds = seconds
+        self.mode = mode  # 'manual' 或 'sampled'
+        self.created = time.time()
+        self.stats = stats  # pstats 格式的 {函数: 统计}，marshal.dumps 后即 .prof 文件
+
+    def summary(self):
+        return {
+            'id': self.id, 'method': self.method, 'url': self.url, 'status': self.status,
+            'ms': round(self.seconds * 1000, 2), 'mode': self.mode, 'created': self.created,
+        }
+
+    def prof_bytes(self):
+        return marshal.dumps(self.stats)
+
+    def report(self, sort='cumulative', lines=REPORT_LINES):
+        """pstats 文本报告"""
+        out = io.StringIO()
+        out.write(f"{self.method} {self.url} -> {self.status}, {self.seconds * 1000:.1f} ms\n\n")
+        stats = pstats.Stats(_StatsHolder(self.stats), stream=out)
+        stats.strip_dirs().sort_stats(sort).print_stats(lines)
+        return out.getvalue()
+
+
+class _StatsHolder:
+    """pstats.Stats 接受带 create_stats() / stats 属性的对象"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class ProfileStore:
+    """手动分析的结果按时间保留最近 keep 个，采样结果只保留最慢的 keep 个"""
+
+    def __init__(self, keep=20):
+        self.keep = keep
+        self._manual = deque(maxlen=keep)
+        self._slowest = []  # 以耗时为键的最小堆
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            if record.mode == 'manual':
+                self._manual.append(record)
+            elif len(self._slowest) < self.keep:
+                heapq.heappush(self._slowest, (record.seconds, record.id, record))
+            else:
+                heapq.heappushpop(self._slowest, (record.seconds, record.id, record))
+
+    def would_keep(self, seconds):
+        """采样结果是否足够慢，能进入最慢的 keep 个"""
+        with self._lock:
+            return len(self._slowest) < self.keep or seconds > self._slowest[0][0]
+
+    def records(self):
+        """手动分析的（新的在前）+ 采样的（慢的在前）"""
+        with self._lock:
+            manual = list(reversed(self._manual))
+            sampled = [r for _, _, r in sorted(self._slowest, reverse=True)]
+        return manual + sampled
+
+    def get(self, record_id):
+        for record in self.records():
+            if record.id == record_id:
+                return record
+        return None
+
+
+def check_token(environ, token):
+    """管理令牌为空时视为未启用，任何请求都不通过"""
+    if not token:
+        return False
+    given = environ.get(TOKEN_HEADER) or dict(parse_qsl(environ.get('QUERY_STRING', ''))).get('_token', '')
+    return hmac.compare_digest(given.encode(), token.encode())
+
+
+def _request_url(environ):
+    """记录用的 URL，去掉分析参数和令牌"""
+    query = [(k, v) for k, v in parse_qsl(environ.get('QUERY_STRING', ''), keep_blank_values=True)
+             if k not in ('_profile', '_token')]
+    path = environ.get('PATH_INFO', '')
+    return f"{path}?{urlencode(query)}" if query else path
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, store, token, sample_rate=0.0):
+        self.app = app
+        self.store = store
+        self.token = token
+        self.sample_rate = sample_rate
+        self._busy = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        query = environ.get('QUERY_STRING', '')
+        if '_profile=' in query:
+            mode = dict(parse_qsl(query)).get('_profile')
+            if mode in ('1', 'prof'):
+                return self._manual(environ, start_response, mode)
+        if self.sample_rate and random.random() < self.sample_rate and self._busy.acquire(blocking=False):
+            return self._sampled(environ, start_response)
+        return self.app(environ, start_response)
+
+    def _manual(self, environ, start_response, mode):
+        if not check_token(environ, self.token):
+            return _plain(start_response, '403 Forbidden', "需要管理令牌")
+        if not self._busy.acquire(blocking=False):
+            return _plain(start_response, '503 Service Unavailable', "正在分析其他请求，请稍后重试")
+        try:
+            captured = {}
+
+            def capture(status, headers, exc_info=None):
+                captured['status'] = status
+                return lambda data: None
+
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                body = self.app(environ, capture)
+                try:
+                    for _ in body:  # 响应体的生成也计入，内容丢弃
+                        pass
+                finally:
+                    if hasattr(body, 'close'):
+                        body.close()
+            finally:
+                profiler.disable()
+            seconds = time.perf_counter() - started
+            profiler.create_stats()
+            record = ProfileRecord(environ.get('REQUEST_METHOD', 'GET'), _request_url(environ),
+                                   captured.get('status', ''), seconds, profiler.stats, 'manual')
+            self.store.add(record)
+        finally:
+            self._busy.release()
+
+        if mode == 'prof':
+            data = record.prof_bytes()
+            start_response('200 OK', [
+                ('Content-Type', 'application/octet-stream'),
+                ('Content-Disposition', f'attachment; filename="request-{record.id}.prof"'),
+                ('Content-Length', str(len(data))),
+                ('Cache-Control', 'no-store'),
+                ('X-Profile-Id', str(record.id)),
+            ])
+            return [data]
+        return _plain(start_response, '200 OK', record.report(), [('X-Profile-Id', str(record.id))])
+
+    def _sampled(self, environ, start_response):
+        """调用方已经拿到 _busy 锁；响应体发送完（close）时释放并记录"""
+        profiler = cProfile.Profile()
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured['status'] = status
+            return start_response(status, headers, exc_info)
+
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                body = self.app(environ, capture)
+            finally:
+                profiler.disable()
+        except BaseException:
+            self._busy.release()
+            raise
+
+        def finish():
+            seconds = time.perf_counter() - started
+            try:
+                if self.store.would_keep(seconds):
+                    profiler.create_stats()
+                    self.store.add(ProfileRecord(environ.get('REQUEST_METHOD', 'GET'), _request_url(environ),
+                                                 captured.get('status', ''), seconds, profiler.stats, 'sampled'))
+            finally:
+                self._busy.release()
+
+        # 服务器的 wsgi.file_wrapper（gunicorn 据此走 sendfile）不能再包一层，只记录视图部分
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if isinstance(file_wrapper, type) and isinstance(body, file_wrapper):
+            finish()
+            return body
+        return _ProfiledBody(body, profiler, finish)
+
+
+class _ProfiledBody:
+    """逐块生成响应体时开启 profiler，close() 时结束记录；不缓冲响应体"""
+
+    def __init__(self, body, profiler, finish):
+        self._body = body
+        self._iter = iter(body)
+        self._profiler = profiler
+        self._finish = finish
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self._profiler.enable()
+        try:
+            return next(self._iter)
+        finally:
+            self._profiler.disable()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if hasattr(self._body, 'close'):
+                self._body.close()
+        finally:
+            self._finish()
+
+
+def _plain(start_response, status, text, extra_headers=()):
+    data = text.encode('utf-8')
+    start_response(status, [
+        ('Content-Type', 'text/plain; charset=utf-8'),
+        ('Content-Length', str(len(data))),
+        ('Cache-Control', 'no-store'),
+        *extra_headers,
+    ])
+    return [data]
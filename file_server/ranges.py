@@ -0,0 +1,176 @@
+"""
+文件下载的 Range 请求（视频/音频拖动进度条、PDF 分段加载）
+
+Werkzeug 的 make_conditional 处理 Range 时用 _RangeWrapper 包住响应体：如果响应体是
+gunicorn 的 wsgi.file_wrapper（不可 seek），它会从文件开头逐块读取并丢弃，直到起始偏移。
+拖到 2 GB 视频的末尾，worker 要先读 2 GB 才能发出第一个字节；多段 Range 则直接返回 416。
+
+这里自己处理 Range：
+  - 单段：文件 seek 到起始位置后交给服务器的 file_wrapper，gunicorn 从当前偏移 sendfile
+    Content-Length 个字节；没有 sendfile 时也只读取这一段
+  - 多段：返回 multipart/byteranges，重叠或相邻的区间先合并，每段单独 seek
+  - 先判断 If-None-Match / If-Modified-Since（RFC 9110 §13.2.2），命中时返回 304，
+    不再看 Range；之后 If-Range 与 ETag/Last-Modified 不匹配时忽略 Range，返回完整文件
+"""
+
+import os
+import secrets
+
+from flask import Response
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.http import is_resource_modified
+from werkzeug.wsgi import wrap_file
+
+READ_SIZE = 64 * 1024
+# 合并后超过这个段数的多段 Range 直接返回完整文件（RFC 9110 允许忽略 Range）
+MAX_RANGES = 16
+
+
+class BoundedFile:
+    """只能读出 [当前位置, 当前位置 + length) 的文件对象，fileno() 供服务器 sendfile 使用"""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_ranges(value):
+    """
+    解析 Range 请求头，返回 [(start, stop)]，stop 不含；bytes=-N 表示为 (-N, None)
+
+    与 Werkzeug 的 parse_range_header 不同，允许乱序和重叠的区间（浏览器和 PDF 阅读器会发），
+    格式错误时返回 None。
+    """
+    units, _, spec = value.partition('=')
+    if units.strip().lower() != 'bytes':
+        return None
+    ranges = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        first, sep, last = item.partition('-')
+        first, last = first.strip(), last.strip()
+        if not sep or (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        if not first:
+            if not last:
+                return None
+            if int(last):
+                ranges.append((-int(last), None))
+        elif not last:
+            ranges.append((int(first), None))
+        elif int(last) >= int(first):
+            ranges.append((int(first), int(last) + 1))
+        else:
+            return None
+    return ranges or None
+
+
+def resolve_ranges(ranges, size):
+    """把 (start, stop) 转换为文件内的绝对区间，丢弃无法满足的区间，合并重叠/相邻区间"""
+    resolved = []
+    for start, stop in ranges:
+        if start < 0:  # bytes=-N，最后 N 个字节
+            start, stop = max(size + start, 0), size
+        else:
+            stop = size if stop is None else min(stop, size)
+        if start < stop:
+            resolved.append([start, stop])
+
+    resolved.sort()
+    merged = []
+    for start, stop in resolved:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], stop)
+        else:
+            merged.append([start, stop])
+    return [tuple(r) for r in merged]
+
+
+def _iter_byteranges(path, parts, tail):
+    with open(path, 'rb') as f:
+        for header, (start, stop) in parts:
+            yield header
+            f.seek(start)
+            remaining = stop - start
+            while remaining > 0:
+                data = f.read(min(READ_SIZE, remaining))
+                if not data:
+                    return  # 文件在发送过程中被截断
+                remaining -= len(data)
+                yield data
+            yield b'\r\n'
+    yield tail
+
+
+def make_range_response(response, path, environ):
+    """
+    处理 send_file(conditional=False) 返回的完整文件响应上的 Range / 条件请求
+
+    条件请求命中时返回 304；没有 Range 或 If-Range 不匹配时按 Werkzeug 的 make_conditional
+    处理（200），否则返回 206（单段或 multipart/byteranges），无法满足时抛出 416。
+    """
+    size = os.stat(path).st_size
+    if 'HTTP_RANGE' in environ and not is_resource_modified(
+            environ, response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified')):
+        # make_conditional 先处理 Range 再判断 304，这里去掉 Range 让它返回 304
+        environ = {k: v for k, v in environ.items() if k != 'HTTP_RANGE'}
+        return response.make_conditional(environ, accept_ranges=True, complete_length=size)
+    if_range_ok = 'HTTP_IF_RANGE' not in environ or not is_resource_modified(
+        environ, response.headers.get('ETag'),
+        last_modified=response.headers.get('Last-Modified'), ignore_if_range=False)
+    if 'HTTP_RANGE' not in environ or not if_range_ok or size == 0:
+        return response.make_conditional(environ, accept_ranges=True, complete_length=size)
+
+    parsed = parse_ranges(environ['HTTP_RANGE'])
+    if parsed is None:
+        raise RequestedRangeNotSatisfiable(length=size)
+    ranges = resolve_ranges(parsed, size)
+    if not ranges:
+        raise RequestedRangeNotSatisfiable(length=size)
+    if len(ranges) > MAX_RANGES:
+        response.accept_ranges = 'bytes'
+        return response
+
+    # 不用 send_file 打开的文件（其 wrapper 会从头读），关闭后按区间重新打开
+    response.close()
+    headers = response.headers.copy()
+    headers.remove('Content-Length')
+    headers['Accept-Ranges'] = 'bytes'
+
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        headers['Content-Range'] = f"bytes {start}-{stop - 1}/{size}"
+        headers['Content-Length'] = str(stop - start)
+        body = wrap_file(environ, BoundedFile(open(path, 'rb'), start, stop - start), READ_SIZE)
+        return Response(body, status=206, headers=headers, direct_passthrough=True)
+
+    boundary = secrets.token_hex(16)
+    content_type = headers.pop('Content-Type', 'application/octet-stream')
+    parts = []
+    length = 0
+    for start, stop in ranges:
+        header = (f"--{boundary}\r\nContent-Type: {content_type}\r\n"
+                  f"Content-Range: bytes {start}-{stop - 1}/{size}\r\n\r\n").encode('latin-1')
+        parts.append((header, (start, stop)))
+        length += len(header) + (stop - start) + 2
+    tail = f"--{boundary}--\r\n".encode('latin-1')
+    headers['Content-Type'] = f"multipart/byteranges; boundary={boundary}"
+    headers['Content-Length'] = str(length + len(tail))
+    return Response(_iter_byteranges(path, parts, tail), status=206, headers=headers,
+                    direct_passthrough=True)
@@ -0,0 +1,183 @@
+"""
+可续传的分块上传
+
+协议（参考 tus，但允许并行上传分块）:
+    POST   /_uploads          {"path", "filename", "size"} -> 创建上传，返回 id 和分块大小
+    PATCH  /_uploads/<id>     请求头 Upload-Offset，请求体为一个完整分块
+    HEAD   /_uploads/<id>     Upload-Offset（从 0 开始连续收到的字节数）、Upload-Length
+    GET    /_uploads/<id>     JSON，包含已收到的分块序号，用于断点续传
+    DELETE /_uploads/<id>     取消上传
+
+数据直接写入目标目录下的隐藏临时文件（按偏移量 pwrite，不同分块可以并发写入），
+所有分块到齐后原子重命名为最终文件。状态保存在磁盘上，多个 worker 进程之间共享：
+  - <id>.json    上传信息，创建后不再修改
+  - <id>.chunks  每收到一个分块追加一行序号（O_APPEND 小块写入是原子的）
+  - <id>.done    用 O_EXCL 创建，保证只有一个请求负责最后的重命名
+"""
+
+import json
+import os
+import re
+import secrets
+import time
+from pathlib import Path
+
+READ_SIZE = 1024 * 1024
+PART_PREFIX = '.upload-'
+PART_SUFFIX = '.part'
+
+_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadError(Exception):
+    """上传请求不合法，status 为建议返回的 HTTP 状态码"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class UploadStore:
+    def __init__(self, state_dir, chunk_size, expire_seconds=24 * 3600):
+        self.state_dir = Path(state_dir)
+        self.chunk_size = chunk_size
+        self.expire_seconds = expire_seconds
+
+    def _state_path(self, upload_id, suffix):
+        return self.state_dir / f"{upload_id}{suffix}"
+
+    def create(self, target_dir, filename, size):
+        """创建上传并预分配（稀疏）临时文件，返回上传信息"""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.cleanup_expired()
+
+        upload_id = secrets.token_hex(16)
+        part_path = Path(target_dir) / f"{PART_PREFIX}{upload_id}{PART_SUFFIX}"
+        with open(part_path, 'wb') as f:
+            f.truncate(size)
+
+        info = {
+            'id': upload_id,
+            'target_dir': str(target_dir),
+            'filename': filename,
+            'size': size,
+            'chunk_size': self.chunk_size,
+            'part_path': str(part_path),
+            'created': time.time(),
+        }
+        tmp = self._state_path(upload_id, '.json.tmp')
+        tmp.write_text(json.dumps(info), encoding='utf-8')
+        os.replace(tmp, self._state_path(upload_id, '.json'))
+        return info
+
+    def get(self, upload_id):
+        """读取上传信息，不存在（或 id 非法）时返回 None"""
+        if not _ID_RE.match(upload_id):
+            return None
+        try:
+            return json.loads(self._state_path(upload_id, '.json').read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def chunk_count(info):
+        return max(1, -(-info['size'] // info['chunk_size']))
+
+    def received_chunks(self, info):
+        """已收到的分块序号集合"""
+        try:
+            text = self._state_path(info['id'], '.chunks').read_text(encoding='ascii')
+        except FileNotFoundError:
+            return set()
+        return {int(line) for line in text.split()}
+
+    def contiguous_offset(self, info, received=None):
+        """从文件开头起连续收到的字节数（tus 的 Upload-Offset）"""
+        if received is None:
+            received = self.received_chunks(info)
+        index = 0
+        while index in received:
+            index += 1
+        return min(index * info['chunk_size'], info['size'])
+
+    def write_chunk(self, info, offset, length, stream):
+        """
+        把请求体中的一个分块写入临时文件
+
+        offset 必须是分块边界，length 必须等于该分块的实际长度。所有分块到齐时完成组装，
+        返回 (已收到的分块集合, 最终文件路径或 None)。
+        """
+        chunk_size = info['chunk_size']
+        if offset < 0 or offset % chunk_size or offset >= max(info['size'], 1):
+            raise UploadError("Upload-Offset 必须是分块边界且在文件范围内")
+        expected = min(chunk_size, info['size'] - offset)
+        if length != expected:
+            raise UploadError(f"分块长度应为 {expected} 字节，实际为 {length}")
+
+        fd = os.open(info['part_path'], os.O_WRONLY)
+        try:
+            position = offset
+            remaining = length
+            while remaining > 0:
+                data = stream.read(min(READ_SIZE, remaining))
+                if not data:
+                    raise UploadError("分块数据不完整")
+                os.pwrite(fd, data, position)
+                position += len(data)
+                remaining -= len(data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        with open(self._state_path(info['id'], '.chunks'), 'a', encoding='ascii') as f:
+            f.write(f"{offset // chunk_size}\n")
+
+        received = self.received_chunks(info)
+        if len(received) < self.chunk_count(info):
+            return received, None
+        return received, self._finish(info)
+
+    def _finish(self, info):
+        """所有分块到齐：只有抢到 .done 标记的请求执行重命名"""
+        target = Path(info['target_dir']) / info['filename']
+        try:
+            fd = os.open(self._state_path(info['id'], '.done'), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return target
+        os.close(fd)
+
+        try:
+            os.replace(info['part_path'], target)
+        except FileNotFoundError:
+            # 另一个请求已经完成重命名并清理了状态（.done 随之被删，O_EXCL 再次成功）
+            return target
+        self._remove_state(info['id'])
+        return target
+
+    def cancel(self, info):
+        try:
+            os.unlink(info['part_path'])
+        except OSError:
+            pass
+        self._remove_state(info['id'])
+
+    def _remove_state(self, upload_id):
+        for suffix in ('.json', '.chunks', '.done'):
+            try:
+                os.unlink(self._state_path(upload_id, suffix))
+            except OSError:
+                pass
+
+    def cleanup_expired(self):
+        """删除超过 expire_seconds 没有新分块的上传"""
+        now = time.time()
+        for meta in self.state_dir.glob('*.json'):
+            info = self.get(meta.stem)
+            if info is None:
+                continue
+            try:
+                last_active = self._state_path(info['id'], '.chunks').stat().st_mtime
+            except FileNotFoundError:
+                last_active = info['created']
+            if now - last_active > self.expire_seconds:
+                self.cancel(info)
@@ -0,0 +1,104 @@
+"""
+生产环境启动入口：用预先调好参数的 gunicorn 运行文件服务器
+
+    python -m file_server.serve --root /srv/files --port 5050
+
+所有参数都可以用环境变量给出（命令行优先）:
+    FILE_SERVER_ROOT          文件根目录
+    FILE_SERVER_HOST          监听地址，默认 0.0.0.0
+    FILE_SERVER_PORT          端口，默认 5050
+    FILE_SERVER_WORKERS       worker 进程数，默认 CPU 核数 * 2 + 1
+    FILE_SERVER_THREADS       每个 gthread worker 的线程数，默认 8
+    FILE_SERVER_WORKER_CLASS  gthread（默认）或 gevent（需安装 gevent）
+
+文件服务以磁盘和网络 I/O 为主，gthread 让一个进程同时处理多个下载，keepalive 让浏览器
+复用连接加载缩略图和分页，preload 让所有 worker 共享一份已导入的代码。
+"""
+
+import argparse
+import multiprocessing
+import os
+
+import new_file_server
+
+DEFAULT_THREADS = 8
+KEEPALIVE_SECONDS = 5
+# gthread/gevent 下 timeout 只约束 worker 心跳，不限制单个下载的时长
+WORKER_TIMEOUT = 60
+GRACEFUL_TIMEOUT = 30
+
+
+def default_workers():
+    return multiprocessing.cpu_count() * 2 + 1
+
+
+def gunicorn_options(args):
+    """根据命令行参数生成 gunicorn 配置"""
+    options = {
+        'bind': f'{args.host}:{args.port}',
+        'workers': args.workers,
+        'worker_class': args.worker_class,
+        'keepalive': KEEPALIVE_SECONDS,
+        'timeout': WORKER_TIMEOUT,
+        'graceful_timeout': GRACEFUL_TIMEOUT,
+        'preload_app': True,
+        'accesslog': '-' if args.access_log else None,
+        'errorlog': '-',
+        # inotify 监听和搜索索引线程不会被 fork 继承，在每个 worker 中单独启动
+        'post_fork': lambda server, worker: new_file_server.start_background_tasks(),
+    }
+    if args.worker_class == 'gthread':
+        options['threads'] = args.threads
+    else:
+        options['worker_connections'] = args.threads * 100
+    return options
+
+
+def parse_args(argv=None):
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="用 gunicorn 运行文件服务器")
+    parser.add_argument('--root', default=env('FILE_SERVER_ROOT'),
+                        help='文件服务的根目录，默认为 new_file_server.FILE_ROOT')
+    parser.add_argument('--host', default=env('FILE_SERVER_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(env('FILE_SERVER_PORT', 5050)))
+    parser.add_argument('--workers', type=int, default=int(env('FILE_SERVER_WORKERS', default_workers())))
+    parser.add_argument('--threads', type=int, default=int(env('FILE_SERVER_THREADS', DEFAULT_THREADS)),
+                        help='gthread 每个 worker 的线程数（gevent 下按 100 倍换算为连接数）')
+    parser.add_argument('--worker-class', choices=('gthread', 'gevent'),
+                        default=env('FILE_SERVER_WORKER_CLASS', 'gthread'))
+    parser.add_argument('--access-log', action='store_true', help='输出访问日志到标准输出')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit("需要安装 gunicorn: pip install gunicorn")
+    if args.worker_class == 'gevent':
+        try:
+            import gevent  # noqa: F401
+        except ImportError:
+            raise SystemExit("gevent worker 需要安装 gevent: pip install gevent")
+
+    app = new_file_server.create_app(args.root, watch=False)
+    options = gunicorn_options(args)
+
+    class FileServerApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                if value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    print(f"文件服务已启动，根目录为: {new_file_server.FILE_ROOT}")
+    print(f"gunicorn: {args.workers} 个 {args.worker_class} worker，监听 {args.host}:{args.port}")
+    FileServerApplication().run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Web 画廊缩略图生成与磁盘缓存
+
+缩略图按 (路径 + mtime + 大小) 生成缓存键，与 gui_file_server/utils.py 中的
+create_thumbnail_cache_key 保持一致，再附加宽度和输出格式。
+原图修改后旧缩略图不会再被命中，由 ThumbnailCache 按最近使用顺序淘汰，缓存目录不会无限增长。
+"""
+
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from gui_file_server.utils import create_thumbnail_cache_key
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow 为可选依赖，缺失时画廊直接使用原图
+    Image = None
+
+# Pillow 无法解码的图片格式，直接返回原图
+UNSUPPORTED_EXTENSIONS = {'svg'}
+# get_thumbnail 生成的文件后缀（即输出格式）
+CACHE_SUFFIXES = ('.jpeg', '.webp')
+
+JPEG_QUALITY = 80
+WEBP_QUALITY = 75
+
+
+def is_available():
+    """Pillow 是否可用"""
+    return Image is not None
+
+
+def supports_webp():
+    """当前 Pillow 是否编译了 WebP 支持"""
+    return Image is not None and features.check('webp')
+
+
+def choose_format(accept_header):
+    """根据 Accept 请求头选择输出格式，支持时优先 WebP"""
+    if accept_header and 'image/webp' in accept_header and supports_webp():
+        return 'webp'
+    return 'jpeg'
+
+
+def clamp_width(width, allowed_widths):
+    """把请求的宽度归一到允许的档位，避免缓存被任意宽度撑爆"""
+    for allowed in allowed_widths:
+        if width <= allowed:
+            return allowed
+    return allowed_widths[-1]
+
+
+def thumbnail_path(cache_dir, file_path, width, fmt):
+    """返回缩略图在缓存目录中的路径，文件名即强 ETag"""
+    key = create_thumbnail_cache_key(file_path)
+    return Path(cache_dir) / f"{key}_{width}.{fmt}"
+
+
+def _render(src_path, width, fmt):
+    """解码原图并生成缩略图对象"""
+    with Image.open(src_path) as img:
+        # JPEG 可以在解码阶段直接按比例缩小，大图时能省掉大部分解码开销
+        img.draft('RGB', (width, width))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((width, width), Image.Resampling.LANCZOS)
+
+        if fmt == 'jpeg':
+            if img.mode in ('RGBA', 'LA', 'P'):
+                img = img.convert('RGBA')
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel('A'))
+                img = background
+            elif img.mode != 'RGB':
+                img = img.convert('RGB')
+        elif img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA')
+        return img
+
+
+def get_thumbnail(cache_dir, src_path, width, fmt):
+    """
+    返回缩略图文件路径，缓存未命中时生成。
+
+    写入先落到同目录临时文件再原子重命名，多个请求同时生成同一张缩略图也不会读到半截文件。
+    """
+    target = thumbnail_path(cache_dir, src_path, width, fmt)
+    if target.exists():
+        return target
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    img = _render(src_path, width, fmt)
+
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if fmt == 'webp':
+                img.save(f, 'WEBP', quality=WEBP_QUALITY, method=4)
+            else:
+                img.save(f, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+        os.replace(tmp_name, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return target
+
+
+class ThumbnailCache:
+    """
+    缓存目录中缩略图文件的 LRU 索引（与 GUI 的 gui_file_server.thumbnails.ThumbnailCache 相同的策略）
+
+    第一次使用时按文件 mtime 建立顺序，之后每次命中把条目移到末尾并更新文件 mtime
+    （重启后仍保持最近使用的顺序）；新增条目后超出 max_entries 时删除最久未用的文件。
+    索引在进程内，gunicorn 的多个 worker 各自淘汰，目录中的文件数最多为 worker 数 × max_entries。
+    """
+
+    def __init__(self, cache_dir, max_entries):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def get(self, src_path, width, fmt):
+        """返回缩略图文件路径，缓存未命中时生成，并记录这次使用"""
+        path = get_thumbnail(self.cache_dir, src_path, width, fmt)
+        self.touch(path)
+        return path
+
+    def touch(self, path):
+        name = Path(path).name
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            is_new = name not in self._entries
+            self._entries[name] = None
+            self._entries.move_to_end(name)
+            # 第一次加载的扫描结果可能已经包含刚生成的文件，所以每次都检查上限
+            self._evict()
+            if is_new:
+                return
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _load(self):
+        existing = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(CACHE_SUFFIXES) and entry.is_file():
+                        existing.append((entry.stat().st_mtime, entry.name))
+        except FileNotFoundError:
+            pass
+        self._entries = OrderedDict((name, None) for _, name in sorted(existing))
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            name, _ = self._entries.popitem(last=False)
+            try:
+                (self.cache_dir / name).unlink()
+            except OSError:
+                pass
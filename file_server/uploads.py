@@ -0,0 +1,96 @@
+"""
+流式 multipart 上传
+
+不经过 request.files：Werkzeug 解析表单时会先把整个文件写到系统临时目录，保存时再复制
+一遍到目标目录。这里用 Werkzeug 的增量解析器 MultipartDecoder 边读请求体边解析，
+每个文件直接写入目标目录下的隐藏临时文件，写完后原子重命名，内存占用与文件大小无关。
+"""
+
+import os
+import tempfile
+
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 1024 * 1024
+# 临时文件以点开头，目录列表会自动隐藏它们
+TEMP_PREFIX = '.upload-'
+TEMP_SUFFIX = '.part'
+
+
+def _read_chunks(stream, size):
+    while True:
+        data = stream.read(size)
+        if not data:
+            break
+        yield data
+    yield None  # 通知解析器数据已结束
+
+
+class _PartWriter:
+    """把一个文件 part 写到目标目录中的临时文件，完成后重命名为最终文件名"""
+
+    def __init__(self, target_dir, filename, max_size):
+        self.target = os.path.join(target_dir, filename)
+        self.max_size = max_size
+        self.written = 0
+        fd, self.tmp_path = tempfile.mkstemp(dir=target_dir, prefix=TEMP_PREFIX, suffix=TEMP_SUFFIX)
+        self.file = os.fdopen(fd, 'wb')
+
+    def write(self, data):
+        self.written += len(data)
+        if self.max_size is not None and self.written > self.max_size:
+            raise RequestEntityTooLarge(f"文件 {os.path.basename(self.target)} 超过大小限制")
+        self.file.write(data)
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.target)
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.unlink(self.tmp_path)
+        except OSError:
+            pass
+
+
+def save_multipart_files(stream, boundary, target_dir, field_name='files[]',
+                         max_file_size=None, chunk_size=CHUNK_SIZE):
+    """
+    从 multipart 请求体流中解析出 field_name 字段的文件并保存到 target_dir
+
+    文件名经过 secure_filename 处理，空文件名的 part 会被跳过。返回已保存的文件名列表；
+    单个文件超过 max_file_size 字节时抛出 RequestEntityTooLarge，请求体不完整时抛出 ValueError。
+    出错时未完成的临时文件会被删除，已经保存的文件保留。
+    """
+    decoder = MultipartDecoder(boundary)
+    saved = []
+    writer = None
+    skipping = True  # 当前 part 不是需要保存的文件（普通字段或其他文件字段）
+
+    try:
+        for chunk in _read_chunks(stream, chunk_size):
+            decoder.receive_data(chunk)
+            event = decoder.next_event()
+            while not isinstance(event, (Epilogue, NeedData)):
+                if isinstance(event, File):
+                    filename = secure_filename(event.filename or '')
+                    skipping = event.name != field_name or not filename
+                    if not skipping:
+                        writer = _PartWriter(target_dir, filename, max_file_size)
+                elif isinstance(event, Field):
+                    skipping = True
+                elif isinstance(event, Data) and not skipping:
+                    writer.write(event.data)
+                    if not event.more_data:
+                        writer.commit()
+                        saved.append(os.path.basename(writer.target))
+                        writer = None
+                event = decoder.next_event()
+    finally:
+        if writer is not None:
+            writer.discard()
+
+    return saved
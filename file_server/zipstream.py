@@ -0,0 +1,121 @@
+"""
+文件夹打包下载：边读文件边生成 ZIP 流
+
+用标准库 zipfile 写入一个不可 seek 的缓冲对象：每个条目使用数据描述符（CRC 和大小写在数据
+之后），大文件自动使用 ZIP64。每读一块文件就把生成的字节交给响应，不生成临时文件，
+内存占用与文件大小无关（只有中央目录的条目信息随文件数量增长）。
+"""
+
+import os
+import time
+import zipfile
+
+READ_SIZE = 1024 * 1024
+# 打包下载以速度为先，deflate 使用最快的压缩级别
+DEFLATE_LEVEL = 1
+# ZipFile(compresslevel=...) 只作用于按名称打开的条目，传入 ZipInfo 时以其自身的级别为准。
+# 该属性在 Python 3.13 中改名为公开的 compress_level，旧名称 _compresslevel 不再起作用
+_LEVEL_ATTR = 'compress_level' if hasattr(zipfile.ZipInfo, 'compress_level') else '_compresslevel'
+
+
+class _StreamSink:
+    """zipfile 的输出目标：只支持 write/tell/flush，zipfile 会按不可 seek 的流处理"""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        if len(self.chunks) == 1:
+            data = self.chunks[0]
+        else:
+            data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def walk_entries(base_dir, names=None, skip_hidden=True):
+    """
+    生成 (压缩包内路径, 绝对路径, 是否目录)
+
+    names 为 None 时打包 base_dir 下的全部内容，否则只打包其中这些条目（文件或文件夹）。
+    不跟随指向目录的符号链接，避免循环。
+    """
+    base_dir = os.fspath(base_dir)
+    top = sorted(os.listdir(base_dir)) if names is None else names
+    for name in top:
+        if skip_hidden and name.startswith('.'):
+            continue
+        path = os.path.join(base_dir, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            yield name + '/', path, True
+            for root, dirs, files in os.walk(path):
+                if skip_hidden:
+                    dirs[:] = [d for d in dirs if not d.startswith('.')]
+                    files = [f for f in files if not f.startswith('.')]
+                dirs.sort()
+                rel_root = os.path.relpath(root, base_dir).replace(os.sep, '/')
+                for d in dirs:
+                    if os.path.islink(os.path.join(root, d)):
+                        continue
+                    yield f"{rel_root}/{d}/", os.path.join(root, d), True
+                for f in sorted(files):
+                    yield f"{rel_root}/{f}", os.path.join(root, f), False
+        elif os.path.exists(path):
+            yield name, path, False
+
+
+def _zip_info(arcname, st, compress_type):
+    # ZIP 的时间戳只能表示 1980 年以后
+    date_time = time.localtime(max(st.st_mtime, 315532800))[:6]
+    info = zipfile.ZipInfo(arcname, date_time=date_time)
+    info.external_attr = (st.st_mode & 0xFFFF) << 16
+    info.compress_type = compress_type
+    info.file_size = st.st_size  # 提前给出大小，zipfile 据此决定是否使用 ZIP64
+    if compress_type == zipfile.ZIP_DEFLATED:
+        setattr(info, _LEVEL_ATTR, DEFLATE_LEVEL)
+    return info
+
+
+def iter_zip(entries, compress_type_for):
+    """
+    把 walk_entries 的结果生成为 ZIP 字节流
+
+    compress_type_for(文件名) 返回 zipfile.ZIP_STORED 或 ZIP_DEFLATED。无法读取的文件会被跳过
+    （响应头已经发出，无法再返回错误）；文件在打包过程中变大时只打包开始时的大小。
+    """
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, 'w', allowZip64=True, compresslevel=DEFLATE_LEVEL) as zf:
+        for arcname, path, is_dir in entries:
+            try:
+                st = os.stat(path)
+                if is_dir:
+                    zf.writestr(_zip_info(arcname, st, zipfile.ZIP_STORED), b'')
+                    continue
+                f = open(path, 'rb')
+            except OSError:
+                continue
+            with f, zf.open(_zip_info(arcname, st, compress_type_for(arcname)), 'w') as dest:
+                remaining = st.st_size
+                while remaining > 0:
+                    data = f.read(min(READ_SIZE, remaining))
+                    if not data:
+                        break
+                    remaining -= len(data)
+                    dest.write(data)
+                    if sink.chunks:
+                        yield sink.drain()
+            if sink.chunks:
+                yield sink.drain()
+    yield sink.drain()
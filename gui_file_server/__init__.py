@@ -0,0 +1,7 @@
+"""
+Tkinter 文件管理器，以及与 Flask 文件服务器共用的模块
+
+GUI 从本目录直接运行（python main.py），模块之间按顶层模块名互相导入；
+new_file_server.py 从仓库根目录把这里作为包导入（gui_file_server.config、file_types、
+search_index、hashing、utils）。
+"""
@@ -12,59 +12,80 @@ APP_VERSION = "1.0.0"
 # 默认设置
 DEFAULT_ROOT_PATH = Path.home()  # 默认根目录为用户主目录
 WINDOW_SIZE = "1200x800"  # 默认窗口大小
-MAX_IMAGE_PREVIEWS = 50  # 最大图片预览数量
+MAX_IMAGE_PREVIEWS = 500  # 图片预览在内存中最多保留的已解码缩略图数量（LRU），与目录中的图片数无关
 THUMBNAIL_SIZE = (150, 150)  # 缩略图大小
+VIRTUAL_ROW_THRESHOLD = 2000  # 目录条目超过该数量时，文件列表切换为虚拟行模式
+DIRECTORY_LOAD_BATCH = 500  # 后台线程扫描目录时，每批交回界面线程显示的条目数
+TRANSFER_WORKERS = 2  # 同时执行的复制/移动/删除任务数
 
-# 文件类型配置
+# 文件类型配置：Web 服务器和 GUI 共用（见 file_types.py），icon 用于 GUI，web_icon 是网页中的 Bootstrap 图标
 FILE_TYPES = {
     'image': {
         'extensions': ['gif', 'ico', 'jpeg', 'jpg', 'png', 'svg', 'webp', 'bmp', 'tiff'],
         'icon': '🖼️',
-        'color': '#4CAF50'
+        'color': '#4CAF50',
+        'web_icon': 'bi-image'
     },
     'video': {
         'extensions': ['mp4', 'm4v', 'ogv', 'webm', 'mov', 'avi', 'mkv', 'flv', 'wmv'],
         'icon': '🎬',
-        'color': '#FF5722'
+        'color': '#FF5722',
+        'web_icon': 'bi-film'
     },
     'audio': {
         'extensions': ['mp3', 'wav', 'ogg', 'm4a', 'flac', 'aac', 'wma'],
         'icon': '🎵',
-        'color': '#9C27B0'
+        'color': '#9C27B0',
+        'web_icon': 'bi-music-note-beamed'
     },
     'archive': {
         'extensions': ['7z', 'zip', 'rar', 'gz', 'tar', 'bz2', 'xz', 'lzma'],
         'icon': '📦',
-        'color': '#795548'
+        'color': '#795548',
+        'web_icon': 'bi-archive-fill'
     },
     'text': {
         'extensions': ['txt', 'md', 'py', 'js', 'css', 'html', 'json', 'yaml', 'yml', 
                       'c', 'cpp', 'java', 'php', 'rb', 'go', 'rs', 'swift'],
         'icon': '📄',
-        'color': '#2196F3'
+        'color': '#2196F3',
+        'web_icon': 'bi-file-earmark-text'
     },
     'pdf': {
         'extensions': ['pdf'],
         'icon': '📕',
-        'color': '#F44336'
+        'color': '#F44336',
+        'web_icon': 'bi-file-earmark-pdf'
+    },
+    'ebook': {
+        'extensions': ['epub', 'mobi', 'azw3'],
+        'icon': '📚',
+        'color': '#8BC34A',
+        'web_icon': 'bi-book-half'
     },
     'office': {
         'extensions': ['doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'odt', 'ods', 'odp'],
         'icon': '📊',
-        'color': '#FF9800'
+        'color': '#FF9800',
+        'web_icon': 'bi-file-earmark-richtext'
     },
     'folder': {
         'extensions': [],
         'icon': '📁',
-        'color': '#FFC107'
+        'color': '#FFC107',
+        'web_icon': 'bi-folder-fill'
     },
     'executable': {
         'extensions': ['exe', 'msi', 'deb', 'rpm', 'dmg', 'app'],
         'icon': '⚙️',
-        'color': '#607D8B'
+        'color': '#607D8B',
+        'web_icon': 'bi-gear'
     }
 }
 
+# 没有扩展名的文件读取开头几百字节按魔数判断类型（结果按 inode + 修改时间缓存）
+FILE_TYPE_SNIFF = True
+
 # 界面主题配置
 THEMES = {
     'default': {
@@ -98,4 +119,8 @@ MAX_FILE_SIZE_MB = 1000  # 最大文件大小限制（MB）
 
 # 缓存配置
 CACHE_DIR = Path.home() / '.gui_file_server_cache'
-THUMBNAIL_CACHE_SIZE = 100  # 缩略图缓存数量
\ No newline at end of file
+SEARCH_INDEX_DIR = CACHE_DIR / 'search'  # 文件名搜索索引（SQLite），每个搜索根目录一个文件
+SEARCH_MAX_RESULTS = 1000  # 单次搜索最多显示的结果数
+THUMBNAIL_CACHE_SIZE = 5000  # 磁盘上最多保留的缩略图数量（LRU 淘汰），每张约 5~10 KB
+HASH_CACHE_PATH = CACHE_DIR / 'hashes.db'  # 文件校验值缓存（SQLite），文件的大小/修改时间/inode 不变时直接使用
+PROPERTIES_HASH_ALGORITHMS = ('blake2b', 'sha256')  # 属性窗口中显示的校验值，读一遍文件同时计算
@@ -0,0 +1,325 @@
+"""
+后台文件操作队列：复制、移动、删除
+
+界面线程只负责提交任务和显示进度，任务由线程池执行。每个任务开始前先统计总字节数和
+文件数，执行过程中更新 done_bytes / done_files，界面用 after() 定时读取（都是简单的
+整数赋值，不需要加锁）。取消通过 threading.Event 通知，在每个数据块之间检查，
+复制了一半的文件会被删除。
+
+文件内容的复制优先在内核中完成：Linux 上先用 os.copy_file_range（同一文件系统上
+支持 reflink 的 Btrfs/XFS 直接共享数据块），不支持时用 os.sendfile，都不可用时退回
+COPY_BUFFER_SIZE 大小的缓冲区 readinto/write，避免 shutil 默认的小块复制。
+"""
+
+import errno
+import itertools
+import os
+import shutil
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 每次内核复制调用 / 缓冲区复制的块大小，也是检查取消和更新进度的粒度
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+
+# 这些错误表示当前文件系统或内核不支持该复制方式，换下一种方式重试
+_UNSUPPORTED_ERRNOS = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EBADF,
+                       errno.EOPNOTSUPP, getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP)}
+
+STATE_LABELS = {
+    'queued': '等待中',
+    'running': '进行中',
+    'done': '完成',
+    'failed': '失败',
+    'cancelled': '已取消',
+}
+KIND_LABELS = {'copy': '复制', 'move': '移动', 'delete': '删除'}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class FileJob:
+    """一个复制 / 移动 / 删除任务，sources 中的条目复制或移动到 dest_dir 下同名位置"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind, sources, dest_dir=None):
+        self.id = next(self._ids)
+        self.kind = kind
+        self.sources = [Path(p) for p in sources]
+        self.dest_dir = Path(dest_dir) if dest_dir is not None else None
+        self.state = 'queued'
+        self.error = None
+        self.current = ''
+        self.total_bytes = 0
+        self.done_bytes = 0
+        self.total_files = 0
+        self.done_files = 0
+        self.started = None
+        self.finished = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def active(self):
+        return self.state in ('queued', 'running')
+
+    def description(self):
+        if len(self.sources) == 1:
+            name = self.sources[0].name
+        else:
+            name = f"{self.sources[0].name} 等 {len(self.sources)} 项"
+        if self.dest_dir is not None:
+            return f"{name} → {self.dest_dir}"
+        return name
+
+    def progress(self):
+        """0~1；复制和移动按字节计算，删除按文件数计算"""
+        if self.state == 'done':
+            return 1.0
+        if self.kind != 'delete' and self.total_bytes:
+            return min(1.0, self.done_bytes / self.total_bytes)
+        if self.total_files:
+            return min(1.0, self.done_files / self.total_files)
+        return 0.0
+
+    def throughput(self):
+        """平均速度（字节/秒），尚未开始时为 0"""
+        if self.started is None:
+            return 0.0
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return self.done_bytes / elapsed if elapsed > 0 else 0.0
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self.state = 'cancelled'
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def advance(self, nbytes):
+        self.done_bytes += nbytes
+
+
+def _kernel_copy(call, infd, outfd, job):
+    """用 copy_file_range / sendfile 复制剩余数据；第一次调用就不被支持时返回 False"""
+    copied = 0
+    while True:
+        job.check_cancelled()
+        try:
+            n = call(infd, outfd, COPY_BUFFER_SIZE)
+        except OSError as e:
+            if copied == 0 and e.errno in _UNSUPPORTED_ERRNOS:
+                return False
+            raise
+        if n == 0:
+            return True
+        copied += n
+        job.advance(n)
+
+
+def _buffered_copy(fsrc, fdst, job):
+    buf = bytearray(COPY_BUFFER_SIZE)
+    view = memoryview(buf)
+    while True:
+        job.check_cancelled()
+        n = fsrc.readinto(buf)
+        if not n:
+            return
+        fdst.write(view[:n])
+        job.advance(n)
+
+
+_KERNEL_COPIES = []
+if hasattr(os, 'copy_file_range'):
+    _KERNEL_COPIES.append(lambda infd, outfd, count: os.copy_file_range(infd, outfd, count))
+if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+    # macOS / BSD 的 sendfile 只能写到 socket，只在 Linux 上用于文件之间的复制
+    _KERNEL_COPIES.append(lambda infd, outfd, count: os.sendfile(outfd, infd, None, count))
+
+
+def copy_file(src, dst, job):
+    """复制单个文件（内容 + 权限和时间），失败或取消时删除不完整的目标文件"""
+    try:
+        with open(src, 'rb', buffering=0) as fsrc, open(dst, 'wb', buffering=0) as fdst:
+            for call in _KERNEL_COPIES:
+                if _kernel_copy(call, fsrc.fileno(), fdst.fileno(), job):
+                    break
+            else:
+                _buffered_copy(fsrc, fdst, job)
+        shutil.copystat(src, dst)
+    except BaseException:
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+        raise
+
+
+def _measure(path, job):
+    """统计 path 下的条目数和总字节数（不跟随符号链接），返回 (条目数, 字节数)"""
+    st = os.lstat(path)
+    files, size = 1, 0
+    if stat.S_ISREG(st.st_mode):
+        size = st.st_size
+    elif stat.S_ISDIR(st.st_mode):
+        for dirpath, dirnames, filenames in os.walk(path):
+            job.check_cancelled()
+            files += len(dirnames) + len(filenames)
+            for name in filenames:
+                try:
+                    st = os.lstat(os.path.join(dirpath, name))
+                except OSError:
+                    continue
+                if not stat.S_ISLNK(st.st_mode):
+                    size += st.st_size
+    job.total_files += files
+    job.total_bytes += size
+    return files, size
+
+
+def _copy_entry(src, dst, job):
+    """复制文件或整个目录（目标目录已存在时合并），符号链接按链接本身复制"""
+    job.current = src.name
+    if src.is_symlink():
+        if dst.is_symlink() or dst.exists():
+            dst.unlink()
+        os.symlink(os.readlink(src), dst)
+        job.done_files += 1
+        return
+    if not src.is_dir():
+        copy_file(src, dst, job)
+        job.done_files += 1
+        return
+
+    dst.mkdir(exist_ok=True)
+    job.done_files += 1
+    for dirpath, dirnames, filenames in os.walk(src):
+        target = dst / os.path.relpath(dirpath, src)
+        for name in dirnames:
+            job.check_cancelled()
+            source = Path(dirpath, name)
+            if source.is_symlink():
+                # os.walk 不进入指向目录的符号链接，按链接本身复制
+                _copy_entry(source, target / name, job)
+            else:
+                (target / name).mkdir(exist_ok=True)
+                job.done_files += 1
+        for name in filenames:
+            job.current = name
+            _copy_entry(Path(dirpath, name), target / name, job)
+        shutil.copystat(dirpath, target)
+
+
+def _delete_entry(path, job):
+    job.current = path.name
+    if path.is_dir() and not path.is_symlink():
+        for dirpath, dirnames, filenames in os.walk(path, topdown=False):
+            for name in filenames:
+                job.check_cancelled()
+                os.unlink(os.path.join(dirpath, name))
+                job.done_files += 1
+            for name in dirnames:
+                job.check_cancelled()
+                child = os.path.join(dirpath, name)
+                if os.path.islink(child):
+                    os.unlink(child)
+                else:
+                    os.rmdir(child)
+                job.done_files += 1
+        os.rmdir(path)
+    else:
+        path.unlink()
+    job.done_files += 1
+
+
+def _check_target(src, dest_dir):
+    """目标与源相同或位于源目录内部时报错，否则复制时会截断源文件或无限递归"""
+    dest = (dest_dir / src.name).resolve()
+    source = src.resolve()
+    if dest == source:
+        raise OSError(f"{src.name} 的源位置和目标位置相同")
+    if src.is_dir() and not src.is_symlink() and source in dest.parents:
+        raise OSError(f"不能把文件夹 {src.name} 复制或移动到它自身内部")
+
+
+def run_job(job):
+    """在线程池中执行任务，结果记录在 job.state / job.error 中"""
+    if job.state == 'cancelled':
+        return
+    job.state = 'running'
+    job.started = time.monotonic()
+    try:
+        sizes = []
+        for src in job.sources:
+            sizes.append(_measure(src, job))
+            if job.dest_dir is not None:
+                _check_target(src, job.dest_dir)
+
+        for src, (files, size) in zip(job.sources, sizes):
+            job.check_cancelled()
+            if job.kind == 'delete':
+                _delete_entry(src, job)
+                continue
+            dst = job.dest_dir / src.name
+            if job.kind == 'move':
+                try:
+                    # 同一文件系统内直接改名，不复制数据
+                    os.replace(src, dst)
+                    job.done_files += files
+                    job.advance(size)
+                    continue
+                except OSError as e:
+                    if e.errno not in (errno.EXDEV, errno.ENOTEMPTY, errno.EEXIST, errno.EISDIR):
+                        raise
+            _copy_entry(src, dst, job)
+            if job.kind == 'move':
+                _delete_entry(src, FileJob('delete', [src]))
+        job.state = 'done'
+    except JobCancelled:
+        job.state = 'cancelled'
+    except Exception as e:
+        job.state = 'failed'
+        job.error = str(e)
+    finally:
+        job.current = ''
+        job.finished = time.monotonic()
+
+
+class TransferManager:
+    """文件操作队列：submit() 提交任务，最多 workers 个任务同时执行"""
+
+    def __init__(self, workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='file-job')
+        self.jobs = []
+
+    def submit(self, kind, sources, dest_dir=None):
+        job = FileJob(kind, sources, dest_dir)
+        self.jobs.append(job)
+        job.future = self.executor.submit(run_job, job)
+        return job
+
+    def get(self, job_id):
+        for job in self.jobs:
+            if job.id == job_id:
+                return job
+        return None
+
+    def active_jobs(self):
+        return [job for job in self.jobs if job.active]
+
+    def clear_finished(self):
+        self.jobs = [job for job in self.jobs if job.active]
+
+    def shutdown(self):
+        """关闭窗口时取消所有任务，不等待正在复制的文件"""
+        for job in self.jobs:
+            job.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,207 @@
+"""
+文件类型表：扩展名 -> (类型, 图标, 颜色, Web 图标, MIME)
+
+由 config.FILE_TYPES 一次性生成以扩展名为键的字典，每个文件只需一次字典查找，
+不再逐个类型遍历扩展名列表。没有扩展名的文件（如 README、Makefile、相机导出的无后缀图片）
+在 sniff_enabled 时读取文件开头几百字节，按魔数判断类型；结果按 (设备, inode, mtime_ns)
+缓存，文件不变时不会重复读取。
+
+Web 服务器（目录列表、缩略图）和 GUI（文件列表、属性）共用这个模块，只依赖标准库。
+"""
+
+import mimetypes
+import os
+import stat
+import threading
+from collections import OrderedDict, namedtuple
+
+FileTypeInfo = namedtuple('FileTypeInfo', ['type', 'icon', 'color', 'web_icon', 'mime'])
+
+DEFAULT_MIME = 'application/octet-stream'
+# 未知类型和文件夹的默认显示
+DEFAULT_TYPE = FileTypeInfo('file', '📄', '#000000', 'bi-file-earmark', DEFAULT_MIME)
+DEFAULT_FOLDER = FileTypeInfo('folder', '📁', '#FFC107', 'bi-folder-fill', None)
+
+# 判断类型时读取的文件头长度，以及最多缓存的判断结果数
+SNIFF_BYTES = 512
+SNIFF_CACHE_SIZE = 10000
+
+# (偏移, 魔数, 类型, MIME)，按顺序匹配
+MAGIC_SIGNATURES = (
+    (0, b'\x89PNG\r\n\x1a\n', 'image', 'image/png'),
+    (0, b'\xff\xd8\xff', 'image', 'image/jpeg'),
+    (0, b'GIF87a', 'image', 'image/gif'),
+    (0, b'GIF89a', 'image', 'image/gif'),
+    (0, b'II*\x00', 'image', 'image/tiff'),
+    (0, b'MM\x00*', 'image', 'image/tiff'),
+    (0, b'\x00\x00\x01\x00', 'image', 'image/vnd.microsoft.icon'),
+    (0, b'%PDF-', 'pdf', 'application/pdf'),
+    (0, b'\x1aE\xdf\xa3', 'video', 'video/x-matroska'),
+    (0, b'FLV\x01', 'video', 'video/x-flv'),
+    (0, b'\xff\xfb', 'audio', 'audio/mpeg'),
+    (0, b'\xff\xf3', 'audio', 'audio/mpeg'),
+    (0, b'fLaC', 'audio', 'audio/flac'),
+    (0, b'OggS', 'audio', 'audio/ogg'),
+    (0, b'PK\x03\x04', 'archive', 'application/zip'),
+    (0, b'7z\xbc\xaf\x27\x1c', 'archive', 'application/x-7z-compressed'),
+    (0, b'Rar!\x1a\x07', 'archive', 'application/vnd.rar'),
+    (0, b'\x1f\x8b', 'archive', 'application/gzip'),
+    (0, b'\xfd7zXZ\x00', 'archive', 'application/x-xz'),
+    (257, b'ustar', 'archive', 'application/x-tar'),
+    (0, b'\x7fELF', 'executable', 'application/x-executable'),
+)
+# 开头只有两三个可打印字符的魔数容易与文本文件混淆，另外检查后面的字节
+SHORT_SIGNATURES = (
+    # BMP 文件头的第 6~10 字节是保留的 0
+    (lambda d: d.startswith(b'BM') and d[6:10] == b'\x00' * 4, 'image', 'image/bmp'),
+    # ID3v2 标签的版本号为 2~4
+    (lambda d: d.startswith(b'ID3') and d[3:4] in (b'\x02', b'\x03', b'\x04'), 'audio', 'audio/mpeg'),
+    # bzip2 的块大小为 1~9
+    (lambda d: d.startswith(b'BZh') and d[3:4].isdigit() and d[3:4] != b'0', 'archive', 'application/x-bzip2'),
+    # Windows 可执行文件的 DOS 头中一定有 NUL 字节
+    (lambda d: d.startswith(b'MZ') and b'\x00' in d[:64], 'executable',
+     'application/vnd.microsoft.portable-executable'),
+)
+# RIFF 容器按第 8~12 字节区分
+RIFF_FORMATS = {
+    b'WEBP': ('image', 'image/webp'),
+    b'WAVE': ('audio', 'audio/wav'),
+    b'AVI ': ('video', 'video/x-msvideo'),
+}
+# ISO 媒体文件（MP4 / MOV / M4A）第 4~8 字节为 ftyp，之后是品牌
+AUDIO_BRANDS = (b'M4A ', b'M4B ')
+
+
+def _looks_like_text(data):
+    """没有 NUL 字节且是合法的 UTF-8（允许末尾被截断的多字节字符）"""
+    if b'\x00' in data:
+        return False
+    try:
+        data.decode('utf-8')
+    except UnicodeDecodeError as e:
+        return e.start >= len(data) - 3 and len(data) == SNIFF_BYTES
+    return True
+
+
+def sniff_bytes(data):
+    """根据文件头返回 (类型, MIME)，无法判断时返回 None"""
+    if not data:
+        return None
+    for offset, magic, file_type, mime in MAGIC_SIGNATURES:
+        if data.startswith(magic, offset):
+            return file_type, mime
+    for matches, file_type, mime in SHORT_SIGNATURES:
+        if matches(data):
+            return file_type, mime
+    if data.startswith(b'RIFF') and data[8:12] in RIFF_FORMATS:
+        return RIFF_FORMATS[data[8:12]]
+    if data[4:8] == b'ftyp':
+        if data[8:12] in AUDIO_BRANDS:
+            return 'audio', 'audio/mp4'
+        return 'video', 'video/quicktime' if data[8:12] == b'qt  ' else 'video/mp4'
+    if _looks_like_text(data):
+        return 'text', 'text/plain'
+    return None
+
+
+class FileTypeRegistry:
+    """
+    file_types 的格式同 config.FILE_TYPES：{类型: {'extensions': [...], 'icon', 'color', 'web_icon'}}
+
+    classify() 可以在多个线程中同时调用。
+    """
+
+    def __init__(self, file_types, sniff_enabled=True, cache_size=SNIFF_CACHE_SIZE):
+        self.sniff_enabled = sniff_enabled
+        self.types = {}
+        self.extensions = {}
+        for name, spec in file_types.items():
+            info = FileTypeInfo(
+                name,
+                spec.get('icon', DEFAULT_TYPE.icon),
+                spec.get('color', DEFAULT_TYPE.color),
+                spec.get('web_icon', DEFAULT_TYPE.web_icon),
+                None,
+            )
+            self.types[name] = info
+            for ext in spec.get('extensions', ()):
+                ext = ext.lower()
+                # 同一扩展名出现在多个类型中时，以先出现的为准（与逐个遍历时的结果一致）
+                if ext not in self.extensions:
+                    mime = mimetypes.guess_type(f'x.{ext}')[0] or DEFAULT_MIME
+                    self.extensions[ext] = info._replace(mime=mime)
+        self.types.setdefault('folder', DEFAULT_FOLDER)
+        self.types.setdefault('file', DEFAULT_TYPE)
+        self.folder = self.types['folder']
+        self.default = self.types['file']._replace(mime=DEFAULT_MIME)
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def info(self, type_name):
+        """类型名 -> FileTypeInfo（mime 为 None），未知类型返回默认类型"""
+        return self.types.get(type_name, self.default)
+
+    def extensions_by_type(self):
+        """{类型: [扩展名, ...]}，只包括有扩展名的类型"""
+        result = {}
+        for ext, info in self.extensions.items():
+            result.setdefault(info.type, []).append(ext)
+        return result
+
+    def web_icons(self):
+        """{类型: Bootstrap 图标类名}"""
+        return {name: info.web_icon for name, info in self.types.items()}
+
+    def classify(self, name, directory=None):
+        """
+        按文件名后缀返回 FileTypeInfo；名称中没有扩展名且给出了所在目录时，读取文件头判断
+
+        文件夹请直接使用 self.folder，这里不做 stat。
+        """
+        dot = name.rfind('.')
+        if dot >= 0:
+            return self.extensions.get(name[dot + 1:].lower(), self.default)
+        if directory is None or not self.sniff_enabled:
+            return self.default
+        return self.sniff(os.path.join(directory, name))
+
+    def sniff(self, path):
+        """读取文件头判断类型，结果按 (设备, inode, mtime_ns) 缓存；非普通文件或读取失败时返回默认类型"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return self.default
+        # FIFO、设备文件等打开或读取时可能阻塞
+        if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+            return self.default
+        key = (st.st_dev, st.st_ino, st.st_mtime_ns)
+        with self._lock:
+            info = self._cache.get(key)
+            if info is not None:
+                self._cache.move_to_end(key)
+                return info
+
+        try:
+            with open(path, 'rb') as f:
+                data = f.read(SNIFF_BYTES)
+        except OSError:
+            return self.default
+        found = sniff_bytes(data)
+        if found is None or found[0] not in self.types:
+            info = self.default
+        else:
+            info = self.types[found[0]]._replace(mime=found[1])
+
+        with self._lock:
+            self._cache[key] = info
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return info
+
+    def mime_type(self, name, directory=None):
+        """MIME 类型：表中的扩展名直接返回，其余交给 mimetypes，没有扩展名时按文件头判断"""
+        info = self.classify(name, directory)
+        if info is not self.default:
+            return info.mime
+        return mimetypes.guess_type(name)[0] or DEFAULT_MIME
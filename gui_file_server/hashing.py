@@ -0,0 +1,183 @@
+"""
+文件内容校验值（哈希）服务
+
+一次读取同时计算多种算法的摘要，读缓冲区 HASH_BUFFER_SIZE（默认 1 MB），比 4 KB 小块读
+快得多；hashlib 处理大块数据时释放 GIL，多个文件可以在线程池中并行计算。
+可选算法为 hashlib 的 blake2b / sha256 / md5 等，安装 xxhash（pip install xxhash）后
+还可以用 xxh3_64 / xxh3_128 / xxh64，比 blake2b 再快数倍。
+
+结果保存在 SQLite 缓存中，键为 (路径, 算法)，并记录文件的 大小、mtime_ns、inode；
+三者都没变时直接返回缓存的摘要，文件被改写或替换后自动重新计算。
+
+Web 服务器（/_hash）和 GUI（属性窗口）共用这个模块，只依赖标准库。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import xxhash
+except ImportError:  # 可选依赖
+    xxhash = None
+
+HASH_BUFFER_SIZE = 1024 * 1024
+HASH_WORKERS = 4
+DEFAULT_ALGORITHM = 'blake2b'
+
+HASHLIB_ALGORITHMS = ('blake2b', 'blake2s', 'sha256', 'sha512', 'sha1', 'md5', 'sha3_256')
+XXHASH_ALGORITHMS = ('xxh3_64', 'xxh3_128', 'xxh64', 'xxh32')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT NOT NULL,
+    algorithm TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (path, algorithm)
+);
+"""
+
+
+def available_algorithms():
+    """当前环境支持的算法名，按推荐顺序"""
+    if xxhash is not None:
+        return XXHASH_ALGORITHMS + HASHLIB_ALGORITHMS
+    return HASHLIB_ALGORITHMS
+
+
+def new_hasher(algorithm):
+    if algorithm in XXHASH_ALGORITHMS and xxhash is not None:
+        return getattr(xxhash, algorithm)()
+    if algorithm in HASHLIB_ALGORITHMS:
+        return hashlib.new(algorithm)
+    raise ValueError(f"不支持的校验算法: {algorithm}")
+
+
+def hash_file(path, algorithms=(DEFAULT_ALGORITHM,), buffer_size=HASH_BUFFER_SIZE):
+    """读一遍文件，返回 {算法: 十六进制摘要}"""
+    hashers = {name: new_hasher(name) for name in algorithms}
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            chunk = view[:n]
+            for hasher in hashers.values():
+                hasher.update(chunk)
+    return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+
+def _file_key(st):
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+class HashService:
+    """
+    带持久缓存的哈希服务
+
+    digests() 同步计算（命中缓存时不读文件），submit() / digests_many() 在线程池中执行。
+    同一文件同时被多次请求时只计算一次。
+    """
+
+    def __init__(self, db_path, workers=HASH_WORKERS):
+        self.db_path = os.fspath(db_path)
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hash')
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        """每个线程一个连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def cached(self, path, algorithms, st=None):
+        """缓存中与文件当前 大小/mtime/inode 一致的摘要，{算法: 摘要}（可能只包含部分算法）"""
+        path = os.fspath(path)
+        st = st or os.stat(path)
+        placeholders = ','.join('?' * len(algorithms))
+        rows = self._connect().execute(
+            f'SELECT algorithm, digest FROM hashes WHERE path = ? AND algorithm IN ({placeholders}) '
+            'AND size = ? AND mtime_ns = ? AND inode = ?',
+            (path, *algorithms, *_file_key(st))).fetchall()
+        return dict(rows)
+
+    def digests(self, path, algorithms=(DEFAULT_ALGORITHM,)):
+        """
+        返回 ({算法: 摘要}, 是否全部来自缓存)
+
+        只为缓存中缺少的算法读取文件；计算期间文件被修改（前后 stat 不一致）时不写入缓存。
+        """
+        path = os.fspath(path)
+        for name in algorithms:
+            new_hasher(name)  # 尽早拒绝不支持的算法
+        st = os.stat(path)
+        result = self.cached(path, algorithms, st)
+        missing = tuple(name for name in algorithms if name not in result)
+        if not missing:
+            return result, True
+
+        result.update(self._compute(path, missing, st))
+        return {name: result[name] for name in algorithms}, False
+
+    def _compute(self, path, algorithms, st):
+        key = (path, algorithms, _file_key(st))
+        with self._inflight_lock:
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = self._inflight[key] = threading.Event()
+        if not owner:
+            # 其他线程正在计算同一个文件，等它写入缓存后直接读取
+            event.wait()
+            found = self.cached(path, algorithms, st)
+            if len(found) == len(algorithms):
+                return found
+            return hash_file(path, algorithms)
+
+        try:
+            computed = hash_file(path, algorithms)
+            if _file_key(os.stat(path)) == _file_key(st):
+                conn = self._connect()
+                with conn:
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO hashes (path, algorithm, size, mtime_ns, inode, digest) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        [(path, name, *_file_key(st), digest) for name, digest in computed.items()])
+            return computed
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            event.set()
+
+    def submit(self, path, algorithms=(DEFAULT_ALGORITHM,)):
+        """在线程池中计算，返回 future，结果同 digests()"""
+        return self._pool.submit(self.digests, path, tuple(algorithms))
+
+    def digests_many(self, paths, algorithms=(DEFAULT_ALGORITHM,)):
+        """并行计算多个文件，返回 [(路径, {算法: 摘要} 或异常)]，顺序与 paths 相同"""
+        futures = [(path, self.submit(path, algorithms)) for path in paths]
+        results = []
+        for path, future in futures:
+            try:
+                results.append((path, future.result()[0]))
+            except (OSError, ValueError) as e:
+                results.append((path, e))
+        return results
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
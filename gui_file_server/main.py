@@ -7,15 +7,34 @@ Based on the original Flask web application
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import shutil
 import stat
 import mimetypes
 import humanize
 from datetime import datetime
 from pathlib import Path
-from PIL import Image, ImageTk
 import threading
 import webbrowser
+import hashlib
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (VIRTUAL_ROW_THRESHOLD, DIRECTORY_LOAD_BATCH, TRANSFER_WORKERS,
+                    HASH_CACHE_PATH, PROPERTIES_HASH_ALGORITHMS, SEARCH_INDEX_DIR, SEARCH_MAX_RESULTS,
+                    CACHE_DIR, THUMBNAIL_CACHE_SIZE, THUMBNAIL_SIZE, MAX_IMAGE_PREVIEWS)
+from utils import get_file_types, iter_scan_directory, scan_sort_key
+from search_index import SearchIndex
+from file_operations import TransferManager, STATE_LABELS, KIND_LABELS
+from hashing import HashService
+from thumbnails import ThumbnailCache, ThumbnailLoader
+from virtual_gallery import VirtualGallery
+from virtual_tree import VirtualTreeRows
+
+# 后台加载目录时，界面线程检查队列的间隔，以及每次最多用于插入行的时间
+LOAD_POLL_MS = 30
+LOAD_TICK_SECONDS = 0.03
+# 有未完成的文件操作时，任务面板的刷新间隔
+JOBS_POLL_MS = 300
 
 class FileServerGUI:
     def __init__(self, root):
@@ -25,16 +44,36 @@ class FileServerGUI:
         
         # 当前路径
         self.current_path = Path.home()  # 默认从用户主目录开始
-        
-        # 文件类型定义
-        self.DATATYPES = {
-            'image': ['gif', 'ico', 'jpeg', 'jpg', 'png', 'svg', 'webp', 'bmp'],
-            'video': ['mp4', 'm4v', 'ogv', 'webm', 'mov', 'avi', 'mkv'],
-            'audio': ['mp3', 'wav', 'ogg', 'm4a', 'flac'],
-            'archive': ['7z', 'zip', 'rar', 'gz', 'tar', 'bz2'],
-            'text': ['txt', 'md', 'py', 'js', 'css', 'html', 'json', 'yaml', 'c', 'cpp', 'java'],
-            'pdf': ['pdf'],
-        }
+
+        # 文件名搜索：每个搜索根目录一个索引，后台线程刷新/查询，结果经队列交回界面线程
+        self.search_index = None
+        self.search_queue = queue.Queue()
+        self.search_generation = 0
+        self.search_refresh_lock = threading.Lock()
+
+        # 目录加载：后台线程扫描，分批经队列交回界面线程；每次刷新递增 load_generation，旧的加载随之作废
+        self.load_queue = queue.Queue()
+        self.load_generation = 0
+        self.loaded_rows = []
+
+        # 图片预览的缩略图：进程池生成，缓存在 CACHE_DIR
+        self.thumbnail_loader = ThumbnailLoader(
+            self.root, ThumbnailCache(CACHE_DIR, THUMBNAIL_CACHE_SIZE), THUMBNAIL_SIZE)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # 复制/移动/删除在线程池中执行，任务面板定时显示进度
+        self.transfers = TransferManager(TRANSFER_WORKERS)
+        self.jobs_polling = False
+        # 已经处理过结束事件（状态栏提示、刷新列表）的任务 id
+        self.finished_jobs = set()
+
+        # 属性窗口中的校验值：后台线程计算，结果按 (路径, 大小, mtime, inode) 缓存
+        self.hash_service = HashService(HASH_CACHE_PATH)
+        # 属性窗口中的类型识别（没有后缀时读文件头），同样不在界面线程中读文件
+        self.properties_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='properties')
+
+        # 文件类型表（扩展名 -> 类型、图标），与 Web 服务器共用 config.FILE_TYPES
+        self.file_types = get_file_types()
         
         # 创建界面
         self.create_widgets()
@@ -70,6 +109,14 @@ class FileServerGUI:
         # 右侧按钮
         ttk.Button(button_frame, text="📤 上传文件", command=self.upload_files).pack(side=tk.RIGHT, padx=(5, 0))
         ttk.Button(button_frame, text="📂 新建文件夹", command=self.create_folder).pack(side=tk.RIGHT, padx=(5, 0))
+
+        # 搜索框：在当前目录及子目录中按文件名搜索，支持 *.mp4 这样的通配符，Esc 返回目录列表
+        ttk.Button(button_frame, text="🔍 搜索", command=self.search_files).pack(side=tk.RIGHT, padx=(5, 0))
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(button_frame, textvariable=self.search_var, width=30)
+        search_entry.pack(side=tk.RIGHT, padx=(5, 0))
+        search_entry.bind('<Return>', lambda e: self.search_files())
+        search_entry.bind('<Escape>', lambda e: self.clear_search())
         
         # 创建笔记本控件用于分页显示
         self.notebook = ttk.Notebook(main_frame)
@@ -80,6 +127,9 @@ class FileServerGUI:
         
         # 图片预览页面
         self.create_image_preview_tab()
+
+        # 文件操作任务页面
+        self.create_jobs_tab()
         
         # 状态栏
         self.status_var = tk.StringVar()
@@ -119,6 +169,9 @@ class FileServerGUI:
         
         list_frame.grid_rowconfigure(0, weight=1)
         list_frame.grid_columnconfigure(0, weight=1)
+
+        # 大目录时只创建可见行
+        self.virtual_rows = VirtualTreeRows(self.tree, scrollbar_y)
         
         # 绑定双击事件
         self.tree.bind('<Double-1>', self.on_item_double_click)
@@ -130,30 +183,44 @@ class FileServerGUI:
         # 图片预览框架
         preview_frame = ttk.Frame(self.notebook)
         self.notebook.add(preview_frame, text="🖼️ 图片预览")
-        
-        # 创建滚动画布
-        canvas = tk.Canvas(preview_frame)
-        scrollbar_v = ttk.Scrollbar(preview_frame, orient="vertical", command=canvas.yview)
-        scrollbar_h = ttk.Scrollbar(preview_frame, orient="horizontal", command=canvas.xview)
-        self.scrollable_frame = ttk.Frame(canvas)
-        
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar_v.set, xscrollcommand=scrollbar_h.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar_v.pack(side="right", fill="y")
-        scrollbar_h.pack(side="bottom", fill="x")
-        
-        self.image_canvas = canvas
+
+        # 虚拟画廊：只绘制可见的缩略图，图片再多也不会创建大量控件
+        self.gallery = VirtualGallery(preview_frame, self.thumbnail_loader, THUMBNAIL_SIZE,
+                                      on_open=self.open_file, max_decoded=MAX_IMAGE_PREVIEWS)
+
+    def create_jobs_tab(self):
+        # 文件操作任务框架
+        jobs_frame = ttk.Frame(self.notebook)
+        self.notebook.add(jobs_frame, text="📥 任务")
+
+        columns = ('操作', '对象', '进度', '速度', '状态')
+        self.jobs_tree = ttk.Treeview(jobs_frame, columns=columns, show='headings')
+        for col in columns:
+            self.jobs_tree.heading(col, text=col)
+        self.jobs_tree.column('操作', width=60)
+        self.jobs_tree.column('对象', width=450)
+        self.jobs_tree.column('进度', width=200)
+        self.jobs_tree.column('速度', width=100)
+        self.jobs_tree.column('状态', width=250)
+
+        scrollbar = ttk.Scrollbar(jobs_frame, orient=tk.VERTICAL, command=self.jobs_tree.yview)
+        self.jobs_tree.configure(yscrollcommand=scrollbar.set)
+
+        button_frame = ttk.Frame(jobs_frame)
+        ttk.Button(button_frame, text="⏹ 取消所选任务", command=self.cancel_selected_jobs).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="🧹 清除已结束", command=self.clear_finished_jobs).pack(side=tk.LEFT)
+
+        button_frame.grid(row=0, column=0, columnspan=2, sticky='w', pady=(5, 5))
+        self.jobs_tree.grid(row=1, column=0, sticky='nsew')
+        scrollbar.grid(row=1, column=1, sticky='ns')
+        jobs_frame.grid_rowconfigure(1, weight=1)
+        jobs_frame.grid_columnconfigure(0, weight=1)
         
     def create_context_menu(self):
         self.context_menu = tk.Menu(self.root, tearoff=0)
         self.context_menu.add_command(label="打开", command=self.open_selected)
+        self.context_menu.add_command(label="复制到...", command=lambda: self.transfer_selected('copy'))
+        self.context_menu.add_command(label="移动到...", command=lambda: self.transfer_selected('move'))
         self.context_menu.add_command(label="删除", command=self.delete_selected)
         self.context_menu.add_command(label="重命名", command=self.rename_selected)
         self.context_menu.add_separator()
@@ -166,147 +233,244 @@ class FileServerGUI:
         if item:
             self.context_menu.post(event.x_root, event.y_root)
             
-    def get_file_type_and_icon(self, filename):
-        """根据文件名后缀返回文件类型"""
-        ext = filename.split('.')[-1].lower() if '.' in filename else ''
-        for file_type, extensions in self.DATATYPES.items():
-            if ext in extensions:
-                return file_type
-        return 'file'
+    def get_file_type_and_icon(self, filename, directory=None):
+        """根据文件名后缀返回文件类型；没有后缀且给出所在目录时按文件头判断（会读文件，不要在界面线程中传 directory）"""
+        return self.file_types.classify(filename, directory).type
         
     def get_file_icon(self, file_type, is_dir=False):
         """返回文件类型对应的图标字符"""
-        if is_dir:
-            return "📁"
-        
-        icons = {
-            'image': '🖼️',
-            'video': '🎬',
-            'audio': '🎵',
-            'archive': '📦',
-            'text': '📄',
-            'pdf': '📕',
-            'file': '📄'
-        }
-        return icons.get(file_type, '📄')
+        return self.file_types.info('folder' if is_dir else file_type).icon
         
     def refresh_view(self):
-        """刷新当前目录视图"""
+        """刷新当前目录视图：目录在后台线程中扫描，条目分批交回界面线程插入，窗口不会卡住"""
+        # 丢弃尚未显示的搜索结果和上一次尚未完成的目录加载
+        self.search_generation += 1
+        self.load_generation += 1
+        generation = self.load_generation
+
+        # 更新路径显示
+        self.path_var.set(str(self.current_path))
+
+        # 清空树形视图和图片预览
+        self.virtual_rows.deactivate()
+        self.tree.delete(*self.tree.get_children())
+        self.load_image_previews([])
+        self.loaded_rows = []
+        self.status_var.set("正在加载...")
+
+        threading.Thread(target=self.load_directory, args=(self.current_path, generation),
+                         daemon=True).start()
+        self.root.after(LOAD_POLL_MS, self.poll_directory_load, generation)
+
+    def format_row(self, item, directory=None):
+        """ScanEntry -> (图标, 列值)，以及文件类型；directory 为条目所在目录，用于判断无扩展名文件的类型"""
+        mtime = datetime.fromtimestamp(item.mtime).strftime('%Y-%m-%d %H:%M:%S')
+        if item.is_dir:
+            return (self.get_file_icon('folder', True), (item.name, '文件夹', '', mtime)), 'folder'
+        file_type = self.get_file_type_and_icon(item.name, directory)
+        size_str = humanize.naturalsize(item.size)
+        return (self.get_file_icon(file_type), (item.name, file_type, size_str, mtime)), file_type
+
+    def load_directory(self, path, generation):
+        """
+        在后台线程中执行：扫描目录，每 DIRECTORY_LOAD_BATCH 个条目把格式化好的行放进队列，
+        扫描完成后再放入排好序的完整结果。切换目录后（generation 过期）在下一批处停止。
+        """
+        entries = []
+        batches = iter_scan_directory(path, batch_size=DIRECTORY_LOAD_BATCH)
         try:
-            # 更新路径显示
-            self.path_var.set(str(self.current_path))
-            
-            # 清空树形视图
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-                
-            # 清空图片预览
-            for widget in self.scrollable_frame.winfo_children():
-                widget.destroy()
-                
-            if not self.current_path.exists():
-                self.status_var.set("路径不存在")
+            # 遍历目录内容（iter_scan_directory 已跳过隐藏文件和无法 stat 的条目）
+            for batch in batches:
+                if generation != self.load_generation:
+                    return
+                formatted = [(item, *self.format_row(item, path)) for item in batch]
+                entries.extend(formatted)
+                self.load_queue.put((generation, 'batch', [row for _, row, _ in formatted]))
+
+            entries.sort(key=lambda e: scan_sort_key(e[0]))
+            rows = [row for _, row, _ in entries]
+            images = [path / item.name for item, _, file_type in entries if file_type == 'image']
+            dir_count = sum(1 for item, _, _ in entries if item.is_dir)
+            file_sizes = [item.size for item, _, _ in entries if not item.is_dir]
+            status = (f"{dir_count} 个文件夹, {len(file_sizes)} 个文件, "
+                      f"总大小 {humanize.naturalsize(sum(file_sizes))}")
+            self.load_queue.put((generation, 'done', (rows, images, status)))
+        except Exception as e:
+            self.load_queue.put((generation, 'error', e))
+        finally:
+            batches.close()
+
+    def poll_directory_load(self, generation):
+        """在界面线程中取出已扫描的条目追加到列表，每次最多占用 LOAD_TICK_SECONDS，直到加载完成或被取消"""
+        if generation != self.load_generation:
+            return
+        deadline = time.perf_counter() + LOAD_TICK_SECONDS
+        while time.perf_counter() < deadline:
+            try:
+                result_generation, kind, payload = self.load_queue.get_nowait()
+            except queue.Empty:
+                break
+            if result_generation != generation:
+                continue
+            if kind == 'batch':
+                self.append_rows(payload)
+            elif kind == 'done':
+                self.finish_directory_load(*payload)
                 return
-                
-            items = []
-            images = []
-            total_size = 0
-            file_count = 0
-            dir_count = 0
-            
-            # 遍历目录内容
-            for item in sorted(self.current_path.iterdir(), 
-                             key=lambda x: (not x.is_dir(), x.name.lower())):
-                if item.name.startswith('.'):
-                    continue
-                    
-                try:
-                    stat_info = item.stat()
-                    mtime = datetime.fromtimestamp(stat_info.st_mtime)
-                    
-                    if item.is_dir():
-                        # 目录
-                        icon = self.get_file_icon('folder', True)
-                        self.tree.insert('', 'end', text=icon, values=(
-                            item.name, '文件夹', '', mtime.strftime('%Y-%m-%d %H:%M:%S')
-                        ))
-                        dir_count += 1
-                    else:
-                        # 文件
-                        file_type = self.get_file_type_and_icon(item.name)
-                        icon = self.get_file_icon(file_type)
-                        size_str = humanize.naturalsize(stat_info.st_size)
-                        
-                        self.tree.insert('', 'end', text=icon, values=(
-                            item.name, file_type, size_str, mtime.strftime('%Y-%m-%d %H:%M:%S')
-                        ))
-                        
-                        file_count += 1
-                        total_size += stat_info.st_size
-                        
-                        # 如果是图片，添加到图片预览
-                        if file_type == 'image':
-                            images.append(item)
-                            
-                except (OSError, PermissionError):
-                    continue
-                    
-            # 更新状态栏
-            self.status_var.set(f"{dir_count} 个文件夹, {file_count} 个文件, "
-                              f"总大小 {humanize.naturalsize(total_size)}")
-            
-            # 加载图片预览
-            self.load_image_previews(images)
-            
-        except PermissionError:
+            else:
+                self.show_load_error(payload)
+                return
+
+        self.status_var.set(f"正在加载... 已读取 {len(self.loaded_rows)} 个条目")
+        self.root.after(LOAD_POLL_MS, self.poll_directory_load, generation)
+
+    def append_rows(self, rows):
+        """加载过程中追加一批行（按读取顺序），条目超过阈值时切换为虚拟行模式"""
+        self.loaded_rows.extend(rows)
+        if self.virtual_rows.active:
+            self.virtual_rows.extend(rows)
+        elif len(self.loaded_rows) > VIRTUAL_ROW_THRESHOLD:
+            self.tree.delete(*self.tree.get_children())
+            self.virtual_rows.activate(list(self.loaded_rows))
+        else:
+            for icon, values in rows:
+                self.tree.insert('', 'end', text=icon, values=values)
+
+    def finish_directory_load(self, rows, images, status):
+        """用排好序的完整结果替换加载过程中按读取顺序显示的行"""
+        # 条目过多时使用虚拟行模式，否则一次性插入
+        if len(rows) > VIRTUAL_ROW_THRESHOLD:
+            self.virtual_rows.activate(rows)
+        else:
+            self.virtual_rows.deactivate()
+            self.tree.delete(*self.tree.get_children())
+            for icon, values in rows:
+                self.tree.insert('', 'end', text=icon, values=values)
+        self.loaded_rows = []
+
+        # 更新状态栏
+        self.status_var.set(status)
+
+        # 加载图片预览
+        self.load_image_previews(images)
+
+    def show_load_error(self, error):
+        self.loaded_rows = []
+        if isinstance(error, (FileNotFoundError, NotADirectoryError)):
+            self.status_var.set("路径不存在")
+        elif isinstance(error, PermissionError):
+            self.status_var.set("没有权限访问此目录")
             messagebox.showerror("错误", "没有权限访问此目录")
-        except Exception as e:
-            messagebox.showerror("错误", f"刷新目录时出错: {str(e)}")
-            
+        else:
+            self.status_var.set("加载失败")
+            messagebox.showerror("错误", f"刷新目录时出错: {str(error)}")
+
+    def get_search_index(self):
+        """当前目录对应的搜索索引，切换目录后重新打开"""
+        root = str(self.current_path)
+        if self.search_index is None or self.search_index.root != root:
+            digest = hashlib.md5(root.encode('utf-8', 'surrogateescape')).hexdigest()
+            self.search_index = SearchIndex(root, SEARCH_INDEX_DIR / f"{digest}.db")
+        return self.search_index
+
+    def search_files(self):
+        """在当前目录下搜索文件名；已有索引时先显示旧索引的结果，增量刷新后再更新一次"""
+        query = self.search_var.get().strip()
+        if not query:
+            self.refresh_view()
+            return
+
+        self.search_generation += 1
+        self.load_generation += 1  # 搜索结果会替换文件列表，停止正在进行的目录加载
+        generation = self.search_generation
+        index = self.get_search_index()
+        self.status_var.set(f"正在搜索 “{query}” ...")
+
+        def run():
+            try:
+                if index.refreshed_at() is not None:
+                    start = time.perf_counter()
+                    self.search_queue.put((generation, query, index.search(query, SEARCH_MAX_RESULTS),
+                                           time.perf_counter() - start, True))
+                # 同一时间只做一次刷新，其余搜索直接使用现有索引
+                if self.search_refresh_lock.acquire(blocking=False):
+                    try:
+                        index.refresh()
+                    finally:
+                        self.search_refresh_lock.release()
+                start = time.perf_counter()
+                self.search_queue.put((generation, query, index.search(query, SEARCH_MAX_RESULTS),
+                                       time.perf_counter() - start, False))
+            except Exception as e:
+                self.search_queue.put((generation, query, e, 0, False))
+
+        threading.Thread(target=run, daemon=True).start()
+        self.root.after(50, self.poll_search_results, generation)
+
+    def poll_search_results(self, generation):
+        """在界面线程中取出搜索结果并显示，直到本次搜索的最终结果到达或被新的操作取代"""
+        finished = generation != self.search_generation
+        while True:
+            try:
+                result_generation, query, results, seconds, partial = self.search_queue.get_nowait()
+            except queue.Empty:
+                break
+            if result_generation != self.search_generation:
+                continue
+            if isinstance(results, Exception):
+                self.status_var.set(f"搜索失败: {results}")
+                finished = True
+                continue
+            self.show_search_results(query, results, seconds, partial)
+            finished = finished or not partial
+        if not finished:
+            self.root.after(50, self.poll_search_results, generation)
+
+    def show_search_results(self, query, results, seconds, partial):
+        """在文件列表中显示搜索结果，名称列是相对当前目录的路径，双击等操作照常使用"""
+        self.virtual_rows.deactivate()
+        self.tree.delete(*self.tree.get_children())
+        rows = []
+        for result in results:
+            mtime = datetime.fromtimestamp(result.mtime).strftime('%Y-%m-%d %H:%M:%S')
+            if result.is_dir:
+                rows.append((self.get_file_icon('folder', True), (result.path, '文件夹', '', mtime)))
+            else:
+                file_type = self.get_file_type_and_icon(result.name)
+                rows.append((self.get_file_icon(file_type),
+                             (result.path, file_type, humanize.naturalsize(result.size), mtime)))
+
+        if len(rows) > VIRTUAL_ROW_THRESHOLD:
+            self.virtual_rows.activate(rows)
+        else:
+            for icon, values in rows:
+                self.tree.insert('', 'end', text=icon, values=values)
+
+        more = '+' if len(results) >= SEARCH_MAX_RESULTS else ''
+        status = f"搜索 “{query}”: {len(results)}{more} 个结果，用时 {seconds * 1000:.1f} ms"
+        if partial:
+            status += "（正在更新索引...）"
+        self.status_var.set(status)
+
+    def clear_search(self):
+        self.search_var.set('')
+        self.refresh_view()
+
     def load_image_previews(self, image_files):
-        """加载图片预览"""
-        def load_images():
-            row = 0
-            col = 0
-            max_cols = 4
-            
-            for img_path in image_files[:20]:  # 限制显示前20张图片
-                try:
-                    # 创建缩略图
-                    with Image.open(img_path) as img:
-                        img.thumbnail((150, 150), Image.Resampling.LANCZOS)
-                        photo = ImageTk.PhotoImage(img)
-                        
-                        # 创建图片框架
-                        img_frame = ttk.Frame(self.scrollable_frame)
-                        img_frame.grid(row=row, column=col, padx=5, pady=5)
-                        
-                        # 图片标签
-                        img_label = ttk.Label(img_frame, image=photo)
-                        img_label.image = photo  # 保持引用
-                        img_label.pack()
-                        
-                        # 文件名标签
-                        name_label = ttk.Label(img_frame, text=img_path.name, 
-                                             wraplength=150, justify=tk.CENTER)
-                        name_label.pack()
-                        
-                        # 绑定点击事件
-                        img_label.bind("<Button-1>", 
-                                     lambda e, path=img_path: self.open_file(path))
-                        
-                        col += 1
-                        if col >= max_cols:
-                            col = 0
-                            row += 1
-                            
-                except Exception as e:
-                    print(f"加载图片 {img_path} 失败: {e}")
-                    continue
-                    
-        # 在后台线程中加载图片
-        threading.Thread(target=load_images, daemon=True).start()
-        
+        """加载图片预览：画廊只为可见的格子请求缩略图，滚动时再加载其余的"""
+        self.gallery.set_images(image_files)
+
+    def on_close(self):
+        """关闭窗口时丢弃未完成的缩略图任务，不等待进程池；有未完成的文件操作时先确认"""
+        active = self.transfers.active_jobs()
+        if active and not messagebox.askyesno("确认退出", f"还有 {len(active)} 个文件操作未完成，退出将取消它们。确定退出吗？"):
+            return
+        self.transfers.shutdown()
+        self.hash_service.shutdown()
+        self.properties_executor.shutdown(wait=False, cancel_futures=True)
+        self.thumbnail_loader.shutdown()
+        self.root.destroy()
+
     def on_item_double_click(self, event):
         """处理双击事件"""
         selection = self.tree.selection()
@@ -353,33 +517,110 @@ class FileServerGUI:
             self.refresh_view()
             
     def upload_files(self):
-        """上传文件"""
+        """上传文件：加入后台任务队列复制到当前目录"""
         files = filedialog.askopenfilenames(
             title="选择要上传的文件",
             initialdir=self.current_path
         )
         
         if files:
-            success_count = 0
-            for file_path in files:
-                try:
-                    src = Path(file_path)
-                    dst = self.current_path / src.name
-                    
-                    if dst.exists():
-                        if not messagebox.askyesno("文件已存在", 
-                                                 f"文件 {src.name} 已存在，是否覆盖？"):
-                            continue
-                            
-                    shutil.copy2(src, dst)
-                    success_count += 1
-                    
-                except Exception as e:
-                    messagebox.showerror("错误", f"复制文件 {src.name} 失败: {str(e)}")
-                    
-            if success_count > 0:
-                messagebox.showinfo("成功", f"成功复制 {success_count} 个文件")
-                self.refresh_view()
+            sources = self.confirm_overwrite([Path(f) for f in files], self.current_path)
+            if sources:
+                self.submit_job('copy', sources, self.current_path)
+
+    def selected_paths(self):
+        """文件列表中所有选中条目的路径（支持 Ctrl/Shift 多选）；虚拟模式下包括滚动到可见范围之外的行"""
+        if self.virtual_rows.active:
+            return [self.current_path / name for name in self.virtual_rows.selected_keys()]
+        return [self.current_path / self.tree.item(item, 'values')[0]
+                for item in self.tree.selection() if self.tree.item(item, 'values')]
+
+    def confirm_overwrite(self, sources, dest_dir):
+        """目标位置已有同名条目时逐个确认，返回确认后要处理的源路径"""
+        confirmed = []
+        for src in sources:
+            if (dest_dir / src.name).exists() and not messagebox.askyesno(
+                    "文件已存在", f"文件 {src.name} 已存在，是否覆盖？"):
+                continue
+            confirmed.append(src)
+        return confirmed
+
+    def transfer_selected(self, kind):
+        """把选中的条目复制或移动到另一个目录"""
+        sources = self.selected_paths()
+        if not sources:
+            return
+        directory = filedialog.askdirectory(title=f"{KIND_LABELS[kind]}到", initialdir=self.current_path)
+        if not directory:
+            return
+        sources = self.confirm_overwrite(sources, Path(directory))
+        if sources:
+            self.submit_job(kind, sources, Path(directory))
+
+    def submit_job(self, kind, sources, dest_dir=None):
+        job = self.transfers.submit(kind, sources, dest_dir)
+        self.jobs_tree.insert('', 'end', iid=str(job.id), values=self.job_row(job))
+        self.status_var.set(f"已加入任务队列: {KIND_LABELS[kind]} {job.description()}")
+        if not self.jobs_polling:
+            self.jobs_polling = True
+            self.root.after(JOBS_POLL_MS, self.poll_jobs)
+        return job
+
+    def job_row(self, job):
+        percent = job.progress() * 100
+        bar = '█' * int(percent // 10) + '░' * (10 - int(percent // 10))
+        if job.kind == 'delete':
+            progress = f"{bar} {job.done_files}/{job.total_files}"
+        else:
+            progress = f"{bar} {percent:.0f}%"
+        speed = f"{humanize.naturalsize(job.throughput())}/s" if job.kind != 'delete' and job.started else ''
+        state = STATE_LABELS[job.state]
+        if job.state == 'running' and job.current:
+            state = f"{state}: {job.current}"
+        elif job.state == 'failed':
+            state = f"{state}: {job.error}"
+        return (KIND_LABELS[job.kind], job.description(), progress, speed, state)
+
+    def poll_jobs(self):
+        """刷新任务面板；任务结束时如果涉及当前目录就刷新文件列表"""
+        refresh = False
+        for job in self.transfers.jobs:
+            iid = str(job.id)
+            if not self.jobs_tree.exists(iid):
+                continue
+            self.jobs_tree.item(iid, values=self.job_row(job))
+            if job.active or job.id in self.finished_jobs:
+                continue
+            # 本次轮询中刚结束的任务
+            self.finished_jobs.add(job.id)
+            affected = {src.parent for src in job.sources}
+            if job.dest_dir is not None:
+                affected.add(job.dest_dir)
+            refresh = refresh or self.current_path in affected
+            if job.state == 'failed':
+                self.status_var.set(f"{KIND_LABELS[job.kind]}失败: {job.error}")
+            elif job.state == 'done':
+                self.status_var.set(f"{KIND_LABELS[job.kind]}完成: {job.description()}，"
+                                    f"{humanize.naturalsize(job.done_bytes)}")
+
+        if refresh and not self.search_var.get().strip():
+            self.refresh_view()
+        if self.transfers.active_jobs():
+            self.root.after(JOBS_POLL_MS, self.poll_jobs)
+        else:
+            self.jobs_polling = False
+
+    def cancel_selected_jobs(self):
+        for iid in self.jobs_tree.selection():
+            job = self.transfers.get(int(iid))
+            if job is not None and job.active:
+                job.cancel()
+
+    def clear_finished_jobs(self):
+        self.transfers.clear_finished()
+        self.finished_jobs.intersection_update(job.id for job in self.transfers.jobs)
+        active = {str(job.id) for job in self.transfers.jobs}
+        self.jobs_tree.delete(*[iid for iid in self.jobs_tree.get_children() if iid not in active])
                 
     def create_folder(self):
         """新建文件夹"""
@@ -410,25 +651,17 @@ class FileServerGUI:
                 self.open_file(file_path)
                 
     def delete_selected(self):
-        """删除选中的文件/文件夹"""
-        selection = self.tree.selection()
-        if not selection:
+        """删除选中的文件/文件夹（可多选），在后台任务中执行"""
+        paths = self.selected_paths()
+        if not paths:
             return
-            
-        item = selection[0]
-        filename = self.tree.item(item, 'values')[0]
-        file_path = self.current_path / filename
-        
-        if messagebox.askyesno("确认删除", f"确定要删除 '{filename}' 吗？"):
-            try:
-                if file_path.is_dir():
-                    shutil.rmtree(file_path)
-                else:
-                    file_path.unlink()
-                messagebox.showinfo("成功", f"'{filename}' 已删除")
-                self.refresh_view()
-            except Exception as e:
-                messagebox.showerror("错误", f"删除失败: {str(e)}")
+
+        if len(paths) == 1:
+            question = f"确定要删除 '{paths[0].name}' 吗？"
+        else:
+            question = f"确定要删除选中的 {len(paths)} 项吗？"
+        if messagebox.askyesno("确认删除", question):
+            self.submit_job('delete', paths)
                 
     def rename_selected(self):
         """重命名选中的文件/文件夹"""
@@ -437,13 +670,14 @@ class FileServerGUI:
             return
             
         item = selection[0]
-        old_name = self.tree.item(item, 'values')[0]
+        # 搜索结果中名称列是相对路径，只重命名最后一级
+        old_path = self.current_path / self.tree.item(item, 'values')[0]
+        old_name = old_path.name
         new_name = tk.simpledialog.askstring("重命名", "请输入新名称:", initialvalue=old_name)
         
         if new_name and new_name != old_name:
             try:
-                old_path = self.current_path / old_name
-                new_path = self.current_path / new_name
+                new_path = old_path.with_name(new_name)
                 old_path.rename(new_path)
                 messagebox.showinfo("成功", f"已重命名为 '{new_name}'")
                 self.refresh_view()
@@ -466,28 +700,88 @@ class FileServerGUI:
             # 创建属性窗口
             prop_window = tk.Toplevel(self.root)
             prop_window.title(f"属性 - {filename}")
-            prop_window.geometry("400x300")
+            prop_window.geometry("560x360")
             
             # 属性信息
             info_text = tk.Text(prop_window, wrap=tk.WORD, padx=10, pady=10)
             info_text.pack(fill=tk.BOTH, expand=True)
             
-            info = f"""文件名: {filename}
-路径: {file_path}
-类型: {'文件夹' if file_path.is_dir() else '文件'}
-大小: {humanize.naturalsize(stat_info.st_size)}
+            if stat.S_ISDIR(stat_info.st_mode):
+                type_text = '文件夹'
+                type_future = None
+            else:
+                # 没有后缀的文件要读文件头才能识别类型，和校验值一样在后台线程中进行
+                type_text = '识别中...'
+                type_future = self.properties_executor.submit(self.describe_file_type, file_path)
+
+            header = f"文件名: {filename}\n路径: {file_path}\n"
+            body = f"""大小: {humanize.naturalsize(stat_info.st_size)}
 创建时间: {datetime.fromtimestamp(stat_info.st_ctime).strftime('%Y-%m-%d %H:%M:%S')}
 修改时间: {datetime.fromtimestamp(stat_info.st_mtime).strftime('%Y-%m-%d %H:%M:%S')}
 访问时间: {datetime.fromtimestamp(stat_info.st_atime).strftime('%Y-%m-%d %H:%M:%S')}
 权限: {stat.filemode(stat_info.st_mode)}
 """
-            
-            info_text.insert(tk.END, info)
-            info_text.config(state=tk.DISABLED)
+            details = {'type': type_text, 'hashes': None}
+
+            # 文件的校验值在后台计算，大文件也不会卡住界面
+            hash_future = None
+            if stat.S_ISREG(stat_info.st_mode):
+                details['hashes'] = "\n校验值: 计算中...\n"
+                hash_future = self.hash_service.submit(file_path, PROPERTIES_HASH_ALGORITHMS)
+
+            self.set_properties_text(info_text, self.format_properties(header, body, details))
+            if type_future is not None or hash_future is not None:
+                self.root.after(100, self.poll_properties, info_text, header, body, details,
+                                type_future, hash_future, time.perf_counter())
             
         except Exception as e:
             messagebox.showerror("错误", f"获取属性失败: {str(e)}")
 
+    def describe_file_type(self, file_path):
+        """在后台线程中执行：类型与 MIME 类型（可能读取文件头）"""
+        file_type = self.get_file_type_and_icon(file_path.name, file_path.parent)
+        mime = self.file_types.mime_type(file_path.name, file_path.parent)
+        return f"{file_type} ({mime})"
+
+    def format_properties(self, header, body, details):
+        return header + f"类型: {details['type']}\n" + body + (details['hashes'] or '')
+
+    def set_properties_text(self, info_text, text):
+        info_text.config(state=tk.NORMAL)
+        info_text.delete('1.0', tk.END)
+        info_text.insert(tk.END, text)
+        info_text.config(state=tk.DISABLED)
+
+    def poll_properties(self, info_text, header, body, details, type_future, hash_future, started):
+        """等待类型识别和校验值计算完成后显示在属性窗口中；窗口已关闭时不再更新"""
+        if not info_text.winfo_exists():
+            for future in (type_future, hash_future):
+                if future is not None:
+                    future.cancel()
+            return
+
+        if type_future is not None and type_future.done():
+            try:
+                details['type'] = type_future.result()
+            except Exception as e:
+                details['type'] = f"识别失败 ({e})"
+            type_future = None
+
+        if hash_future is not None and hash_future.done():
+            try:
+                digests, cached = hash_future.result()
+            except Exception as e:
+                details['hashes'] = f"\n校验值: 计算失败 ({e})\n"
+            else:
+                source = "缓存" if cached else f"用时 {time.perf_counter() - started:.1f} 秒"
+                lines = ''.join(f"{name}: {digest}\n" for name, digest in digests.items())
+                details['hashes'] = f"\n校验值（{source}）:\n{lines}"
+            hash_future = None
+
+        self.set_properties_text(info_text, self.format_properties(header, body, details))
+        if type_future is not None or hash_future is not None:
+            self.root.after(100, self.poll_properties, info_text, header, body, details,
+                            type_future, hash_future, started)
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,189 @@
+"""
+GUI 图片预览的缩略图：进程池生成 + 磁盘 LRU 缓存
+
+Pillow 解码大图是 CPU 密集的，放在线程里会受 GIL 限制，这里用进程池并行生成。
+缩略图以 utils.create_thumbnail_cache_key 为文件名保存在 config.CACHE_DIR 中，
+下次打开同一目录直接读取缓存。Tk 控件只能在主线程操作，完成的结果放进队列，
+由主线程用 after() 定时取出并交给调用方（由调用方创建或复用 PhotoImage）。
+"""
+
+import os
+import queue
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, CancelledError
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from utils import create_thumbnail_cache_key
+
+THUMBNAIL_SUFFIX = '.jpg'
+JPEG_QUALITY = 85
+# 每次 after() 回调最多交付的缩略图数，避免一次处理太多卡住界面
+MAX_RESULTS_PER_TICK = 24
+POLL_INTERVAL_MS = 30
+
+
+def make_thumbnail(src, dest, size):
+    """
+    在工作进程中执行：生成 src 的缩略图并保存到 dest（JPEG），dest 已存在时直接返回
+
+    先写临时文件再改名，其他进程不会读到写了一半的文件。
+    """
+    if os.path.exists(dest):
+        return dest
+    with Image.open(src) as img:
+        # JPEG 可以在解码时直接缩小到接近目标尺寸，大照片快很多
+        img.draft('RGB', size)
+        # 手机照片常以 EXIF 方向标记旋转，按标记转正后再缩小（与 Web 画廊一致）
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail(size, Image.Resampling.LANCZOS)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGBA')
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel('A'))
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        try:
+            img.save(tmp, 'JPEG', quality=JPEG_QUALITY)
+        except BaseException:
+            # 编码失败或磁盘写满时不要在缓存目录里留下半截的临时文件
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+    os.replace(tmp, dest)
+    return dest
+
+
+class ThumbnailCache:
+    """
+    缓存目录中缩略图文件的 LRU 索引
+
+    启动时按文件 mtime 建立一次顺序，之后每次命中把条目移到末尾并更新文件 mtime
+    （重启后仍保持最近使用的顺序）；新增条目后超出 max_entries 时删除最久未用的文件。
+    """
+
+    def __init__(self, cache_dir, max_entries):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._entries = OrderedDict()
+        existing = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(THUMBNAIL_SUFFIX) and entry.is_file():
+                    existing.append((entry.stat().st_mtime, entry.name))
+        for _, name in sorted(existing):
+            self._entries[name] = None
+        self._evict()
+
+    def path_for(self, key):
+        return self.cache_dir / f"{key}{THUMBNAIL_SUFFIX}"
+
+    def touch(self, path):
+        """缩略图被使用（命中或新生成）时调用"""
+        name = Path(path).name
+        is_new = name not in self._entries
+        self._entries[name] = None
+        self._entries.move_to_end(name)
+        if is_new:
+            self._evict()
+        else:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            name, _ = self._entries.popitem(last=False)
+            try:
+                (self.cache_dir / name).unlink()
+            except OSError:
+                pass
+
+
+class ThumbnailLoader:
+    """
+    异步加载缩略图：request() 提交任务，完成后在 Tk 主线程中调用 callback(原图路径, PIL 图片)
+
+    request() 返回任务的 future，可单独取消；cancel() 取消所有尚未开始的任务，
+    并丢弃之前提交的任务的结果（切换目录时调用）。
+    """
+
+    def __init__(self, tk_root, cache, size, workers=None):
+        self.tk_root = tk_root
+        self.cache = cache
+        self.size = tuple(size)
+        try:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError):
+            # 个别受限环境不能创建进程，退回线程池
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._results = queue.Queue()
+        self._futures = set()
+        self._generation = 0
+        self._polling = False
+
+    def request(self, image_path, callback):
+        try:
+            dest = self.cache.path_for(create_thumbnail_cache_key(image_path))
+        except OSError:
+            return None
+        generation = self._generation
+        future = self.executor.submit(make_thumbnail, str(image_path), str(dest), self.size)
+        self._futures.add(future)
+
+        def done(f):
+            # 在执行器的内部线程中调用，只放进队列，不碰 Tk
+            self._results.put((generation, image_path, f, callback))
+
+        future.add_done_callback(done)
+        self._schedule_poll()
+        return future
+
+    def cancel(self):
+        self._generation += 1
+        for future in self._futures:
+            future.cancel()
+        self._futures.clear()
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.tk_root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        handled = 0
+        while handled < MAX_RESULTS_PER_TICK:
+            try:
+                generation, image_path, future, callback = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._futures.discard(future)
+            if generation != self._generation:
+                continue
+            try:
+                dest = future.result()
+                with Image.open(dest) as f:
+                    img = f.copy()
+            except CancelledError:
+                continue
+            except Exception as e:
+                print(f"加载图片 {image_path} 失败: {e}")
+                continue
+            self.cache.touch(dest)
+            callback(image_path, img)
+            handled += 1
+
+        self._polling = False
+        if self._futures or not self._results.empty():
+            self._schedule_poll()
@@ -4,37 +4,83 @@ GUI文件服务器工具函数
 
 import os
 import stat
-import mimetypes
 from pathlib import Path
 from datetime import datetime
 import hashlib
+from collections import namedtuple
+
+# 目录扫描得到的精简条目：名称、是否目录、大小、修改时间
+ScanEntry = namedtuple('ScanEntry', ['name', 'is_dir', 'size', 'mtime'])
+
+def scan_sort_key(entry):
+    """目录列表的排序键：文件夹在前，名称不区分大小写"""
+    return (not entry.is_dir, entry.name.lower())
+
+def iter_scan_directory(dir_path, skip_hidden=True, batch_size=500):
+    """
+    逐批产出目录中的 ScanEntry 列表（按 readdir 的顺序，未排序）
+
+    给需要边扫描边显示的调用方使用（GUI 在后台线程中加载大目录或网络目录），
+    规则与 scan_directory 相同。调用方提前停止时应 close() 生成器，及时关闭目录句柄。
+    """
+    batch = []
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            name = entry.name
+            # 隐藏点开头的文件/目录
+            if skip_hidden and name.startswith('.'):
+                continue
+            try:
+                is_dir = entry.is_dir()
+                stat_res = entry.stat()
+            except OSError:
+                continue  # 忽略损坏的符号链接、无权限的条目等
+            batch.append(ScanEntry(name, is_dir, stat_res.st_size, stat_res.st_mtime))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def scan_directory(dir_path, skip_hidden=True):
+    """
+    扫描目录，返回按 (文件夹优先, 名称) 排序的 ScanEntry 列表
+
+    基于 os.scandir：is_dir() 直接使用 readdir 返回的 d_type，stat() 结果缓存在
+    DirEntry 上（Windows 下由目录枚举直接给出），每个条目最多一次 stat 系统调用。
+    Web 服务器和 GUI 的目录列表都使用这个函数。
+    """
+    entries = []
+    for batch in iter_scan_directory(dir_path, skip_hidden, batch_size=4096):
+        entries.extend(batch)
+    entries.sort(key=scan_sort_key)
+    return entries
+
+_file_types = None
+
+def get_file_types():
+    """GUI 共用的文件类型表（FileTypeRegistry），首次调用时由 config.FILE_TYPES 生成"""
+    global _file_types
+    if _file_types is None:
+        from config import FILE_TYPES, FILE_TYPE_SNIFF
+        from file_types import FileTypeRegistry
+
+        _file_types = FileTypeRegistry(FILE_TYPES, sniff_enabled=FILE_TYPE_SNIFF)
+    return _file_types
 
 def get_file_type(file_path):
-    """根据文件路径获取文件类型"""
-    from config import FILE_TYPES
-    
+    """根据文件路径获取文件类型（没有扩展名的文件按文件头判断）"""
     if file_path.is_dir():
         return 'folder'
-    
-    ext = file_path.suffix.lower().lstrip('.')
-    
-    for file_type, config in FILE_TYPES.items():
-        if ext in config['extensions']:
-            return file_type
-    
-    return 'file'
+    return get_file_types().classify(file_path.name, file_path.parent).type
 
 def get_file_icon(file_type):
     """获取文件类型对应的图标"""
-    from config import FILE_TYPES
-    
-    return FILE_TYPES.get(file_type, {}).get('icon', '📄')
+    return get_file_types().info(file_type).icon
 
 def get_file_color(file_type):
     """获取文件类型对应的颜色"""
-    from config import FILE_TYPES
-    
-    return FILE_TYPES.get(file_type, {}).get('color', '#000000')
+    return get_file_types().info(file_type).color
 
 def format_file_size(size_bytes):
     """格式化文件大小"""
@@ -100,14 +146,11 @@ def is_hidden_file(file_path):
     return False
 
 def get_file_hash(file_path, algorithm='md5'):
-    """计算文件哈希值"""
-    hash_func = hashlib.new(algorithm)
-    
+    """计算文件哈希值（大缓冲区读取，见 hashing.hash_file；需要缓存和并行时用 hashing.HashService）"""
+    from hashing import hash_file
+
     try:
-        with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_func.update(chunk)
-        return hash_func.hexdigest()
+        return hash_file(file_path, (algorithm,))[algorithm]
     except:
         return None
 
@@ -124,8 +167,8 @@ def safe_path_join(base_path, *paths):
 
 def get_mime_type(file_path):
     """获取文件MIME类型"""
-    mime_type, _ = mimetypes.guess_type(str(file_path))
-    return mime_type or 'application/octet-stream'
+    file_path = Path(file_path)
+    return get_file_types().mime_type(file_path.name, file_path.parent)
 
 def is_text_file(file_path):
     """判断是否为文本文件"""
@@ -158,19 +201,9 @@ def ensure_cache_dir():
     return CACHE_DIR
 
 def clean_cache_dir():
-    """清理缓存目录"""
+    """按最近使用顺序（LRU）清理缩略图缓存，只保留 THUMBNAIL_CACHE_SIZE 个，见 thumbnails.ThumbnailCache"""
     from config import CACHE_DIR, THUMBNAIL_CACHE_SIZE
-    
-    if not CACHE_DIR.exists():
-        return
-    
-    # 获取所有缓存文件，按修改时间排序
-    cache_files = list(CACHE_DIR.glob('*'))
-    cache_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-    
-    # 删除超出限制的缓存文件
-    for file_path in cache_files[THUMBNAIL_CACHE_SIZE:]:
-        try:
-            file_path.unlink()
-        except:
-            pass
\ No newline at end of file
+    from thumbnails import ThumbnailCache
+
+    if CACHE_DIR.exists():
+        ThumbnailCache(CACHE_DIR, THUMBNAIL_CACHE_SIZE)
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+图片预览的虚拟画廊
+
+整个画廊是一个 Canvas，只为与可见区域相交的格子创建画布项（缩略图、文件名、边框），
+滚出可见区域的格子立即删除。每个格子的 PhotoImage 尺寸固定（缩略图居中贴到
+THUMBNAIL_SIZE 的底图上），滚出的格子把 PhotoImage 还回池中，新格子用 paste() 复用，
+不再反复创建 Tk 图片。解码后的缩略图保存在有上限的 LRU 中，内存占用与目录大小无关。
+缩略图只为可见格子请求，滚走的格子取消尚未开始的生成任务。
+"""
+
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+
+from PIL import Image, ImageTk
+
+PADDING = 10
+TEXT_HEIGHT = 20
+# 可见区域上下各多准备的行数，滚动时不会看到空白
+BUFFER_ROWS = 1
+PLACEHOLDER_COLOR = '#e0e0e0'
+BACKGROUND = '#ffffff'
+
+
+def _short_name(name, limit=22):
+    if len(name) <= limit:
+        return name
+    half = (limit - 1) // 2
+    return f"{name[:half]}…{name[-half:]}"
+
+
+class VirtualGallery:
+    """在 parent 中创建 Canvas + 滚动条；set_images() 显示一组图片，on_open(路径) 处理点击"""
+
+    def __init__(self, parent, loader, thumb_size, on_open, max_decoded=500):
+        self.loader = loader
+        self.thumb_w, self.thumb_h = thumb_size
+        self.tile_w = self.thumb_w + 2 * PADDING
+        self.tile_h = self.thumb_h + TEXT_HEIGHT + 2 * PADDING
+        self.on_open = on_open
+        self.max_decoded = max_decoded
+
+        self.canvas = tk.Canvas(parent, background=BACKGROUND, highlightthickness=0,
+                                yscrollincrement=self.tile_h // 2)
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self._yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.images = []
+        self.columns = 1
+        self.tiles = {}          # 序号 -> (画布项列表, PhotoImage 或 None)
+        self.pending = {}        # 序号 -> 缩略图任务的 future
+        self.decoded = OrderedDict()  # 路径 -> 已贴好底图的 PIL 图片（LRU）
+        self.photo_pool = []
+
+        self.canvas.bind('<Configure>', lambda e: self.render(relayout=True))
+        self.canvas.bind('<Button-1>', self._on_click)
+        self.canvas.bind('<MouseWheel>', self._on_mousewheel)
+        self.canvas.bind('<Button-4>', lambda e: self._scroll(-1))
+        self.canvas.bind('<Button-5>', lambda e: self._scroll(1))
+
+    def set_images(self, image_paths):
+        """显示新的图片列表（切换目录时调用）"""
+        self.loader.cancel()
+        self.pending.clear()
+        for index in list(self.tiles):
+            self._drop_tile(index)
+        self.images = list(image_paths)
+        self.canvas.yview_moveto(0)
+        self.render(relayout=True)
+
+    def render(self, relayout=False):
+        """创建可见范围内缺少的格子，删除范围外的格子"""
+        width = self.canvas.winfo_width()
+        columns = max(1, width // self.tile_w) if width > 1 else 4
+        if relayout or columns != self.columns:
+            if columns != self.columns:
+                for index in list(self.tiles):
+                    self._drop_tile(index)
+            self.columns = columns
+            rows = (len(self.images) + columns - 1) // columns
+            self.canvas.configure(scrollregion=(0, 0, columns * self.tile_w, rows * self.tile_h))
+
+        top = self.canvas.canvasy(0)
+        height = self.canvas.winfo_height()
+        first_row = max(0, int(top // self.tile_h) - BUFFER_ROWS)
+        last_row = int((top + max(height, self.tile_h)) // self.tile_h) + BUFFER_ROWS
+        visible = range(first_row * self.columns, min(len(self.images), (last_row + 1) * self.columns))
+
+        for index in list(self.tiles):
+            if index not in visible:
+                self._drop_tile(index)
+        for index in list(self.pending):
+            if index not in visible:
+                self.pending.pop(index).cancel()
+        for index in visible:
+            if index not in self.tiles:
+                self._create_tile(index)
+
+    def _tile_origin(self, index):
+        row, col = divmod(index, self.columns)
+        return col * self.tile_w + PADDING, row * self.tile_h + PADDING
+
+    def _create_tile(self, index):
+        path = self.images[index]
+        x, y = self._tile_origin(index)
+        items = [
+            self.canvas.create_rectangle(x, y, x + self.thumb_w, y + self.thumb_h,
+                                         outline=PLACEHOLDER_COLOR, fill=PLACEHOLDER_COLOR),
+            self.canvas.create_text(x + self.thumb_w // 2, y + self.thumb_h + TEXT_HEIGHT // 2 + 2,
+                                    text=_short_name(path.name)),
+        ]
+        self.tiles[index] = (items, None)
+
+        decoded = self.decoded.get(path)
+        if decoded is not None:
+            self.decoded.move_to_end(path)
+            self._show(index, decoded)
+        elif index not in self.pending:
+            future = self.loader.request(path, lambda p, img, i=index: self._on_thumbnail(i, p, img))
+            if future is not None:
+                self.pending[index] = future
+
+    def _drop_tile(self, index):
+        items, photo = self.tiles.pop(index)
+        self.canvas.delete(*items)
+        if photo is not None:
+            self.photo_pool.append(photo)
+
+    def _on_thumbnail(self, index, path, img):
+        """ThumbnailLoader 的回调（主线程）：贴到固定尺寸的底图上，存入 LRU，格子仍可见时显示"""
+        self.pending.pop(index, None)
+        tile = Image.new('RGB', (self.thumb_w, self.thumb_h), BACKGROUND)
+        tile.paste(img, ((self.thumb_w - img.width) // 2, (self.thumb_h - img.height) // 2))
+        self.decoded[path] = tile
+        while len(self.decoded) > self.max_decoded:
+            self.decoded.popitem(last=False)
+        if index < len(self.images) and self.images[index] == path and index in self.tiles:
+            self._show(index, tile)
+
+    def _show(self, index, tile_image):
+        items, photo = self.tiles[index]
+        if photo is None:
+            if self.photo_pool:
+                photo = self.photo_pool.pop()
+                photo.paste(tile_image)
+            else:
+                photo = ImageTk.PhotoImage(tile_image)
+        x, y = self._tile_origin(index)
+        items.append(self.canvas.create_image(x, y, image=photo, anchor=tk.NW))
+        self.tiles[index] = (items, photo)
+
+    def _on_click(self, event):
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        col, row = int(x // self.tile_w), int(y // self.tile_h)
+        index = row * self.columns + col
+        if col < self.columns and 0 <= index < len(self.images):
+            self.on_open(self.images[index])
+
+    def _yview(self, *args):
+        self.canvas.yview(*args)
+        self.render()
+
+    def _scroll(self, units):
+        self.canvas.yview_scroll(units, 'units')
+        self.render()
+        return 'break'
+
+    def _on_mousewheel(self, event):
+        # Windows 下 delta 为 120 的倍数，macOS 下为较小的整数
+        step = -int(event.delta / 120) if abs(event.delta) >= 120 else -event.delta
+        return self._scroll(step)
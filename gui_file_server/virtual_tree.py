@@ -0,0 +1,185 @@
+"""
+Treeview 虚拟行模式
+
+目录条目很多时，ttk.Treeview 一次插入全部行会让界面卡死。虚拟模式下完整的行数据
+只保存在 Python 列表里，Treeview 中始终只有当前可见的那几十行；滚动条和鼠标滚轮
+改为控制行偏移量，滚动时重新填充可见行。
+
+选中状态也保存在行模型中（按每行 values 的第一列记录），滚出可见范围的行仍然保持选中，
+重新填充时恢复；不按 Ctrl/Shift 的单击或方向键会像普通列表一样只保留新选中的行。
+"""
+
+from tkinter import ttk
+
+DEFAULT_ROW_HEIGHT = 20
+HEADING_HEIGHT = 25
+# event.state 中的 Shift / Control 位
+MODIFIER_MASK = 0x0001 | 0x0004
+
+
+class VirtualTreeRows:
+    """为已有的 Treeview + 纵向滚动条提供虚拟行模式"""
+
+    def __init__(self, tree, scrollbar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.rows = []  # [(text, values), ...]
+        self.offset = 0
+        self.active = False
+        self.selected = set()  # 选中行的 values[0]
+        self._replace_selection = False
+
+        style_height = ttk.Style().lookup('Treeview', 'rowheight')
+        try:
+            self.row_height = int(style_height) or DEFAULT_ROW_HEIGHT
+        except (TypeError, ValueError):
+            self.row_height = DEFAULT_ROW_HEIGHT
+
+        tree.bind('<Configure>', self._on_configure, add='+')
+        # 要在 _on_arrow 之前绑定：它滚动时返回 'break'，之后绑定的回调不会执行
+        tree.bind('<Up>', self._on_plain_select, add='+')
+        tree.bind('<Down>', self._on_plain_select, add='+')
+        tree.bind('<MouseWheel>', self._on_mousewheel, add='+')
+        tree.bind('<Button-4>', lambda e: self._scroll_event(-3), add='+')
+        tree.bind('<Button-5>', lambda e: self._scroll_event(3), add='+')
+        tree.bind('<Up>', lambda e: self._on_arrow(-1), add='+')
+        tree.bind('<Down>', lambda e: self._on_arrow(1), add='+')
+        tree.bind('<Prior>', lambda e: self._scroll_event(-self.visible_count()), add='+')
+        tree.bind('<Next>', lambda e: self._scroll_event(self.visible_count()), add='+')
+        tree.bind('<<TreeviewSelect>>', lambda e: self._sync_selection(), add='+')
+        tree.bind('<ButtonPress-1>', self._on_plain_select, add='+')
+
+    def activate(self, rows):
+        """进入虚拟模式并显示给定的行数据"""
+        self.rows = rows
+        self.offset = 0
+        self.selected = set()
+        if not self.active:
+            self.active = True
+            self.scrollbar.configure(command=self.yview)
+            self.tree.configure(yscrollcommand='')
+        self.render()
+
+    def deactivate(self):
+        """退出虚拟模式，恢复 Treeview 自带的滚动"""
+        self.rows = []
+        self.offset = 0
+        self.selected = set()
+        if self.active:
+            self.active = False
+            self.scrollbar.configure(command=self.tree.yview)
+            self.tree.configure(yscrollcommand=self.scrollbar.set)
+
+    def extend(self, rows):
+        """追加行数据（用于分批加载）"""
+        self.rows.extend(rows)
+        if self.active:
+            self.render()
+
+    def visible_count(self):
+        """当前窗口高度能显示的行数"""
+        height = self.tree.winfo_height()
+        if height <= 1:  # 尚未完成布局
+            height = int(self.tree.cget('height')) * self.row_height + HEADING_HEIGHT
+        return max(1, (height - HEADING_HEIGHT) // self.row_height)
+
+    def render(self):
+        """用 rows[offset:offset + 可见行数] 重新填充 Treeview"""
+        if not self.active:
+            return
+        count = self.visible_count()
+        max_offset = max(0, len(self.rows) - count)
+        self.offset = min(max(self.offset, 0), max_offset)
+
+        # 先记下可见行上尚未同步的选择变化（<<TreeviewSelect>> 是异步事件，可能还没处理）
+        self._sync_selection()
+        self.tree.delete(*self.tree.get_children())
+        for text, values in self.rows[self.offset:self.offset + count]:
+            iid = self.tree.insert('', 'end', text=text, values=values)
+            if values and values[0] in self.selected:
+                self.tree.selection_add(iid)
+
+        total = len(self.rows) or 1
+        first = self.offset / total
+        last = min(1.0, (self.offset + count) / total)
+        self.scrollbar.set(first, last)
+
+    def selected_keys(self):
+        """所有选中行的 values[0]（包括不在可见范围内的），按行顺序排列"""
+        if not self.active:
+            return []
+        self._sync_selection()
+        return [values[0] for _, values in self.rows if values and values[0] in self.selected]
+
+    def _sync_selection(self):
+        """把 Treeview 中可见行的选中状态合并到 self.selected；不可见行的状态不变"""
+        if not self.active:
+            return
+        visible = set()
+        chosen = set()
+        selection = set(self.tree.selection())
+        for iid in self.tree.get_children():
+            values = self.tree.item(iid, 'values')
+            if not values:
+                continue
+            visible.add(values[0])
+            if iid in selection:
+                chosen.add(values[0])
+        if self._replace_selection:
+            self._replace_selection = False
+            self.selected = chosen
+        else:
+            self.selected = (self.selected - visible) | chosen
+
+    def _on_plain_select(self, event):
+        """不带 Ctrl/Shift 的单击或方向键：新的选择替换原有选择（包括不可见的行）"""
+        if self.active and not event.state & MODIFIER_MASK:
+            self._replace_selection = True
+
+    def yview(self, *args):
+        """滚动条回调，参数格式与 Treeview.yview 相同"""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * len(self.rows))
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= self.visible_count()
+            self.offset += step
+        self.render()
+
+    def _scroll_event(self, step):
+        if not self.active:
+            return None
+        self.offset += step
+        self.render()
+        return 'break'
+
+    def _on_mousewheel(self, event):
+        # Windows 下 delta 为 120 的倍数，macOS 下为较小的整数
+        step = -int(event.delta / 120) * 3 if abs(event.delta) >= 120 else -event.delta
+        return self._scroll_event(step)
+
+    def _on_arrow(self, direction):
+        """焦点在首/末可见行时，方向键滚动一行而不是停住"""
+        if not self.active:
+            return None
+        children = self.tree.get_children()
+        focus = self.tree.focus()
+        if not children or focus not in (children[0], children[-1]):
+            return None
+        if (direction < 0 and focus != children[0]) or (direction > 0 and focus != children[-1]):
+            return None
+
+        self._scroll_event(direction)
+        children = self.tree.get_children()
+        if children:
+            target = children[0] if direction < 0 else children[-1]
+            self.tree.focus(target)
+            self.tree.selection_set(target)
+        return 'break'
+
+    def _on_configure(self, event):
+        if self.active:
+            self.render()
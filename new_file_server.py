@@ -1,133 +1,648 @@
 import os
+import hashlib
 import mimetypes
-import humanize
+import sqlite3
 import stat
-from datetime import datetime
+import time
+import unicodedata
+import zipfile
+from collections import namedtuple
+from datetime import datetime, timezone
 from pathlib import Path
+from urllib.parse import quote
 
-from flask import Flask, render_template, make_response, request, send_file, Response
+from flask import Flask, g, render_template, make_response, request, send_file, Response, jsonify
 from flask.views import MethodView
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 
+from file_server import compression, formatting, metrics, profiling, thumbnails
+from file_server.listing_cache import ListingCache, InotifyWatcher
+from file_server.ranges import make_range_response
+from file_server.uploads import save_multipart_files
+from file_server.zipstream import iter_zip, walk_entries
+from file_server.resumable import UploadError, UploadStore
+from gui_file_server.config import FILE_TYPES, MAX_FILE_SIZE_MB
+from gui_file_server.file_types import FileTypeRegistry
+from gui_file_server.hashing import HashService, available_algorithms
+from gui_file_server.search_index import SearchIndex
+from gui_file_server.utils import scan_directory
+
 # --- 配置区 ---
 # 设置文件服务的根目录，'.' 表示当前目录，您也可以设置为绝对路径如 'F:\\'
+# 可以用环境变量 FILE_SERVER_ROOT 覆盖，也可以在 create_app(root) 中指定
+FILE_ROOT = Path(os.environ.get('FILE_SERVER_ROOT', '.')).resolve()
 
 # 设置一个安全的密钥，用于未来的认证功能
 SECRET_KEY = "your-very-secret-key"
+
+# 画廊缩略图的磁盘缓存目录与允许的宽度档位（像素）
+THUMB_CACHE_DIR = Path.home() / '.flask_file_server_cache' / 'thumbs'
+# 缓存最多保留的缩略图文件数（每个 worker 进程分别计数），超出时删除最久未用的
+THUMB_CACHE_MAX_ENTRIES = 20_000
+THUMB_WIDTHS = (200, 400, 800)
+THUMB_DEFAULT_WIDTH = 400
+
+# 目录列表分页：页面首屏条目数，以及 JSON 接口单次最多返回的条目数
+LISTING_PAGE_SIZE = 200
+LISTING_MAX_LIMIT = 1000
+# 目录页由浏览器渲染：服务端只在页面中嵌入首页条目的紧凑 JSON，由 custom.js 生成列表；
+# False 时由 Jinja 渲染。单个请求加 ?render=server 或 ?render=client 可以临时切换
+LISTING_CLIENT_RENDER = True
+
+# 目录列表缓存：最多缓存的目录数、所有目录条目总数上限、未启用 inotify 时的过期秒数
+LISTING_CACHE_DIRS = 256
+LISTING_CACHE_MAX_ENTRIES = 200_000
+LISTING_CACHE_TTL = 30
+# 在 Linux 上用 inotify 实时失效缓存
+LISTING_CACHE_INOTIFY = True
+
+# 目录页的 Cache-Control：允许浏览器和反向代理缓存，但每次使用前都用 ETag 重新验证
+LISTING_CACHE_CONTROL = 'public, no-cache'
+
+# 文件下载方式：
+#   'sendfile'   - 由 Python 发送；gunicorn 等提供 wsgi.file_wrapper 的服务器会用 os.sendfile 零拷贝发送
+#   'x-accel'    - 只返回 X-Accel-Redirect 响应头，由 nginx 发送文件（需配置 internal location）
+#   'x-sendfile' - 只返回 X-Sendfile 响应头，由 Apache(mod_xsendfile)/lighttpd 发送文件
+FILE_DELIVERY_MODE = 'sendfile'
+# x-accel 模式下 nginx 中对应 FILE_ROOT 的 internal location 前缀，例如:
+#   location /_protected/ { internal; alias /srv/files/; }
+X_ACCEL_PREFIX = '/_protected'
+
+# 单个上传文件的大小上限（字节），与 GUI 共用 gui_file_server/config.py 中的 MAX_FILE_SIZE_MB
+UPLOAD_MAX_FILE_SIZE = MAX_FILE_SIZE_MB * 1024 * 1024
+
+# 可续传分块上传：状态目录、分块大小、未完成上传的保留时间（秒）
+UPLOAD_STATE_DIR = Path.home() / '.flask_file_server_cache' / 'uploads'
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_EXPIRE_SECONDS = 24 * 3600
+
+# 响应压缩：按 Accept-Encoding 对目录页、JSON 和文本文件做 gzip/brotli 压缩（brotli 需 pip install brotli），
+# 小于 COMPRESS_MIN_SIZE 字节的响应不压缩；COMPRESS_SIDECARS 时优先发送已有的 <文件>.br / <文件>.gz
+COMPRESS_RESPONSES = True
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_SIDECARS = True
+
+# 文件名搜索（/_search）和文件夹递归大小：后台线程每 SEARCH_INDEX_INTERVAL 秒增量更新 SQLite 索引，
+# 索引文件按根目录区分存放在 SEARCH_INDEX_DIR 中；SEARCH_MAX_RESULTS 为单次最多返回的结果数
+SEARCH_INDEX_ENABLED = True
+SEARCH_INDEX_DIR = Path.home() / '.flask_file_server_cache' / 'search'
+SEARCH_INDEX_INTERVAL = 300
+SEARCH_MAX_RESULTS = 500
+
+# 文件校验值（/_hash/<路径>?algo=sha256,blake2b）：结果缓存在 HASH_CACHE_PATH，文件的大小/修改时间/inode
+# 不变时不再读取文件。默认 sha256，浏览器可以用 crypto.subtle.digest 对下载的文件计算同样的值比对；
+# 对目录请求时并行计算其中（不含子目录）的文件，最多 HASH_MAX_FILES 个
+HASH_CACHE_PATH = Path.home() / '.flask_file_server_cache' / 'hashes.db'
+HASH_DEFAULT_ALGORITHM = 'sha256'
+HASH_MAX_FILES = 1000
+
+# 监控指标（/_metrics，Prometheus 文本格式）：请求数与耗时（按路由）、目录扫描与模板渲染耗时、
+# 下载/上传字节数与速度、列表缓存命中率。关闭后埋点只剩一次判断，/_metrics 返回 404
+METRICS_ENABLED = True
+
+# 请求性能分析（cProfile）：PROFILING_ENABLED 打开且设置了管理令牌后，请求 URL 加 ?_profile=1 返回分析报告，
+# ?_profile=prof 下载 pstats 文件（snakeviz / flameprof 可生成火焰图），令牌放在 X-Profile-Token 头或 _token 参数中。
+# PROFILE_SAMPLE_RATE > 0 时按该概率分析普通请求，只保留最慢的 PROFILE_KEEP 个，在 /_profiles 查看
+PROFILING_ENABLED = False
+PROFILE_TOKEN = os.environ.get('FILE_SERVER_PROFILE_TOKEN', '')
+PROFILE_SAMPLE_RATE = 0.0
+PROFILE_KEEP = 20
+
+# 没有扩展名的文件按文件头判断类型（列表中的图标、画廊、缩略图）
+FILE_TYPE_SNIFF = True
 # --- 结束配置 ---
 
 
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
+metrics.registry.enabled = METRICS_ENABLED
+# 下载等 direct_passthrough 响应发送完毕时记录耗时（见 metrics.call_on_close）
+app.wsgi_app = metrics.CloseHookMiddleware(app.wsgi_app)
 
-# 定义不同文件类型，用于前端判断
-DATATYPES = {
-    'image': ['gif', 'ico', 'jpeg', 'jpg', 'png', 'svg', 'webp'],
-    'video': ['mp4', 'm4v', 'ogv', 'webm', 'mov'],
-    'audio': ['mp3', 'wav', 'ogg', 'm4a'],
-    'archive': ['7z', 'zip', 'rar', 'gz', 'tar'],
-    'text': ['py', 'js', 'css', 'html', 'json', 'yaml', 'c', 'cpp', 'java'],
-    'ebook': ['epub', 'mobi', 'azw3', 'pdf', "txt", "md"],
-}
+# mimetypes 不认识 .log，按纯文本发送（浏览器直接显示，也可以压缩）
+mimetypes.add_type('text/plain', '.log')
+
+# 文件类型表（扩展名 -> 类型、图标、MIME），与 GUI 共用 gui_file_server/config.py 中的 FILE_TYPES
+file_types = FileTypeRegistry(FILE_TYPES)
+file_types.sniff_enabled = FILE_TYPE_SNIFF
+
+# 各类型的扩展名
+DATATYPES = file_types.extensions_by_type()
+
+# 各类型的 Bootstrap 图标，'file' 为默认文件图标
+ICONS = file_types.web_icons()
 
-# 定义文件图标
-ICONS = {
-    'image': 'bi-image',
-    'video': 'bi-film',
-    'audio': 'bi-music-note-beamed',
-    'archive': 'bi-archive-fill',
-    'text': 'bi-file-earmark-text',
-    'pdf': 'bi-file-earmark-pdf',
-    'folder': 'bi-folder-fill',
-    'file': 'bi-file-earmark',  # 默认文件图标
-    # --- 新增开始 ---
-    'ebook': 'bi-book-half',  # 为电子书选一个图标
-    # --- 新增结束 ---
-}
 
+def get_file_type_and_icon(filename_str, directory=None):
+    """
+    根据文件名后缀返回文件类型和对应的 Bootstrap 图标
 
-def get_file_type_and_icon(filename_str):
-    """根据文件名后缀返回文件类型和对应的 Bootstrap 图标"""
-    ext = filename_str.split('.')[-1].lower()
-    for file_type, extensions in DATATYPES.items():
-        if ext in extensions:
-            return file_type, ICONS.get(file_type, ICONS['file'])
-    return 'file', ICONS['file']
+    文件名没有后缀且给出了所在目录时，按文件头判断（结果按 inode + 修改时间缓存）。
+    """
+    info = file_types.classify(filename_str, directory)
+    return info.type, info.web_icon
 
 
 @app.template_filter('human_size')
 def human_size_filter(size_bytes):
-    return humanize.naturalsize(size_bytes)
+    return formatting.human_size(size_bytes)
 
 
 @app.template_filter('human_time')
 def human_time_filter(timestamp):
-    return humanize.naturaltime(datetime.fromtimestamp(timestamp))
+    return formatting.human_time(timestamp)
+
+
+def resolve_request_path(p):
+    """
+    把 URL 路径转换为 (相对路径, 绝对路径)，出现目录穿越时返回 (None, None)
+
+    绝对路径（JSON 中的 "path" 可能是 /tmp/x）、.. 以及指向根目录之外的符号链接都视为穿越。
+    """
+    request_path = Path(os.path.normpath(p))
+    if request_path.anchor or '..' in request_path.parts:
+        return None, None
+    abs_path = FILE_ROOT.joinpath(request_path)
+    if not abs_path.resolve().is_relative_to(FILE_ROOT.resolve()):
+        return None, None
+    return request_path, abs_path
+
+
+# 支持的排序字段
+SORT_KEYS = {
+    'name': lambda e: e['name'].lower(),
+    'size': lambda e: e['size'],
+    'mtime': lambda e: e['mtime'],
+}
+
+
+# 处理好的目录列表；etag/last_modified 由条目的名称、大小、修改时间得出
+Listing = namedtuple('Listing', [
+    'items', 'images', 'total_size', 'file_count', 'dir_count', 'etag', 'last_modified'
+])
+
+
+def build_listing(abs_path):
+    """扫描目录并分类，返回 Listing，条目按名称排序"""
+    started = time.perf_counter()
+    items = []
+    images = []
+    total_size, file_count, dir_count = 0, 0, 0
+    digest = hashlib.blake2b(digest_size=16)
+    last_modified = os.stat(abs_path).st_mtime
+
+    for item in scan_directory(abs_path):
+        entry = {
+            'name': item.name,
+            'mtime': item.mtime,
+            'size': item.size,
+            'is_dir': item.is_dir
+        }
+        digest.update(f"{item.name}\0{item.size}\0{item.mtime}\n".encode('utf-8', 'surrogateescape'))
+        last_modified = max(last_modified, item.mtime)
+
+        if item.is_dir:
+            # 目录自身的 st_size 没有意义，递归大小由搜索索引提供（apply_folder_totals）
+            entry['size'] = 0
+            entry['type'] = 'folder'
+            entry['icon'] = ICONS['folder']
+            dir_count += 1
+            items.append(entry)
+        else:
+            file_type, icon_class = get_file_type_and_icon(item.name, abs_path)
+            entry['type'] = file_type
+            entry['icon'] = icon_class
+            file_count += 1
+            total_size += item.size
+            # 分离图片和其他文件
+            if file_type == 'image':
+                images.append(entry)
+            else:
+                items.append(entry)
+
+    metrics.LISTING_SCAN_SECONDS.observe(time.perf_counter() - started)
+    metrics.LISTING_ENTRIES.observe(file_count + dir_count)
+    return Listing(items, images, total_size, file_count, dir_count,
+                   digest.hexdigest(), last_modified)
+
+
+listing_cache = ListingCache(
+    max_dirs=LISTING_CACHE_DIRS,
+    max_weight=LISTING_CACHE_MAX_ENTRIES,
+    ttl=LISTING_CACHE_TTL,
+    weigh=lambda listing: len(listing.items) + len(listing.images),
+)
+
+listing_watcher = None
+
+
+def start_listing_watcher():
+    """
+    启动 inotify 监听，实时失效目录缓存（每个进程调用一次）
+
+    监听线程不会被 fork 继承，gunicorn 预加载应用时要在 worker 进程中（post_fork）调用。
+    """
+    global listing_watcher
+    if listing_watcher is not None or not LISTING_CACHE_INOTIFY:
+        return
+    try:
+        listing_watcher = InotifyWatcher(on_directory_event).start()
+    except (OSError, AttributeError) as e:
+        app.logger.info("inotify 不可用，目录缓存仅按 mtime/TTL 校验: %s", e)
+        return
+    listing_cache.attach_watcher(listing_watcher)
+
+
+search_index = None
+
+
+def get_search_index():
+    """当前根目录的搜索索引（首次调用时打开），未启用搜索时返回 None"""
+    global search_index
+    if not SEARCH_INDEX_ENABLED:
+        return None
+    if search_index is None or search_index.root != str(FILE_ROOT):
+        digest = hashlib.md5(str(FILE_ROOT).encode('utf-8', 'surrogateescape')).hexdigest()
+        search_index = SearchIndex(FILE_ROOT, SEARCH_INDEX_DIR / f"{digest}.db")
+    return search_index
+
+
+def start_search_indexer():
+    """启动后台索引线程（每个进程调用一次）；多个 gunicorn worker 中只有拿到锁的一个真正执行刷新"""
+    index = get_search_index()
+    if index is not None:
+        index.start(SEARCH_INDEX_INTERVAL)
+
+
+def start_background_tasks():
+    """启动 inotify 监听和搜索索引线程；gunicorn 预加载应用时在 post_fork 中调用"""
+    start_listing_watcher()
+    start_search_indexer()
+
+
+def index_path(request_path):
+    """相对路径在搜索索引中的写法：'/' 分隔，根目录为空字符串"""
+    posix = request_path.as_posix()
+    return '' if posix == '.' else posix
+
+
+def on_directory_event(abs_dir):
+    """inotify 回调（在监听线程中）：失效列表缓存，并让搜索索引尽快重新扫描这个目录"""
+    listing_cache.invalidate(abs_dir)
+    if search_index is not None:
+        try:
+            search_index.mark_dirty(index_path(Path(abs_dir).relative_to(FILE_ROOT)))
+        except ValueError:
+            pass
+
+
+def folder_totals(request_path, listing):
+    """
+    从搜索索引读取递归统计：(当前目录的 DirTotals, {子文件夹名: DirTotals})
+
+    索引未启用或还没有扫描到这个目录时返回 (None, {})。
+    """
+    if search_index is None:
+        return None, {}
+    rel = index_path(request_path)
+    try:
+        totals = search_index.totals(rel)
+        if totals is None:
+            return None, {}
+        return totals, search_index.child_totals(rel) if listing.dir_count else {}
+    except sqlite3.Error:
+        return None, {}
+
+
+def listing_with_totals_etag(listing, totals):
+    """子文件夹的大小变化不会改变列表本身，ETag 中要加上递归统计"""
+    if totals is None:
+        return listing
+    digest = hashlib.blake2b(f"{listing.etag}:{totals.size}:{totals.files}:{totals.dirs}".encode(),
+                             digest_size=16)
+    return listing._replace(etag=digest.hexdigest())
+
+
+def apply_folder_totals(entries, children):
+    """文件夹条目的 size 换成递归大小并加上 file_count；返回新列表，不修改缓存中的条目"""
+    if not children:
+        return entries
+    result = []
+    for e in entries:
+        totals = children.get(e['name']) if e['is_dir'] else None
+        result.append(dict(e, size=totals.size, file_count=totals.files) if totals else e)
+    return result
+
+
+def directory_changed(abs_dir):
+    """
+    上传等操作改变了目录内容：失效列表缓存，搜索索引由后台线程在约 DIRTY_DELAY 秒后只重新扫描这个目录
+
+    不在请求中更新索引：冷索引上第一次刷新就是完整建索引，大目录树下耗时远超上传本身。
+    """
+    on_directory_event(abs_dir)
+
+
+hash_service = None
+
+
+def get_hash_service():
+    """首次调用时创建；gunicorn 预加载时在 fork 之后才会创建线程池和数据库连接"""
+    global hash_service
+    if hash_service is None:
+        hash_service = HashService(HASH_CACHE_PATH)
+    return hash_service
+
+
+def get_listing(abs_path):
+    """带缓存的 build_listing，返回值被多个请求共享，不要修改"""
+    return listing_cache.get(abs_path, build_listing)
+
+
+def content_disposition_names(filename):
+    """Content-Disposition 的 filename 参数，非 ASCII 文件名按 RFC 5987 额外给出 filename*"""
+    try:
+        filename.encode('ascii')
+        return {'filename': filename}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+        quoted = quote(filename, safe="!#$&+-.^_`|~")
+        return {'filename': simple, 'filename*': f"UTF-8''{quoted}"}
+
+
+def deliver_file(abs_path, request_path, as_attachment=False):
+    """按 FILE_DELIVERY_MODE 发送 FILE_ROOT 下的文件，并记录发送的字节数和耗时"""
+    return record_send(_deliver_file(abs_path, request_path, as_attachment))
+
+
+def record_send(response):
+    """
+    下载的监控指标：kind 为 full / range（206）/ not_modified / offload（交给 nginx 等发送）
+
+    字节数按响应长度计；耗时在 WSGI 服务器关闭响应体（发送完毕或客户端断开）时记录。
+    """
+    if not metrics.registry.enabled:
+        return response
+    if 'X-Accel-Redirect' in response.headers or 'X-Sendfile' in response.headers:
+        kind = 'offload'
+    elif response.status_code == 206:
+        kind = 'range'
+    elif response.status_code == 304:
+        kind = 'not_modified'
+    else:
+        kind = 'full'
+    size = (response.content_length or 0) if request.method != 'HEAD' else 0
+    metrics.SEND_BYTES.inc(size, kind)
+    metrics.SEND_SIZE.observe(size, kind)
+    started = time.perf_counter()
+    metrics.call_on_close(request.environ,
+                          lambda: metrics.SEND_SECONDS.observe(time.perf_counter() - started, kind))
+    return response
+
+
+def _deliver_file(abs_path, request_path, as_attachment=False):
+    if FILE_DELIVERY_MODE == 'sendfile':
+        # 完整响应时 Werkzeug 会使用服务器提供的 wsgi.file_wrapper，gunicorn 据此调用 os.sendfile；
+        # Range 请求由 make_range_response 处理，只读取请求的区间
+        mimetype = mimetypes.guess_type(abs_path.name)[0]
+        if COMPRESS_SIDECARS and compression.is_compressible(mimetype):
+            sidecar, encoding = compression.sidecar_for(abs_path, request.headers.get('Accept-Encoding'))
+            if sidecar is not None:
+                response = send_file(sidecar, mimetype=mimetype, as_attachment=as_attachment,
+                                     download_name=abs_path.name, conditional=False)
+                response.headers['Content-Encoding'] = encoding
+                response.vary.add('Accept-Encoding')
+                return make_range_response(response, sidecar, request.environ)
+        response = send_file(abs_path, as_attachment=as_attachment, conditional=False)
+        return make_range_response(response, abs_path, request.environ)
+
+    # 交给前端服务器发送：Python 只生成响应头，Range 和条件请求也由 nginx / Apache 处理
+    mimetype = mimetypes.guess_type(abs_path.name)[0] or 'application/octet-stream'
+    response = Response(mimetype=mimetype)
+    if as_attachment:
+        response.headers.set('Content-Disposition', 'attachment', **content_disposition_names(abs_path.name))
+
+    if FILE_DELIVERY_MODE == 'x-accel':
+        response.headers['X-Accel-Redirect'] = f"{X_ACCEL_PREFIX}/{quote(request_path.as_posix())}"
+    elif FILE_DELIVERY_MODE == 'x-sendfile':
+        # 响应头只能是 latin-1，中文路径按 URL 编码（mod_xsendfile 默认 XSendFileUnescape On）
+        response.headers['X-Sendfile'] = quote(str(abs_path))
+    else:
+        raise ValueError(f"未知的 FILE_DELIVERY_MODE: {FILE_DELIVERY_MODE!r}")
+    return response
+
+
+def zip_compress_type(name):
+    """打包下载时文本类文件用 deflate 压缩，图片、音视频、压缩包等已压缩的文件直接存储"""
+    file_type, _ = get_file_type_and_icon(name)
+    if file_type == 'text' or compression.is_compressible(mimetypes.guess_type(name)[0]):
+        return zipfile.ZIP_DEFLATED
+    return zipfile.ZIP_STORED
+
+
+def zip_response(abs_path, request_path, names=None):
+    """把目录（或其中选中的条目）边打包边发送，names 中的每一项必须是该目录下的直接条目"""
+    if names is not None:
+        names = list(dict.fromkeys(names))
+        for name in names:
+            if name in ('', '.', '..') or '/' in name or os.sep in name \
+                    or not os.path.lexists(abs_path / name):
+                return f"无效的条目: {name}", 400
+
+    archive_name = f"{request_path.name or 'files'}.zip"
+    response = Response(iter_zip(walk_entries(abs_path, names), zip_compress_type),
+                        mimetype='application/zip')
+    response.headers.set('Content-Disposition', 'attachment', **content_disposition_names(archive_name))
+    # 内容随目录变化，不缓存
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@app.before_request
+def start_request_timer():
+    if metrics.registry.enabled:
+        g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """按路由模板（而不是具体路径）计数，耗时到响应体发送完毕为止"""
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        method = request.method
+        metrics.REQUESTS.inc(1, route, method, str(response.status_code))
+        metrics.call_on_close(request.environ,
+                              lambda: metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, route, method))
+    return response
+
+
+@app.after_request
+def compress_response(response):
+    if COMPRESS_RESPONSES and request.method in ('GET', 'HEAD'):
+        compression.compress_response(response, request.headers.get('Accept-Encoding'), COMPRESS_MIN_SIZE)
+    return response
+
+
+def listing_not_modified(listing):
+    """根据 If-None-Match / If-Modified-Since 判断客户端缓存的列表是否仍然有效"""
+    # 两者同时存在时以 If-None-Match 为准（RFC 9110）
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(listing.etag)
+    if request.if_modified_since:
+        return int(listing.last_modified) <= request.if_modified_since.timestamp()
+    return False
+
+
+def set_listing_cache_headers(response, listing):
+    """给目录页 / 列表接口的响应加上弱 ETag、Last-Modified 和 Cache-Control"""
+    response.set_etag(listing.etag, weak=True)
+    response.last_modified = datetime.fromtimestamp(int(listing.last_modified), tz=timezone.utc)
+    response.headers['Cache-Control'] = LISTING_CACHE_CONTROL
+    return response
+
+
+def not_modified_response(listing):
+    return set_listing_cache_headers(Response(status=304), listing)
+
+
+def parse_sort_args(args):
+    """从查询参数读取 sort/order，非法值回退为按名称升序"""
+    sort_by = args.get('sort', 'name')
+    if sort_by not in SORT_KEYS:
+        sort_by = 'name'
+    order = 'desc' if args.get('order') == 'desc' else 'asc'
+    return sort_by, order
+
+
+def sort_entries(entries, sort_by, order):
+    """按指定字段排序，文件夹始终在前；扫描结果本身已按名称升序，此时无需再排"""
+    if sort_by == 'name' and order == 'asc':
+        return entries
+    result = sorted(entries, key=SORT_KEYS[sort_by], reverse=(order == 'desc'))
+    # 稳定排序，只把文件夹提到前面，不打乱上一步的顺序
+    result.sort(key=lambda e: not e['is_dir'])
+    return result
+
+
+# 紧凑格式中的类型编号：FILE_TYPES 中的各类型（包括 folder）和默认的 file
+LISTING_TYPES = list(file_types.types)
+LISTING_TYPE_CODES = {name: code for code, name in enumerate(LISTING_TYPES)}
+
+
+def listing_types():
+    """紧凑格式的类型表，下标即类型编号：[[类型, 图标], ...]"""
+    return [[name, ICONS[name]] for name in LISTING_TYPES]
+
+
+def compact_entries(entries, now=None):
+    """
+    一页条目按列存放，由浏览器还原后渲染：name / size / mtime（整数秒）/ type（类型编号）
+    以及格式化好的 size_h / mtime_h；有文件夹递归统计时再加上 file_count（其余为 null）
+    """
+    sizes = [e['size'] for e in entries]
+    mtimes = [e['mtime'] for e in entries]
+    columns = {
+        'name': [e['name'] for e in entries],
+        'size': sizes,
+        'mtime': [int(m) for m in mtimes],
+        'type': [LISTING_TYPE_CODES[e['type']] for e in entries],
+        'size_h': formatting.human_sizes(sizes),
+        'mtime_h': formatting.human_times(mtimes, now),
+    }
+    if any('file_count' in e for e in entries):
+        columns['file_count'] = [e.get('file_count') for e in entries]
+    return columns
+
+
+def listing_page(entries, offset, limit, compact=False, now=None):
+    """排好序的条目中的一页，大小和时间在这里整页一次格式化"""
+    page = entries[offset:offset + limit]
+    next_offset = offset + len(page)
+    data = {
+        'offset': offset,
+        'limit': limit,
+        'total': len(entries),
+        'next_offset': next_offset if next_offset < len(entries) else None,
+    }
+    if compact:
+        data['format'] = 'compact'
+        data['types'] = listing_types()
+        data['entries'] = compact_entries(page, now)
+    else:
+        data['entries'] = formatting.with_human_fields(page, now)
+    return data
+
+
+def use_client_render(args):
+    render = args.get('render')
+    if render in ('client', 'server'):
+        return render == 'client'
+    return LISTING_CLIENT_RENDER
 
 
 class FileServerView(MethodView):
     def get(self, p=''):
         # 防止目录穿越漏洞
-        request_path = Path(os.path.normpath(p))
-        if '..' in request_path.parts:
+        request_path, abs_path = resolve_request_path(p)
+        if request_path is None:
             return "禁止访问", 403
 
-        # 构建安全的文件/目录路径
-        abs_path = FILE_ROOT.joinpath(request_path)
-
         if not abs_path.exists():
             return "文件或目录未找到", 404
 
         # 处理目录浏览
         if abs_path.is_dir():
-            items = []
-            images = []
-            total_size, file_count, dir_count = 0, 0, 0
-
-            for item in sorted(abs_path.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower())):
-                # 隐藏点开头的文件/目录
-                if item.name.startswith('.'):
-                    continue
-
-                try:
-                    stat_res = item.stat()
-                except FileNotFoundError:
-                    continue  # 忽略损坏的符号链接等
-
-                entry = {
-                    'name': item.name,
-                    'mtime': stat_res.st_mtime,
-                    'size': stat_res.st_size,
-                    'is_dir': item.is_dir()
+            # ?zip=1 打包下载整个目录，附带 name 参数时只打包选中的条目
+            if request.args.get('zip') == '1':
+                return zip_response(abs_path, request_path, request.args.getlist('name') or None)
+
+            listing = get_listing(abs_path)
+            totals, children = folder_totals(request_path, listing)
+            listing = listing_with_totals_etag(listing, totals)
+            # 列表没有变化时直接返回 304，省掉排序和模板渲染
+            if listing_not_modified(listing):
+                return not_modified_response(listing)
+
+            sort_by, order = parse_sort_args(request.args)
+            items = sort_entries(apply_folder_totals(listing.items, children), sort_by, order)
+            images = sort_entries(listing.images, sort_by, order)
+
+            now = time.time()
+            if use_client_render(request.args):
+                # 页面中只嵌入首页条目的紧凑 JSON，列表由 custom.js 生成
+                initial_listing = {
+                    'items': listing_page(items, 0, LISTING_PAGE_SIZE, compact=True, now=now),
+                    'images': listing_page(images, 0, LISTING_PAGE_SIZE, compact=True, now=now),
                 }
+                page_items, page_images = [], []
+            else:
+                initial_listing = None
+                page_items = formatting.with_human_fields(items[:LISTING_PAGE_SIZE], now)
+                page_images = images[:LISTING_PAGE_SIZE]
 
-                if item.is_dir():
-                    entry['type'] = 'folder'
-                    entry['icon'] = ICONS['folder']
-                    dir_count += 1
-                    items.append(entry)
-                else:
-                    file_type, icon_class = get_file_type_and_icon(item.name)
-                    entry['type'] = file_type
-                    entry['icon'] = icon_class
-                    file_count += 1
-                    total_size += stat_res.st_size
-                    # 分离图片和其他文件
-                    if file_type == 'image':
-                        images.append(entry)
-                    else:
-                        items.append(entry)
-
-            return render_template(
-                'index.html',
-                current_path=str(request_path),
-                path_parts=request_path.parts,
-                items=items,
-                images=images,
-                total_size=total_size,
-                file_count=file_count,
-                dir_count=dir_count
-            )
+            with metrics.RENDER_SECONDS.time('index.html'):
+                html = render_template(
+                    'index.html',
+                    current_path=str(request_path),
+                    path_parts=request_path.parts,
+                    # 首屏只有一页，其余由前端滚动时通过 /_list 接口加载
+                    items=page_items,
+                    images=page_images,
+                    initial_listing=initial_listing,
+                    items_total=len(items),
+                    images_total=len(images),
+                    page_size=LISTING_PAGE_SIZE,
+                    sort_by=sort_by,
+                    order=order,
+                    total_size=listing.total_size,
+                    file_count=listing.file_count,
+                    dir_count=listing.dir_count,
+                    # 包括所有子文件夹的统计，索引尚未建立时为 None
+                    totals=totals
+                )
+            return set_listing_cache_headers(make_response(html), listing)
 
         # 处理文件下载
         elif abs_path.is_file():
@@ -135,54 +650,476 @@ class FileServerView(MethodView):
             # 检查 URL 查询参数中是否有 'dl=1'
             should_download = request.args.get('dl') == '1'
             # 如果 should_download 为 True，则强制浏览器下载文件
-            return send_file(abs_path, as_attachment=should_download)
+            return deliver_file(abs_path, request_path, as_attachment=should_download)
             # --- 修改结束 ---
 
         return "无效的路径", 400
 
     def post(self, p=''):
         # 文件上传逻辑
-        request_path = Path(os.path.normpath(p))
-        if '..' in request_path.parts:
+        started = time.perf_counter()
+        request_path, upload_path = resolve_request_path(p)
+        if request_path is None:
             return "禁止访问", 403
 
-        upload_path = FILE_ROOT.joinpath(request_path)
         if not upload_path.is_dir():
             return "目标路径不是一个有效的目录", 400
 
-        files = request.files.getlist('files[]')
-        if not files:
-            return "没有选择文件", 400
+        boundary = request.mimetype_params.get('boundary')
+        if request.mimetype != 'multipart/form-data' or not boundary:
+            return "请求必须是 multipart/form-data", 400
+
+        # 边解析边写入目标目录，不经过 request.files 的临时文件（文件名由 secure_filename 处理）
+        try:
+            saved = save_multipart_files(
+                request.stream,
+                boundary.encode('latin-1'),
+                upload_path,
+                field_name='files[]',
+                max_file_size=UPLOAD_MAX_FILE_SIZE,
+            )
+        except RequestEntityTooLarge:
+            return f"单个文件不能超过 {UPLOAD_MAX_FILE_SIZE // (1024 * 1024)} MB", 413
+        except ValueError as e:
+            return f"上传数据不完整: {e}", 400
+        except OSError as e:
+            return f"保存文件时出错: {e}", 500
+        finally:
+            # 部分文件保存失败时目录也可能已经变化
+            directory_changed(upload_path)
 
-        for file in files:
-            if file.filename:
-                # 使用 secure_filename 防止恶意文件名
-                filename = secure_filename(file.filename)
-                try:
-                    file.save(upload_path / filename)
-                except Exception as e:
-                    return f"保存文件 {filename} 时出错: {e}", 500
+        if not saved:
+            return "没有选择文件", 400
 
+        record_upload('multipart', request.content_length or 0, started)
         return "上传成功", 200
 
 
+upload_store = UploadStore(UPLOAD_STATE_DIR, UPLOAD_CHUNK_SIZE, UPLOAD_EXPIRE_SECONDS)
+
+
+def record_upload(kind, nbytes, started):
+    """上传的监控指标：kind 为 multipart（表单上传）或 chunk（可续传上传的一个分块）"""
+    elapsed = time.perf_counter() - started
+    metrics.UPLOAD_BYTES.inc(nbytes, kind)
+    metrics.UPLOAD_SECONDS.observe(elapsed, kind)
+    if elapsed > 0 and nbytes:
+        metrics.UPLOAD_THROUGHPUT.observe(nbytes / elapsed, kind)
+
+
+def upload_status(info, received=None):
+    """分块上传的进度信息（JSON）"""
+    if received is None:
+        received = upload_store.received_chunks(info)
+    return {
+        'id': info['id'],
+        'filename': info['filename'],
+        'size': info['size'],
+        'chunk_size': info['chunk_size'],
+        'offset': upload_store.contiguous_offset(info, received),
+        'received': sorted(received),
+    }
+
+
+class UploadCreateView(MethodView):
+    """创建可续传上传：POST /_uploads {"path", "filename", "size"}"""
+
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        request_path, upload_path = resolve_request_path(str(data.get('path', '')))
+        if request_path is None:
+            return jsonify(error="禁止访问"), 403
+        if not upload_path.is_dir():
+            return jsonify(error="目标路径不是一个有效的目录"), 400
+
+        filename = secure_filename(str(data.get('filename', '')))
+        size = data.get('size')
+        if not filename:
+            return jsonify(error="文件名无效"), 400
+        # bool 是 int 的子类，JSON 中的 true/false 不能当作大小
+        if not isinstance(size, int) or isinstance(size, bool) or size < 0:
+            return jsonify(error="size 必须是非负整数"), 400
+        if size > UPLOAD_MAX_FILE_SIZE:
+            return jsonify(error=f"单个文件不能超过 {UPLOAD_MAX_FILE_SIZE // (1024 * 1024)} MB"), 413
+
+        info = upload_store.create(upload_path, filename, size)
+        response = jsonify(upload_status(info, set()))
+        response.status_code = 201
+        response.headers['Location'] = f"/_uploads/{info['id']}"
+        return response
+
+
+class UploadSessionView(MethodView):
+    """查询进度、上传分块、取消：/_uploads/<id>"""
+
+    def _load(self, upload_id):
+        info = upload_store.get(upload_id)
+        if info is None:
+            return None, (jsonify(error="上传不存在或已完成"), 404)
+        return info, None
+
+    def head(self, upload_id):
+        info = upload_store.get(upload_id)
+        # 没有响应体，不带默认的 text/html Content-Type
+        response = Response(status=200 if info is not None else 404)
+        del response.headers['Content-Type']
+        response.headers['Cache-Control'] = 'no-store'
+        if info is not None:
+            response.headers['Upload-Offset'] = str(upload_store.contiguous_offset(info))
+            response.headers['Upload-Length'] = str(info['size'])
+        return response
+
+    def get(self, upload_id):
+        info, error = self._load(upload_id)
+        if error:
+            return error
+        response = jsonify(upload_status(info))
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    def patch(self, upload_id):
+        started = time.perf_counter()
+        info, error = self._load(upload_id)
+        if error:
+            return error
+
+        offset = request.headers.get('Upload-Offset', type=int)
+        if offset is None:
+            return jsonify(error="缺少 Upload-Offset"), 400
+        # 没有 Content-Length 时按空分块处理，只有长度为 0 的文件能通过校验
+        length = request.content_length or 0
+
+        try:
+            received, target = upload_store.write_chunk(info, offset, length, request.stream)
+        except UploadError as e:
+            return jsonify(error=str(e)), e.status
+
+        record_upload('chunk', length, started)
+        status = upload_status(info, received)
+        status['complete'] = target is not None
+        if target is not None:
+            directory_changed(target.parent)
+        response = jsonify(status)
+        response.headers['Upload-Offset'] = str(status['offset'])
+        return response
+
+    def delete(self, upload_id):
+        info, error = self._load(upload_id)
+        if error:
+            return error
+        upload_store.cancel(info)
+        listing_cache.invalidate(Path(info['target_dir']))
+        return '', 204
+
+
+thumb_cache = thumbnails.ThumbnailCache(THUMB_CACHE_DIR, THUMB_CACHE_MAX_ENTRIES)
+
+
+class ThumbnailView(MethodView):
+    """画廊缩略图：按需生成缩小后的 WebP/JPEG，并缓存在磁盘上"""
+
+    def get(self, p):
+        request_path, abs_path = resolve_request_path(p)
+        if request_path is None:
+            return "禁止访问", 403
+        if not abs_path.is_file():
+            return "文件未找到", 404
+
+        file_type, _ = get_file_type_and_icon(abs_path.name, abs_path.parent)
+        if file_type != 'image':
+            return "不是图片文件", 400
+
+        # 没有 Pillow 或格式无法解码（如 svg）时，退回原图
+        ext = abs_path.suffix.lower().lstrip('.')
+        if not thumbnails.is_available() or ext in thumbnails.UNSUPPORTED_EXTENSIONS:
+            return deliver_file(abs_path, request_path)
+
+        width = request.args.get('w', THUMB_DEFAULT_WIDTH, type=int)
+        width = thumbnails.clamp_width(max(width, 1), THUMB_WIDTHS)
+        fmt = thumbnails.choose_format(request.headers.get('Accept'))
+
+        try:
+            thumb_path = thumb_cache.get(abs_path, width, fmt)
+        except Exception as e:
+            app.logger.warning("生成缩略图 %s 失败: %s", abs_path, e)
+            return deliver_file(abs_path, request_path)
+
+        # 缓存文件名由 路径+mtime+大小+宽度+格式 决定，可直接作为强 ETag
+        response = send_file(
+            thumb_path,
+            mimetype=f'image/{fmt}',
+            etag=thumb_path.name,
+            max_age=86400,
+            conditional=True,
+        )
+        response.vary.add('Accept')
+        return response
+
+
+class ZipView(MethodView):
+    """列表页多选后打包下载：表单 POST 选中的条目名（name 字段可重复），避免 URL 过长"""
+
+    def post(self, p=''):
+        request_path, abs_path = resolve_request_path(p)
+        if request_path is None:
+            return "禁止访问", 403
+        if not abs_path.is_dir():
+            return "目标路径不是一个有效的目录", 400
+        names = request.form.getlist('name')
+        if not names:
+            return "没有选择要下载的条目", 400
+        return zip_response(abs_path, request_path, names)
+
+
+class ListingApiView(MethodView):
+    """
+    分页的目录列表 JSON 接口：/_list/<路径>?section=items|images&offset=&limit=&sort=&order=
+
+    format=compact 时 entries 按列返回（见 compact_entries），体积更小，前端翻页使用这种格式。
+    """
+
+    def get(self, p=''):
+        request_path, abs_path = resolve_request_path(p)
+        if request_path is None:
+            return jsonify(error="禁止访问"), 403
+        if not abs_path.is_dir():
+            return jsonify(error="目录未找到"), 404
+
+        section = request.args.get('section', 'items')
+        if section not in ('items', 'images'):
+            return jsonify(error="section 只能是 items 或 images"), 400
+
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        limit = request.args.get('limit', LISTING_PAGE_SIZE, type=int)
+        limit = min(max(limit, 1), LISTING_MAX_LIMIT)
+        sort_by, order = parse_sort_args(request.args)
+
+        listing = get_listing(abs_path)
+        totals, children = folder_totals(request_path, listing)
+        listing = listing_with_totals_etag(listing, totals)
+        if listing_not_modified(listing):
+            return not_modified_response(listing)
+
+        if section == 'images':
+            entries = sort_entries(listing.images, sort_by, order)
+        else:
+            entries = sort_entries(apply_folder_totals(listing.items, children), sort_by, order)
+        compact = request.args.get('format') == 'compact'
+
+        response = jsonify(
+            path=str(request_path),
+            section=section,
+            sort=sort_by,
+            order=order,
+            **listing_page(entries, offset, limit, compact=compact),
+        )
+        return set_listing_cache_headers(response, listing)
+
+
+class SearchView(MethodView):
+    """文件名搜索：/_search?q=关键词或glob&path=限定目录&limit="""
+
+    def get(self):
+        index = get_search_index()
+        if index is None:
+            return jsonify(error="搜索未启用"), 404
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify(error="缺少搜索关键词 q"), 400
+        request_path, _ = resolve_request_path(request.args.get('path', '') or '.')
+        if request_path is None:
+            return jsonify(error="禁止访问"), 403
+        limit = min(max(request.args.get('limit', SEARCH_MAX_RESULTS, type=int), 1), SEARCH_MAX_RESULTS)
+
+        start = time.perf_counter()
+        try:
+            results = index.search(query, limit=limit + 1, under=index_path(request_path))
+        except sqlite3.Error as e:
+            app.logger.warning("搜索失败: %s", e)
+            return jsonify(error="搜索索引暂时不可用"), 503
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        entries = []
+        for r in results[:limit]:
+            if r.is_dir:
+                file_type, icon = 'folder', ICONS['folder']
+            else:
+                file_type, icon = get_file_type_and_icon(r.name, (FILE_ROOT / r.path).parent)
+            entries.append({
+                'path': r.path, 'name': r.name, 'is_dir': r.is_dir, 'size': r.size, 'mtime': r.mtime,
+                'type': file_type, 'icon': icon,
+            })
+        entries = formatting.with_human_fields(entries)
+        response = jsonify(
+            query=query,
+            path=index_path(request_path),
+            entries=entries,
+            truncated=len(results) > limit,
+            elapsed_ms=round(elapsed_ms, 2),
+            # 索引从未完成过一次刷新时结果可能不完整
+            indexed_at=index.refreshed_at(),
+            indexing=index.refreshing,
+        )
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+
+class HashView(MethodView):
+    """文件校验值：/_hash/<路径>?algo=sha256[,blake2b,...]；路径是目录时返回其中每个文件的校验值"""
+
+    def get(self, p=''):
+        request_path, abs_path = resolve_request_path(p)
+        if request_path is None:
+            return jsonify(error="禁止访问"), 403
+        algorithms = tuple(dict.fromkeys(
+            a.strip().lower() for a in request.args.get('algo', HASH_DEFAULT_ALGORITHM).split(',') if a.strip()))
+        unsupported = [a for a in algorithms if a not in available_algorithms()]
+        if not algorithms or unsupported:
+            return jsonify(error=f"不支持的校验算法: {', '.join(unsupported)}",
+                           algorithms=list(available_algorithms())), 400
+
+        service = get_hash_service()
+        start = time.perf_counter()
+        if abs_path.is_file():
+            try:
+                digests, cached = service.digests(abs_path, algorithms)
+                st = abs_path.stat()
+            except OSError as e:
+                app.logger.warning("计算校验值 %s 失败: %s", abs_path, e)
+                return jsonify(error="读取文件失败"), 500
+            response = jsonify(path=index_path(request_path), size=st.st_size, mtime=st.st_mtime,
+                               hashes=digests, cached=cached,
+                               elapsed_ms=round((time.perf_counter() - start) * 1000, 2))
+        elif abs_path.is_dir():
+            # 图片单独放在 listing.images 中，合并回去按名称（不区分大小写）排列
+            listing = get_listing(abs_path)
+            files = sorted([e for e in listing.items if not e['is_dir']] + listing.images,
+                           key=lambda e: e['name'].lower())[:HASH_MAX_FILES + 1]
+            results = service.digests_many([abs_path / e['name'] for e in files[:HASH_MAX_FILES]], algorithms)
+            entries = []
+            for e, (_, digests) in zip(files, results):
+                entry = {'name': e['name'], 'size': e['size']}
+                if isinstance(digests, Exception):
+                    entry['error'] = "读取文件失败"
+                else:
+                    entry['hashes'] = digests
+                entries.append(entry)
+            response = jsonify(path=index_path(request_path), entries=entries,
+                               truncated=len(files) > HASH_MAX_FILES,
+                               elapsed_ms=round((time.perf_counter() - start) * 1000, 2))
+        else:
+            return jsonify(error="文件未找到"), 404
+        # 文件随时可能被改写，每次都重新校验（命中缓存时很快）
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+
+def listing_cache_metrics():
+    stats = listing_cache.stats()
+    for key in ('hits', 'misses', 'invalidations', 'evictions'):
+        yield (f'file_server_listing_cache_{key}_total', 'counter', f'目录列表缓存 {key}', None, stats[key])
+    yield 'file_server_listing_cache_dirs', 'gauge', '目录列表缓存中的目录数', None, stats['dirs']
+    yield 'file_server_listing_cache_entries', 'gauge', '目录列表缓存中的条目总数', None, stats['weight']
+
+
+metrics.registry.add_collector(listing_cache_metrics)
+
+
+class MetricsView(MethodView):
+    """Prometheus 抓取接口：/_metrics"""
+
+    def get(self):
+        if not metrics.registry.enabled:
+            return "监控指标未启用", 404
+        response = Response(metrics.registry.render(), mimetype='text/plain')
+        response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+
+profile_store = profiling.ProfileStore(PROFILE_KEEP)
+
+
+class ProfilesView(MethodView):
+    """已保存的分析结果：/_profiles 列表，/_profiles/<id> 文本报告（?sort=tottime），?format=prof 下载 pstats 文件"""
+
+    def get(self, profile_id=None):
+        if not PROFILING_ENABLED:
+            return "性能分析未启用", 404
+        if not profiling.check_token(request.environ, PROFILE_TOKEN):
+            return "需要管理令牌", 403
+        if profile_id is None:
+            response = jsonify(profiles=[r.summary() for r in profile_store.records()],
+                               sample_rate=PROFILE_SAMPLE_RATE)
+        else:
+            record = profile_store.get(profile_id)
+            if record is None:
+                return "分析结果不存在", 404
+            if request.args.get('format') == 'prof':
+                response = Response(record.prof_bytes(), mimetype='application/octet-stream')
+                response.headers.set('Content-Disposition', 'attachment', filename=f"request-{record.id}.prof")
+            else:
+                sort = request.args.get('sort', 'cumulative')
+                if sort not in ('cumulative', 'tottime', 'calls', 'ncalls'):
+                    sort = 'cumulative'
+                response = Response(record.report(sort), mimetype='text/plain')
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+
 # 注册视图
+app.add_url_rule('/_uploads', view_func=UploadCreateView.as_view('upload_create'))
+app.add_url_rule('/_uploads/<upload_id>', view_func=UploadSessionView.as_view('upload_session'))
+app.add_url_rule('/_list/', view_func=ListingApiView.as_view('listing_api'))
+app.add_url_rule('/_list/<path:p>', view_func=ListingApiView.as_view('listing_api_path'))
+app.add_url_rule('/_thumb/<path:p>', view_func=ThumbnailView.as_view('thumbnail_view'))
+app.add_url_rule('/_zip/', view_func=ZipView.as_view('zip_view'))
+app.add_url_rule('/_zip/<path:p>', view_func=ZipView.as_view('zip_view_path'))
+app.add_url_rule('/_search', view_func=SearchView.as_view('search_view'))
+app.add_url_rule('/_hash/', view_func=HashView.as_view('hash_view'))
+app.add_url_rule('/_metrics', view_func=MetricsView.as_view('metrics_view'))
+app.add_url_rule('/_profiles', view_func=ProfilesView.as_view('profiles_view'))
+app.add_url_rule('/_profiles/<int:profile_id>', view_func=ProfilesView.as_view('profile_view'))
+app.add_url_rule('/_hash/<path:p>', view_func=HashView.as_view('hash_view_path'))
+
 file_server_view = FileServerView.as_view('file_server_view')
 app.add_url_rule('/', view_func=file_server_view)
 app.add_url_rule('/<path:p>', view_func=file_server_view)
 
-if __name__ == '__main__':
-    # 确保根目录存在
-    FILE_ROOT = Path('F:/').resolve()
 
+def install_profiler():
+    """PROFILING_ENABLED 且设置了令牌时，在 Flask 外面包上 ProfilingMiddleware（只包一次）"""
+    if not (PROFILING_ENABLED and PROFILE_TOKEN):
+        return
+    if not isinstance(app.wsgi_app, profiling.ProfilingMiddleware):
+        app.wsgi_app = profiling.ProfilingMiddleware(app.wsgi_app, profile_store, PROFILE_TOKEN,
+                                                     PROFILE_SAMPLE_RATE)
+
+
+def create_app(root=None, watch=True):
+    """
+    应用工厂：设置文件根目录（默认 FILE_ROOT），确保其存在，返回 app
+
+    watch=False 时不启动 inotify 监听和搜索索引线程，由调用方在合适的进程中调用 start_background_tasks()。
+    生产环境请用 python -m file_server.serve 启动，它会调用这里并配置好 gunicorn。
+    """
+    global FILE_ROOT
+    if root is not None:
+        FILE_ROOT = Path(root).resolve()
     if not FILE_ROOT.exists():
         print(f"警告：根目录 '{FILE_ROOT}' 不存在。将为您创建它。")
         FILE_ROOT.mkdir(parents=True, exist_ok=True)
+    install_profiler()
+    if watch:
+        start_background_tasks()
+    return app
 
-    # 打印访问地址
-    print(f"文件服务已启动，根目录为: {FILE_ROOT}")
-    print("请在浏览器中访问以下地址之一:")
 
-    # 在生产环境中，推荐使用 Gunicorn 或其他 WSGI 服务器
-    # gunicorn -w 4 -b 0.0.0.0:5050 file_server_bs5:app
-    app.run(host='0.0.0.0', port=5050, debug=True)
+if __name__ == '__main__':
+    # 开发服务器：python new_file_server.py [根目录]，生产环境请用 python -m file_server.serve
+    import sys
+
+    create_app(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"文件服务已启动，根目录为: {FILE_ROOT}")
+    app.run(host='0.0.0.0', port=int(os.environ.get('FILE_SERVER_PORT', 5050)),
+            debug=os.environ.get('FLASK_DEBUG') == '1')
@@ -7,6 +7,15 @@ document.addEventListener('DOMContentLoaded', function () {
         autoplayVideos: true,
     });
 
+    // 大目录的无限滚动：首屏只有一页，滚动到底部时从 /_list 接口继续加载
+    setupInfiniteScroll(lightbox);
+
+    // 多选打包下载
+    setupZipDownload();
+
+    // 文件名搜索
+    setupSearch();
+
     // 处理文件上传
     const uploadForm = document.getElementById('upload-form');
     const submitButton = document.getElementById('submit-upload');
@@ -26,19 +35,15 @@ document.addEventListener('DOMContentLoaded', function () {
             submitButton.innerHTML = `<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> 上传中...`;
             uploadStatus.innerHTML = '';
 
-            const formData = new FormData(uploadForm);
+            // 逐个文件分块上传，每个文件的分块并行发送，失败自动重试，中断后可续传
+            const uploadPath = document.getElementById('listing-meta').dataset.path;
+            const files = Array.from(fileInput.files);
+            const progress = new UploadProgress(files.reduce((sum, file) => sum + file.size, 0));
 
-            fetch(uploadForm.action, {
-                method: 'POST',
-                body: formData,
-            })
-            .then(response => {
-                if (response.ok) {
-                    return response.text(); // 或者 response.json() 如果后端返回 JSON
-                }
-                // 如果服务器返回错误，则抛出错误
-                return response.text().then(text => { throw new Error(text) });
-            })
+            files.reduce(
+                (previous, file) => previous.then(() => uploadFileChunked(uploadPath, file, progress)),
+                Promise.resolve()
+            )
             .then(data => {
                 uploadStatus.innerHTML = `<div class="alert alert-success">文件上传成功！页面即将刷新。</div>`;
                 // 2秒后关闭模态框并刷新页面
@@ -49,7 +54,7 @@ document.addEventListener('DOMContentLoaded', function () {
             })
             .catch(error => {
                 console.error('上传失败:', error);
-                uploadStatus.innerHTML = `<div class="alert alert-danger">上传失败: ${error.message}</div>`;
+                uploadStatus.innerHTML = `<div class="alert alert-danger">上传失败: ${escapeHtml(error.message)}（重新上传同一文件会从断点继续）</div>`;
             })
             .finally(() => {
                 // 恢复按钮状态
@@ -58,4 +63,420 @@ document.addEventListener('DOMContentLoaded', function () {
             });
         });
     }
-});
\ No newline at end of file
+});
+
+// 分块上传：并发数和单个分块的最大重试次数
+const UPLOAD_CONCURRENCY = 3;
+const UPLOAD_MAX_RETRIES = 5;
+
+// 上传进度条，按已确认写入服务器的字节数计算
+class UploadProgress {
+    constructor(total) {
+        this.total = total;
+        this.loaded = 0;
+        this.container = document.getElementById('upload-progress');
+        this.bar = this.container.querySelector('.progress-bar');
+        this.container.classList.remove('d-none');
+        this.render();
+    }
+
+    add(bytes) {
+        this.loaded += bytes;
+        this.render();
+    }
+
+    render() {
+        const percent = this.total ? Math.floor(this.loaded * 100 / this.total) : 100;
+        this.bar.style.width = `${percent}%`;
+        this.bar.textContent = `${percent}%`;
+        this.container.setAttribute('aria-valuenow', percent);
+    }
+}
+
+async function requestJson(url, options) {
+    const response = await fetch(url, options);
+    if (!response.ok) {
+        let message = `HTTP ${response.status}`;
+        try {
+            message = (await response.json()).error || message;
+        } catch (e) {
+            // 非 JSON 错误页，使用状态码
+        }
+        const error = new Error(message);
+        error.status = response.status;
+        throw error;
+    }
+    return response.json();
+}
+
+// 网络错误和 5xx 按指数退避重试，4xx 直接失败
+async function withRetry(task) {
+    for (let attempt = 0; ; attempt++) {
+        try {
+            return await task(attempt);
+        } catch (error) {
+            const clientError = error.status >= 400 && error.status < 500;
+            if (clientError || attempt >= UPLOAD_MAX_RETRIES) {
+                throw error;
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** attempt));
+        }
+    }
+}
+
+// 同一目录、同名、同大小、同修改时间的文件视为同一次上传，可以续传
+function uploadStorageKey(path, file) {
+    return `upload:${path}:${file.name}:${file.size}:${file.lastModified}`;
+}
+
+async function startOrResumeUpload(path, file) {
+    const key = uploadStorageKey(path, file);
+    const savedId = localStorage.getItem(key);
+    if (savedId) {
+        try {
+            return await requestJson(`/_uploads/${savedId}`);
+        } catch (error) {
+            localStorage.removeItem(key);  // 已过期或已完成，重新开始
+        }
+    }
+    const status = await withRetry(() => requestJson('/_uploads', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ path: path, filename: file.name, size: file.size }),
+    }));
+    localStorage.setItem(key, status.id);
+    return status;
+}
+
+async function uploadFileChunked(path, file, progress) {
+    const status = await startOrResumeUpload(path, file);
+    const chunkSize = status.chunk_size;
+    const chunkCount = Math.max(1, Math.ceil(file.size / chunkSize));
+    const chunkLength = index => Math.min(chunkSize, file.size - index * chunkSize);
+
+    const received = new Set(status.received);
+    const pending = [];
+    for (let index = 0; index < chunkCount; index++) {
+        if (received.has(index)) {
+            progress.add(chunkLength(index));
+        } else {
+            pending.push(index);
+        }
+    }
+
+    const sendChunk = index => {
+        const offset = index * chunkSize;
+        return withRetry(attempt => requestJson(`/_uploads/${status.id}`, {
+            method: 'PATCH',
+            headers: { 'Upload-Offset': String(offset) },
+            body: file.slice(offset, offset + chunkLength(index)),
+        }).catch(error => {
+            // 重试时上一次请求可能已经写入并完成了整个文件，上传记录随之被删除
+            if (error.status === 404 && attempt > 0) {
+                return { complete: true };
+            }
+            throw error;
+        }));
+    };
+
+    const worker = async () => {
+        while (pending.length > 0) {
+            const index = pending.shift();
+            await sendChunk(index);
+            progress.add(chunkLength(index));
+        }
+    };
+
+    const workers = [];
+    for (let i = 0; i < Math.min(UPLOAD_CONCURRENCY, pending.length); i++) {
+        workers.push(worker());
+    }
+    await Promise.all(workers);
+    localStorage.removeItem(uploadStorageKey(path, file));
+}
+
+// 把相对路径转换为 URL 路径：逐段编码（文件名中的 #、?、% 等不会破坏 URL），空路径返回 ''
+function encodePath(path) {
+    return path ? '/' + path.split('/').map(encodeURIComponent).join('/') : '';
+}
+
+// 转义 HTML 特殊字符，避免文件名被当作标签解析
+function escapeHtml(text) {
+    return String(text).replace(/[&<>"']/g, ch => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[ch]);
+}
+
+// 与 index.html 中图片卡片的结构保持一致
+function renderImageCard(basePath, entry) {
+    const url = `${basePath}/${encodeURIComponent(entry.name)}`;
+    const thumb = `/_thumb${url}`;
+    const name = escapeHtml(entry.name);
+    return `
+        <div class="col">
+            <div class="card h-100 shadow-sm image-card">
+                <a href="${url}" class="glightbox" data-type="image" data-gallery="image-gallery" data-title="${name}">
+                    <img src="${thumb}?w=200" srcset="${thumb}?w=200 1x, ${thumb}?w=400 2x"
+                         class="card-img-top" alt="${name}" loading="lazy" decoding="async">
+                </a>
+                <div class="card-body">
+                    <p class="card-text small text-truncate">
+                        <input class="form-check-input me-1 select-entry" type="checkbox" value="${name}" aria-label="选择 ${name}">${name}
+                    </p>
+                </div>
+            </div>
+        </div>`;
+}
+
+// 与 index.html 中文件列表行的结构保持一致
+function renderItemRow(basePath, entry) {
+    const url = `${basePath}/${encodeURIComponent(entry.name)}`;
+    const downloadable = ['ebook', 'pdf', 'text', 'archive'].includes(entry.type);
+    return `
+        <div class="list-group-item list-group-item-action d-flex justify-content-between align-items-center">
+            <input class="form-check-input me-2 flex-shrink-0 select-entry" type="checkbox" value="${escapeHtml(entry.name)}" aria-label="选择 ${escapeHtml(entry.name)}">
+            <a href="${url}${entry.is_dir ? '/' : ''}" class="text-decoration-none text-dark flex-grow-1 text-truncate">
+                <i class="${entry.icon} me-2 text-primary"></i>
+                <span class="fw-bold">${escapeHtml(entry.name)}</span>
+            </a>
+            <div class="text-muted small d-flex align-items-center">
+                ${!entry.is_dir ? `<span class="me-3">${entry.size_h}</span>`
+                    : entry.file_count !== undefined ? `<span class="me-3" title="${entry.file_count} 个文件">${entry.size_h}</span>` : ''}
+                <span class="me-3">${entry.mtime_h}</span>
+                ${downloadable ? `<a href="${url}?dl=1" class="btn btn-sm btn-outline-success" title="下载"><i class="bi bi-download"></i></a>` : ''}
+            </div>
+        </div>`;
+}
+
+// 把 /_list?format=compact 按列存放的条目还原成 renderItemRow / renderImageCard 使用的对象
+function decodeCompactEntries(data) {
+    const columns = data.entries;
+    return columns.name.map((name, i) => {
+        const [type, icon] = data.types[columns.type[i]];
+        const entry = {
+            name: name,
+            size: columns.size[i],
+            mtime: columns.mtime[i],
+            type: type,
+            icon: icon,
+            is_dir: type === 'folder',
+            size_h: columns.size_h[i],
+            mtime_h: columns.mtime_h[i],
+        };
+        if (columns.file_count && columns.file_count[i] !== null) {
+            entry.file_count = columns.file_count[i];
+        }
+        return entry;
+    });
+}
+
+function renderEntries(section, basePath, data) {
+    const render = section === 'images' ? renderImageCard : renderItemRow;
+    return decodeCompactEntries(data).map(entry => render(basePath, entry)).join('');
+}
+
+function setupInfiniteScroll(lightbox) {
+    const meta = document.getElementById('listing-meta');
+    if (!meta) {
+        return;
+    }
+    // 已编码的目录 URL 路径，后面直接拼接编码后的条目名
+    const basePath = encodePath(meta.dataset.path);
+    // 由浏览器渲染时，服务端把首页条目嵌入在页面中
+    const dataElement = document.getElementById('listing-data');
+    const initial = dataElement ? JSON.parse(dataElement.textContent) : null;
+
+    document.querySelectorAll('[data-infinite-section]').forEach(container => {
+        const section = container.dataset.infiniteSection;
+        const total = parseInt(container.dataset.total, 10);
+        let nextOffset = parseInt(container.dataset.nextOffset, 10);
+        let loading = false;
+
+        if (initial && initial[section]) {
+            container.insertAdjacentHTML('beforeend', renderEntries(section, basePath, initial[section]));
+            if (section === 'images') {
+                lightbox.reload();
+            }
+            nextOffset = initial[section].next_offset;
+        }
+        if (nextOffset === null || nextOffset >= total || !('IntersectionObserver' in window)) {
+            return;
+        }
+
+        // 在列表末尾放一个哨兵元素，进入视口时加载下一页
+        const sentinel = document.createElement('div');
+        sentinel.className = 'text-center text-muted small py-3';
+        sentinel.textContent = '加载中...';
+        container.after(sentinel);
+
+        const observer = new IntersectionObserver(entries => {
+            if (!entries[0].isIntersecting || loading || nextOffset === null) {
+                return;
+            }
+            loading = true;
+            const params = new URLSearchParams({
+                section: section,
+                offset: nextOffset,
+                limit: meta.dataset.pageSize,
+                sort: meta.dataset.sort,
+                order: meta.dataset.order,
+                format: 'compact',
+            });
+            fetch(`/_list${basePath}?${params}`)
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`HTTP ${response.status}`);
+                    }
+                    return response.json();
+                })
+                .then(data => {
+                    container.insertAdjacentHTML('beforeend', renderEntries(section, basePath, data));
+                    if (section === 'images') {
+                        lightbox.reload();
+                    }
+                    nextOffset = data.next_offset;
+                    if (nextOffset === null) {
+                        observer.disconnect();
+                        sentinel.remove();
+                    } else {
+                        // 重新观察一次，哨兵仍在视口内时会立即触发下一页
+                        observer.unobserve(sentinel);
+                        observer.observe(sentinel);
+                    }
+                })
+                .catch(error => {
+                    console.error('加载更多条目失败:', error);
+                    sentinel.textContent = '加载失败，请刷新页面重试';
+                    observer.disconnect();
+                })
+                .finally(() => {
+                    loading = false;
+                });
+        }, { rootMargin: '600px' });
+
+        observer.observe(sentinel);
+    });
+}
+
+// 勾选条目后，“打包下载”按钮改为下载选中的条目（POST 到 /_zip，条目多时也不会超出 URL 长度）
+function setupZipDownload() {
+    const button = document.getElementById('zip-download');
+    const form = document.getElementById('zip-form');
+    if (!button || !form) {
+        return;
+    }
+    const label = button.querySelector('span');
+
+    function selectedNames() {
+        return Array.from(document.querySelectorAll('.select-entry:checked'), input => input.value);
+    }
+
+    // 无限滚动加载的条目也要响应，所以在 document 上监听
+    document.addEventListener('change', event => {
+        if (!event.target.classList.contains('select-entry')) {
+            return;
+        }
+        const count = selectedNames().length;
+        label.textContent = count ? `下载选中 (${count})` : '打包下载';
+    });
+
+    button.addEventListener('click', event => {
+        const names = selectedNames();
+        if (names.length === 0) {
+            return;  // 未勾选：按链接下载整个文件夹
+        }
+        event.preventDefault();
+        form.replaceChildren(...names.map(name => {
+            const input = document.createElement('input');
+            input.type = 'hidden';
+            input.name = 'name';
+            input.value = name;
+            return input;
+        }));
+        form.submit();
+    });
+}
+
+// 搜索结果行：显示文件名和所在目录，链接到完整路径
+function renderSearchResult(entry) {
+    const url = encodePath(entry.path);
+    const parent = entry.path.includes('/') ? entry.path.slice(0, entry.path.lastIndexOf('/')) : '';
+    return `
+        <div class="list-group-item list-group-item-action d-flex justify-content-between align-items-center">
+            <a href="${url}${entry.is_dir ? '/' : ''}" class="text-decoration-none text-dark flex-grow-1 text-truncate">
+                <i class="${entry.icon} me-2 text-primary"></i>
+                <span class="fw-bold">${escapeHtml(entry.name)}</span>
+                <span class="text-muted small ms-2">/${escapeHtml(parent)}</span>
+            </a>
+            <div class="text-muted small d-flex align-items-center">
+                ${entry.is_dir ? '' : `<span class="me-3">${entry.size_h}</span>`}
+                <span>${entry.mtime_h}</span>
+            </div>
+        </div>`;
+}
+
+// 输入停顿后请求 /_search，只显示最后一次请求的结果
+function setupSearch() {
+    const input = document.getElementById('search-input');
+    const results = document.getElementById('search-results');
+    const meta = document.getElementById('listing-meta');
+    if (!input || !results || !meta) {
+        return;
+    }
+    const list = document.getElementById('search-list');
+    const summary = document.getElementById('search-summary');
+    const content = document.getElementById('listing-content');
+    let timer = null;
+    let controller = null;
+
+    function showListing() {
+        results.hidden = true;
+        content.hidden = false;
+    }
+
+    function search(query) {
+        if (controller) {
+            controller.abort();
+        }
+        controller = new AbortController();
+        const params = new URLSearchParams({ q: query, path: meta.dataset.path });
+        fetch(`/_search?${params}`, { signal: controller.signal })
+            .then(response => response.json().then(data => {
+                if (!response.ok) {
+                    throw new Error(data.error || `HTTP ${response.status}`);
+                }
+                return data;
+            }))
+            .then(data => {
+                list.innerHTML = data.entries.map(renderSearchResult).join('');
+                let text = `${data.entries.length}${data.truncated ? '+' : ''} 项，${data.elapsed_ms} ms`;
+                if (data.indexing || data.indexed_at === null) {
+                    text += '（索引更新中，结果可能不完整）';
+                }
+                summary.textContent = text;
+                results.hidden = false;
+                content.hidden = true;
+            })
+            .catch(error => {
+                if (error.name === 'AbortError') {
+                    return;
+                }
+                list.innerHTML = '';
+                summary.textContent = `搜索失败: ${error.message}`;
+                results.hidden = false;
+            });
+    }
+
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        const query = input.value.trim();
+        if (!query) {
+            if (controller) {
+                controller.abort();
+            }
+            showListing();
+            return;
+        }
+        timer = setTimeout(() => search(query), 250);
+    });
+}
@@ -0,0 +1,40 @@
+"""
+测试公共设置
+
+new_file_server 在导入时按 Path.home() 决定缩略图、哈希和搜索索引的缓存目录，
+所以先把 HOME 换成临时目录再导入，测试不会读写真实的 ~/.cache。
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+_HOME = tempfile.mkdtemp(prefix='file_server_test_home_')
+os.environ['HOME'] = _HOME
+
+import new_file_server  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_HOME, ignore_errors=True)
+
+
+@pytest.fixture
+def file_root(tmp_path):
+    root = tmp_path / 'root'
+    root.mkdir()
+    return root
+
+
+@pytest.fixture
+def client(file_root):
+    """以 file_root 为根目录的 test client（不启动后台线程）"""
+    app = new_file_server.create_app(file_root, watch=False)
+    return app.test_client()
@@ -0,0 +1,45 @@
+"""网页和 GUI 共用的文件类型表：按扩展名分类、没有扩展名时按文件头判断"""
+
+import pytest
+
+import new_file_server
+from gui_file_server.file_types import sniff_bytes
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('photo.JPG', 'image'),
+    ('scan.tiff', 'image'),
+    ('notes.txt', 'text'),
+    ('README.md', 'text'),
+    ('paper.pdf', 'pdf'),
+    ('novel.epub', 'ebook'),
+    ('report.docx', 'office'),
+    ('setup.exe', 'executable'),
+    ('unknown.xyz', 'file'),
+])
+def test_classify_by_extension(name, expected):
+    assert new_file_server.file_types.classify(name).type == expected
+
+
+@pytest.mark.parametrize('data, expected', [
+    (b'\x89PNG\r\n\x1a\n' + b'\x00' * 16, 'image'),
+    (b'%PDF-1.7\n', 'pdf'),
+    (b'PK\x03\x04' + b'\x00' * 26, 'archive'),
+    (b'plain text\n', 'text'),
+    (b'BMP is not a bitmap header', 'text'),
+    (b'\x00\x01\x02\x03', None),
+])
+def test_sniff_bytes(data, expected):
+    found = sniff_bytes(data)
+    assert (found[0] if found else None) == expected
+
+
+def test_listing_type_field(client, file_root):
+    (file_root / 'notes.txt').write_text('x')
+    (file_root / 'paper.pdf').write_bytes(b'%PDF-1.4')
+    (file_root / 'camera_export').write_bytes(b'\xff\xd8\xff\xe0' + b'\x00' * 32)
+    items = client.get('/_list/').json['entries']
+    assert {e['name']: e['type'] for e in items} == {'notes.txt': 'text', 'paper.pdf': 'pdf'}
+    # 没有扩展名的 JPEG 按文件头识别为图片，出现在图片部分
+    images = client.get('/_list/?section=images').json['entries']
+    assert [(e['name'], e['type']) for e in images] == [('camera_export', 'image')]
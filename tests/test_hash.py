@@ -0,0 +1,43 @@
+"""/_hash：单个文件和目录的校验值"""
+
+import hashlib
+
+FILES = {
+    'b_photo.jpg': b'\xff\xd8\xff\xe0 not really a jpeg',
+    'A_notes.txt': b'hello',
+    'c_icon.PNG': b'\x89PNG\r\n\x1a\n fake png',
+    'd_archive.zip': b'PK\x03\x04 fake zip',
+}
+
+
+def test_hash_file(client, file_root):
+    (file_root / 'a.txt').write_bytes(b'hello')
+    response = client.get('/_hash/a.txt?algo=sha256')
+    assert response.status_code == 200
+    assert response.json['hashes'] == {'sha256': hashlib.sha256(b'hello').hexdigest()}
+
+
+def test_hash_directory_includes_images(client, file_root):
+    folder = file_root / 'mixed'
+    folder.mkdir()
+    (folder / 'sub').mkdir()
+    for name, data in FILES.items():
+        (folder / name).write_bytes(data)
+
+    response = client.get('/_hash/mixed?algo=sha256')
+    assert response.status_code == 200
+    entries = response.json['entries']
+    assert [e['name'] for e in entries] == sorted(FILES, key=str.lower)
+    for entry in entries:
+        assert entry['size'] == len(FILES[entry['name']])
+        assert entry['hashes']['sha256'] == hashlib.sha256(FILES[entry['name']]).hexdigest()
+
+
+def test_hash_directory_with_only_images(client, file_root):
+    folder = file_root / 'pics'
+    folder.mkdir()
+    (folder / 'one.jpg').write_bytes(b'1')
+    (folder / 'two.png').write_bytes(b'2')
+
+    response = client.get('/_hash/pics')
+    assert [e['name'] for e in response.json['entries']] == ['one.jpg', 'two.png']
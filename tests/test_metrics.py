@@ -0,0 +1,31 @@
+"""下载（direct_passthrough 响应）发送完毕后记录耗时指标"""
+
+
+def _count(client, prefix):
+    text = client.get('/_metrics').get_data(as_text=True)
+    total = 0.0
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            total += float(line.rsplit(' ', 1)[1])
+    return total
+
+
+SEND = 'file_server_send_duration_seconds_count'
+REQUEST = 'file_server_request_duration_seconds_count{route="/<path:p>",method="GET"}'
+
+
+def test_download_records_durations(client, file_root):
+    (file_root / 'a.bin').write_bytes(b'x' * 4096)
+    send_before = _count(client, SEND)
+    request_before = _count(client, REQUEST)
+
+    response = client.get('/a.bin')
+    assert response.status_code == 200
+    response.close()
+
+    response = client.get('/a.bin', headers={'Range': 'bytes=0-99'})
+    assert response.status_code == 206
+    response.close()
+
+    assert _count(client, SEND) == send_before + 2
+    assert _count(client, REQUEST) == request_before + 2
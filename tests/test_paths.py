@@ -0,0 +1,38 @@
+"""resolve_request_path：绝对路径、.. 和指向根目录之外的符号链接一律返回 403"""
+
+import os
+
+
+def _create_upload(client, path):
+    return client.post('/_uploads', json={'path': path, 'filename': 'evil.txt', 'size': 3})
+
+
+def test_absolute_upload_path_is_rejected(client, tmp_path):
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    response = _create_upload(client, str(outside))
+    assert response.status_code == 403
+    assert not (outside / 'evil.txt').exists()
+
+
+def test_symlink_out_of_root_is_rejected(client, file_root, tmp_path):
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    (outside / 'secret.txt').write_text('secret')
+    os.symlink(outside, file_root / 'link')
+
+    assert _create_upload(client, 'link').status_code == 403
+    assert client.get('/link/secret.txt').status_code == 403
+    assert client.get('/link/').status_code == 403
+
+
+def test_dotdot_is_rejected(client):
+    assert _create_upload(client, '../').status_code == 403
+
+
+def test_symlink_inside_root_is_allowed(client, file_root):
+    (file_root / 'real').mkdir()
+    (file_root / 'real' / 'a.txt').write_text('a')
+    os.symlink(file_root / 'real', file_root / 'alias')
+    assert client.get('/alias/a.txt').status_code == 200
+    assert _create_upload(client, 'alias').status_code == 201
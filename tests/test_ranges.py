@@ -0,0 +1,133 @@
+"""file_server.ranges：Range 解析、区间合并、416、multipart/byteranges 以及与条件请求的顺序"""
+
+import re
+
+import pytest
+
+from file_server.ranges import parse_ranges, resolve_ranges
+
+DATA = bytes(range(256)) * 40  # 10240 字节
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-9', [(0, 10)]),
+    ('bytes=100-', [(100, None)]),
+    ('bytes=-500', [(-500, None)]),
+    ('bytes= 0-0 , 5-9', [(0, 1), (5, 10)]),
+    ('bytes=50-59,0-9', [(50, 60), (0, 10)]),
+    ('BYTES=1-2', [(1, 3)]),
+    ('bytes=-0', None),
+    ('bytes=9-0', None),
+    ('bytes=a-b', None),
+    ('bytes=1', None),
+    ('bytes=-', None),
+    ('bytes=', None),
+    ('items=0-9', None),
+])
+def test_parse_ranges(header, expected):
+    assert parse_ranges(header) == expected
+
+
+@pytest.mark.parametrize('ranges, expected', [
+    ([(0, 10)], [(0, 10)]),
+    ([(0, None)], [(0, 100)]),
+    ([(-10, None)], [(90, 100)]),
+    ([(-500, None)], [(0, 100)]),
+    ([(50, 1000)], [(50, 100)]),
+    # 重叠、相邻、乱序的区间合并为一段
+    ([(0, 10), (5, 20)], [(0, 20)]),
+    ([(10, 20), (0, 10)], [(0, 20)]),
+    ([(30, 40), (0, 10), (35, 50)], [(0, 10), (30, 50)]),
+    # 超出文件末尾的区间被丢弃
+    ([(100, 200)], []),
+    ([(100, None), (0, 5)], [(0, 5)]),
+])
+def test_resolve_ranges(ranges, expected):
+    assert resolve_ranges(ranges, 100) == expected
+
+
+@pytest.fixture
+def data_file(file_root):
+    (file_root / 'data.bin').write_bytes(DATA)
+    return '/data.bin'
+
+
+def test_single_range(client, data_file):
+    response = client.get(data_file, headers={'Range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 10-19/{len(DATA)}'
+    assert response.headers['Content-Length'] == '10'
+    assert response.data == DATA[10:20]
+
+
+def test_suffix_range(client, data_file):
+    response = client.get(data_file, headers={'Range': 'bytes=-100'})
+    assert response.status_code == 206
+    assert response.data == DATA[-100:]
+
+
+def test_overlapping_ranges_are_coalesced(client, data_file):
+    response = client.get(data_file, headers={'Range': 'bytes=0-99,50-149'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 0-149/{len(DATA)}'
+    assert response.data == DATA[:150]
+
+
+@pytest.mark.parametrize('header', ['bytes=20000-', 'bytes=5-1', 'bytes=abc'])
+def test_unsatisfiable_range(client, data_file, header):
+    response = client.get(data_file, headers={'Range': header})
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == f'bytes */{len(DATA)}'
+
+
+def test_multipart_byteranges(client, data_file):
+    response = client.get(data_file, headers={'Range': 'bytes=0-9,100-109,-5'})
+    assert response.status_code == 206
+    match = re.fullmatch(r'multipart/byteranges; boundary=(\w+)', response.headers['Content-Type'])
+    assert match
+    boundary = match.group(1).encode()
+    body = response.data
+    assert int(response.headers['Content-Length']) == len(body)
+    assert body.endswith(b'--' + boundary + b'--\r\n')
+
+    parts = body[:-len(b'--' + boundary + b'--\r\n')].split(b'--' + boundary + b'\r\n')
+    assert parts[0] == b''
+    expected = [(0, 10), (100, 110), (len(DATA) - 5, len(DATA))]
+    assert len(parts) - 1 == len(expected)
+    for part, (start, stop) in zip(parts[1:], expected):
+        head, _, payload = part.partition(b'\r\n\r\n')
+        assert b'Content-Type: application/octet-stream' in head
+        assert f'Content-Range: bytes {start}-{stop - 1}/{len(DATA)}'.encode() in head
+        assert payload == DATA[start:stop] + b'\r\n'
+
+
+def test_if_none_match_takes_precedence_over_range(client, data_file):
+    etag = client.get(data_file).headers['ETag']
+    response = client.get(data_file, headers={'If-None-Match': etag, 'Range': 'bytes=0-9'})
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_if_modified_since_takes_precedence_over_range(client, data_file):
+    last_modified = client.get(data_file).headers['Last-Modified']
+    response = client.get(data_file, headers={'If-Modified-Since': last_modified, 'Range': 'bytes=0-9'})
+    assert response.status_code == 304
+
+
+def test_stale_if_none_match_still_serves_range(client, data_file):
+    response = client.get(data_file, headers={'If-None-Match': '"stale"', 'Range': 'bytes=0-9'})
+    assert response.status_code == 206
+    assert response.data == DATA[:10]
+
+
+def test_if_range_mismatch_returns_full_file(client, data_file):
+    response = client.get(data_file, headers={'If-Range': '"stale"', 'Range': 'bytes=0-9'})
+    assert response.status_code == 200
+    assert response.data == DATA
+
+
+def test_if_range_match_serves_range(client, data_file):
+    etag = client.get(data_file).headers['ETag']
+    response = client.get(data_file, headers={'If-Range': etag, 'Range': 'bytes=0-9'})
+    assert response.status_code == 206
+    assert response.data == DATA[:10]
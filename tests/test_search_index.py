@@ -0,0 +1,69 @@
+"""gui_file_server.search_index：单个目录的刷新不遍历子树；上传只标记目录，不在请求中扫描"""
+
+import io
+
+import pytest
+
+import new_file_server
+from gui_file_server import search_index as search_index_module
+from gui_file_server.search_index import SearchIndex
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / 'tree'
+    for i in range(5):
+        sub = root / f'dir{i}' / 'nested'
+        sub.mkdir(parents=True)
+        (sub / f'file{i}.txt').write_text('x' * i)
+    (root / 'top.txt').write_text('top')
+    return root
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    """记录 _scan 被调用的目录"""
+    calls = []
+    original = search_index_module._scan
+
+    def counting(abs_dir, *args):
+        calls.append(abs_dir)
+        return original(abs_dir, *args)
+
+    monkeypatch.setattr(search_index_module, '_scan', counting)
+    return calls
+
+
+def test_refresh_directory_does_not_walk_subtree(tree, tmp_path, scans):
+    index = SearchIndex(tree, tmp_path / 'index.db')
+    index.refresh()
+    scans.clear()
+
+    (tree / 'new.txt').write_bytes(b'12345')
+    index.refresh_directory('')
+    assert scans == [str(tree)]
+    assert [r.path for r in index.search('new.txt')] == ['new.txt']
+    assert index.totals('').files == 7
+
+
+def test_refresh_directory_indexes_new_subdirectories(tree, tmp_path):
+    index = SearchIndex(tree, tmp_path / 'index.db')
+    index.refresh()
+
+    (tree / 'added' / 'deeper').mkdir(parents=True)
+    (tree / 'added' / 'deeper' / 'inside.txt').write_text('abc')
+    index.refresh_directory('')
+    assert [r.path for r in index.search('inside')] == ['added/deeper/inside.txt']
+    assert index.totals('added').files == 1
+
+
+def test_upload_marks_directory_dirty_without_scanning(client, file_root, monkeypatch, scans):
+    index = SearchIndex(file_root, file_root.parent / 'index.db')
+    monkeypatch.setattr(new_file_server, 'search_index', index)
+
+    response = client.post('/', data={'files[]': (io.BytesIO(b'data'), 'up.txt')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert (file_root / 'up.txt').read_bytes() == b'data'
+    assert scans == []
+    assert index._take_dirty() == {''}
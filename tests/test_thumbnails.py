@@ -0,0 +1,39 @@
+"""画廊缩略图磁盘缓存的 LRU 淘汰"""
+
+import pytest
+
+from file_server import thumbnails
+
+pytestmark = pytest.mark.skipif(not thumbnails.is_available(), reason='需要 Pillow')
+
+
+def _image(path, color):
+    thumbnails.Image.new('RGB', (64, 64), color).save(path)
+    return path
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache_dir = tmp_path / 'thumbs'
+    cache = thumbnails.ThumbnailCache(cache_dir, max_entries=2)
+    a, b, c = (_image(tmp_path / f'{name}.png', color)
+               for name, color in (('a', 'red'), ('b', 'green'), ('c', 'blue')))
+
+    thumb_a = cache.get(a, 200, 'jpeg')
+    thumb_b = cache.get(b, 200, 'jpeg')
+    assert cache.get(a, 200, 'jpeg') == thumb_a  # 命中后 a 成为最近使用
+    thumb_c = cache.get(c, 200, 'jpeg')
+
+    assert thumb_a.exists() and thumb_c.exists()
+    assert not thumb_b.exists()
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+def test_cache_counts_existing_files(tmp_path):
+    cache_dir = tmp_path / 'thumbs'
+    src = _image(tmp_path / 'a.png', 'red')
+    old = thumbnails.ThumbnailCache(cache_dir, max_entries=10).get(src, 200, 'jpeg')
+
+    # 重启后（新的索引）第一次写入时按已有文件计数并淘汰
+    cache = thumbnails.ThumbnailCache(cache_dir, max_entries=1)
+    new = cache.get(_image(tmp_path / 'b.png', 'green'), 200, 'jpeg')
+    assert new.exists() and not old.exists()
@@ -0,0 +1,45 @@
+"""file_server.zipstream：生成的 ZIP 流可以解压，deflate 使用 DEFLATE_LEVEL"""
+
+import io
+import os
+import zipfile
+import zlib
+
+from file_server.zipstream import DEFLATE_LEVEL, iter_zip, walk_entries
+
+# 可压缩但不是简单重复的数据，不同压缩级别的结果大小不同
+TEXT = b''.join(b'%d %x line of text\n' % (i * i, i) for i in range(50_000))
+
+
+def _build(tmp_path, compress_type):
+    (tmp_path / 'a.txt').write_bytes(TEXT)
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'b.bin').write_bytes(b'\x00\x01' * 1000)
+    os.utime(tmp_path / 'a.txt', (1_600_000_000, 1_600_000_000))
+    return b''.join(iter_zip(walk_entries(tmp_path), lambda name: compress_type))
+
+
+def test_round_trip(tmp_path):
+    data = _build(tmp_path, zipfile.ZIP_DEFLATED)
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        assert sorted(zf.namelist()) == ['a.txt', 'sub/', 'sub/b.bin']
+        assert zf.read('a.txt') == TEXT
+        assert zf.getinfo('a.txt').date_time[0] == 2020
+
+
+def test_deflate_level_is_applied(tmp_path):
+    data = _build(tmp_path, zipfile.ZIP_DEFLATED)
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        compressed = zf.getinfo('a.txt').compress_size
+    compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15)
+    expected = len(compressor.compress(TEXT) + compressor.flush())
+    assert compressed == expected
+
+
+def test_stored(tmp_path):
+    data = _build(tmp_path, zipfile.ZIP_STORED)
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        info = zf.getinfo('a.txt')
+        assert info.compress_type == zipfile.ZIP_STORED
+        assert info.compress_size == len(TEXT)